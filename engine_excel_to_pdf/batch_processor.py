@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .extractor.xls_reader import XLS_SUFFIX, xls_support_available
 from .interface import MotorCertificados
 from .validators import ValidationError
 
@@ -21,6 +23,7 @@ class ProcessingResult:
         pdf_path: Optional[Path] = None,
         planilha_path: Optional[Path] = None,
         erro: Optional[str] = None,
+        planilha_pendente: Optional[Future] = None,
     ):
         self.arquivo = arquivo
         self.sucesso = sucesso
@@ -28,6 +31,7 @@ class ProcessingResult:
         self.pdf_path = pdf_path
         self.planilha_path = planilha_path
         self.erro = erro
+        self.planilha_pendente = planilha_pendente
 
     def __repr__(self) -> str:
         status = "✓" if self.sucesso else "✗"
@@ -42,6 +46,7 @@ class BatchProcessor:
         extensoes: Optional[List[str]] = None,
         max_workers: Optional[int] = None,
         skip_validation: bool = False,
+        adiar_planilha: bool = True,
     ):
         """
         Initialize batch processor.
@@ -51,10 +56,14 @@ class BatchProcessor:
             extensoes: File extensions to process (default: ['.xlsx', '.xls'])
             max_workers: Number of parallel workers (None = sequential)
             skip_validation: Skip validation checks if True
+            adiar_planilha: Write the consolidated spreadsheet once at the end of
+                each batch instead of after every file (which rewrites the
+                whole workbook per file)
         """
         self.motor = motor or MotorCertificados(skip_validation=skip_validation)
         self.extensoes = extensoes or [".xlsx", ".xls"]
         self.max_workers = max_workers
+        self.adiar_planilha = adiar_planilha
 
     def processar_pasta(
         self,
@@ -83,10 +92,24 @@ class BatchProcessor:
         arquivos = self._listar_arquivos(pasta, recursivo)
         logger.info(f"Found {len(arquivos)} files to process")
 
-        if self.max_workers and self.max_workers > 0:
-            resultados = self._processar_paralelo(arquivos, continuar_erro)
-        else:
-            resultados = self._processar_sequencial(arquivos, continuar_erro)
+        # Storage writes are group-committed for the whole run and the
+        # consolidated spreadsheet is written once, after the last file.
+        with ExitStack() as stack:
+            if self.adiar_planilha:
+                stack.enter_context(self.motor.spreadsheet_generator.deferred())
+            stack.enter_context(self.motor.csv_manager.buffered())
+            if self.max_workers and self.max_workers > 0:
+                resultados = self._processar_paralelo(arquivos, continuar_erro)
+            else:
+                resultados = self._processar_sequencial(arquivos, continuar_erro)
+            # Queued rows must reach the journal before the deferred write.
+            try:
+                self.motor.aguardar_planilhas()
+            except Exception as e:
+                # Reported per file below, from each result's future.
+                logger.error(f"Erro ao gravar a planilha consolidada: {e}")
+            for resultado in resultados:
+                self._conferir_planilha(resultado)
 
         sucessos = [r for r in resultados if r.sucesso]
         erros = [r for r in resultados if not r.sucesso]
@@ -160,8 +183,26 @@ class BatchProcessor:
             for ext in self.extensoes:
                 arquivos.extend(pasta.glob(f"*{ext}"))
 
+        if not xls_support_available():
+            legados = [arquivo for arquivo in arquivos if arquivo.suffix.lower() == XLS_SUFFIX]
+            if legados:
+                logger.warning(
+                    f"Skipping {len(legados)} .xls file(s): install engine-excel-to-pdf[xls] to read them"
+                )
+                arquivos = [arquivo for arquivo in arquivos if arquivo.suffix.lower() != XLS_SUFFIX]
+
         return sorted(arquivos)
 
+    @staticmethod
+    def _conferir_planilha(resultado: ProcessingResult) -> None:
+        """Mark a file as failed when its queued spreadsheet rows were not written."""
+        if not resultado.sucesso or resultado.planilha_pendente is None:
+            return
+        erro = resultado.planilha_pendente.exception()
+        if erro is not None:
+            resultado.sucesso = False
+            resultado.erro = f"Planilha: {erro}"
+
     def _processar_arquivo(self, arquivo: Path) -> ProcessingResult:
         try:
             logger.info(f"Processando: {arquivo.name}")
@@ -173,6 +214,7 @@ class BatchProcessor:
                 certificado_numero=resultado["certificado"].numero_certificado,
                 pdf_path=resultado["pdf"],
                 planilha_path=resultado["planilha"],
+                planilha_pendente=resultado.get("planilha_pendente"),
             )
 
         except ValidationError as e:
@@ -4,6 +4,9 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
+from .constants import SpreadsheetSharding, StorageBackend
+from .extractor.cache import DEFAULT_CACHE_MAX_BYTES
+
 
 @dataclass
 class EngineConfig:
@@ -19,6 +22,7 @@ class EngineConfig:
     planilhas_subdir: str = "spreadsheets"
     dados_subdir: str = "data"
     logs_subdir: str = "logs"
+    cache_subdir: str = "cache"
 
     assets_dir: Optional[Path] = None
     logo_path: Optional[Path] = None
@@ -28,6 +32,11 @@ class EngineConfig:
     sobrescrever_existentes: bool = False
     validar_cnpj: bool = True
     criar_backup: bool = False
+    storage_backend: str = StorageBackend.CSV.value
+    spreadsheet_sharding: str = SpreadsheetSharding.NONE.value
+    planilha_assincrona: bool = False
+    usar_cache_extracao: bool = False
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES
 
     @property
     def pdfs_dir(self) -> Path:
@@ -49,6 +58,11 @@ class EngineConfig:
         """Directory where logs will be saved."""
         return self.output_dir / self.logs_subdir
 
+    @property
+    def cache_dir(self) -> Path:
+        """Directory where cached extraction results will be saved."""
+        return self.output_dir / self.cache_subdir
+
     def criar_diretorios(self) -> None:
         """Create all necessary directories."""
         for diretorio in [
@@ -82,6 +96,7 @@ class EngineConfig:
             "planilhas_subdir": self.planilhas_subdir,
             "dados_subdir": self.dados_subdir,
             "logs_subdir": self.logs_subdir,
+            "cache_subdir": self.cache_subdir,
             "assets_dir": str(self.assets_dir) if self.assets_dir else None,
             "logo_path": str(self.logo_path) if self.logo_path else None,
             "template_name": self.template_name,
@@ -89,4 +104,9 @@ class EngineConfig:
             "sobrescrever_existentes": self.sobrescrever_existentes,
             "validar_cnpj": self.validar_cnpj,
             "criar_backup": self.criar_backup,
+            "storage_backend": self.storage_backend,
+            "spreadsheet_sharding": self.spreadsheet_sharding,
+            "planilha_assincrona": self.planilha_assincrona,
+            "usar_cache_extracao": self.usar_cache_extracao,
+            "cache_max_bytes": self.cache_max_bytes,
         }
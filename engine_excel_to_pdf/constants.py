@@ -18,6 +18,26 @@ class CSVFile(str, Enum):
     METHODS = "metodos_aplicacao.csv"
 
 
+class ExtractionEngine(str, Enum):
+    """Backends available to read Excel files."""
+    OPENPYXL = "openpyxl"
+    XML = "xml"
+
+
+class StorageBackend(str, Enum):
+    """Where certificate data is persisted."""
+    CSV = "csv"
+    SQLITE = "sqlite"
+
+
+class SpreadsheetSharding(str, Enum):
+    """How the consolidated spreadsheet is split into workbooks."""
+    NONE = "none"
+    MONTH = "month"
+    YEAR = "year"
+    CNPJ = "cnpj"
+
+
 class OutputDir(str, Enum):
     """Output directory names."""
     DATA = "dados"
@@ -39,6 +59,11 @@ FILE_ORIGIN_EXCEL = FileOrigin.EXCEL_UPLOAD.value
 CSV_CERTIFICATES = CSVFile.CERTIFICATES.value
 CSV_PRODUCTS = CSVFile.PRODUCTS.value
 CSV_METHODS = CSVFile.METHODS.value
+SQLITE_DATABASE = "certificados.db"
+CSV_LOCK_FILE = ".csv.lock"
+CSV_JOURNAL_FILE = ".csv.journal"
+CSV_ARCHIVE_DIR = "historico"
+IDENTITY_INDEX = "identidades.idx"
 DIR_DATA = OutputDir.DATA.value
 DIR_OUTPUTS = OutputDir.OUTPUTS.value
 DIR_SPREADSHEETS = OutputDir.SPREADSHEETS.value
@@ -0,0 +1,180 @@
+"""On-disk cache of extracted bundles keyed by spreadsheet content.
+
+Entries are JSON files named after the file's SHA-256 combined with a
+fingerprint of the extractor config, so re-uploading an identical spreadsheet
+skips openpyxl entirely. The directory is bounded by ``max_bytes``; reads
+refresh an entry's mtime and the least recently used entries are evicted first.
+
+The entries and their sizes are listed once, on first use, and tracked in
+memory afterwards, so a ``put`` only touches the directory to evict. Entries
+written by other processes are picked up the next time a cache is opened.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ..models import Certificado, CertificadoBundle, MetodoAplicacao, ProdutoQuimico
+from ..utils import file_sha256
+
+if TYPE_CHECKING:
+    from .excel_extractor import ExcelExtractorConfig
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Fields that depend on the upload, not on the spreadsheet content.
+_UPLOAD_FIELDS = ("id", "arquivo_origem", "data_cadastro")
+# Config fields that choose how the workbook is read, not what is extracted.
+_READER_FIELDS = ("read_only", "engine")
+# Temporary files older than this were left behind by an interrupted put.
+_STALE_TMP_SECONDS = 3600
+
+
+def config_fingerprint(config: "ExcelExtractorConfig") -> str:
+    fields = asdict(config)
+    for name in _READER_FIELDS:
+        fields.pop(name, None)
+    payload = json.dumps(
+        {"version": CACHE_FORMAT_VERSION, "config": fields},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Size-bounded LRU cache of extraction results stored in ``cache_dir``."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> entry size, least recently used first; None until first use.
+        self._entries: Optional["OrderedDict[str, int]"] = None
+        self._total = 0
+
+    def key_for(self, file_path: Path, fingerprint: str, file_hash: Optional[str] = None) -> str:
+        """Entry key of ``file_path``; pass ``file_hash`` when its SHA-256 is already known."""
+        if file_hash is None:
+            file_hash = file_sha256(file_path)
+        return hashlib.sha256(f"{file_hash}:{fingerprint}".encode("ascii")).hexdigest()
+
+    def get(self, key: str, arquivo_origem: str) -> Optional[CertificadoBundle]:
+        """Cached bundle for ``key``, stamped with a fresh upload identity."""
+        path = self._entry_path(key)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            bundle = self._deserialize(payload, arquivo_origem)
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {exc}")
+            path.unlink(missing_ok=True)
+            self._forget(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            entries = self._load_entries()
+            if key in entries:
+                entries.move_to_end(key)
+        return bundle
+
+    def put(self, key: str, bundle: CertificadoBundle) -> None:
+        data = json.dumps(self._serialize(bundle), ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            entries = self._load_entries()
+            tmp_name = None
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(data)
+                os.replace(tmp_name, self._entry_path(key))
+            except OSError as exc:
+                logger.warning(f"Could not write extraction cache entry: {exc}")
+                if tmp_name is not None:
+                    Path(tmp_name).unlink(missing_ok=True)
+                return
+            self._total += len(data) - entries.pop(key, 0)
+            entries[key] = len(data)
+            self._evict(entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in self.cache_dir.glob("*.json"):
+                entry.unlink(missing_ok=True)
+            self._entries = OrderedDict()
+            self._total = 0
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            if self._entries is not None:
+                self._total -= self._entries.pop(key, 0)
+
+    def _load_entries(self) -> "OrderedDict[str, int]":
+        """List the directory once: sizes by recency, and stale temporary files removed."""
+        if self._entries is not None:
+            return self._entries
+        found = []
+        stale_before = time.time() - _STALE_TMP_SECONDS
+        for entry in self.cache_dir.glob("*"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.suffix == ".json":
+                found.append((stat.st_mtime, entry.stem, stat.st_size))
+            elif entry.suffix == ".tmp" and stat.st_mtime < stale_before:
+                entry.unlink(missing_ok=True)
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total = sum(self._entries.values())
+        return self._entries
+
+    def _evict(self, entries: "OrderedDict[str, int]") -> None:
+        while self._total > self.max_bytes and entries:
+            key, size = entries.popitem(last=False)
+            self._entry_path(key).unlink(missing_ok=True)
+            self._total -= size
+
+    @staticmethod
+    def _serialize(bundle: CertificadoBundle) -> Dict[str, Any]:
+        payload = bundle.to_dict()
+        for name in _UPLOAD_FIELDS:
+            payload["certificado"].pop(name, None)
+        return payload
+
+    @staticmethod
+    def _deserialize(payload: Dict[str, Any], arquivo_origem: str) -> CertificadoBundle:
+        data = dict(payload["certificado"])
+        data["data_execucao"] = date.fromisoformat(data["data_execucao"])
+        data["data_validade"] = date.fromisoformat(data["data_validade"])
+        certificado = Certificado(
+            **data,
+            arquivo_origem=arquivo_origem,
+            data_cadastro=datetime.now(timezone.utc),
+        )
+        return CertificadoBundle(
+            certificado=certificado,
+            produtos=[ProdutoQuimico(**produto) for produto in payload["produtos"]],
+            metodos=[MetodoAplicacao(**metodo) for metodo in payload["metodos"]],
+        )
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from itertools import islice
 from pathlib import Path
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Mapping, Optional
 
 if TYPE_CHECKING:
-    from openpyxl import load_workbook
     from openpyxl.worksheet.worksheet import Worksheet
 
+from ..constants import ExtractionEngine
 from ..models import Certificado, CertificadoBundle, MetodoAplicacao, ProdutoQuimico
 from ..utils import normalize_whitespace, parse_pt_br_date
+from .cache import ExtractionCache, config_fingerprint
+from .extraction_plan import ExtractedValues, ExtractionPlan, Row, is_blank
+from .xls_reader import XLS_SUFFIX, XlsReader
+from .xlsx_reader import UnsupportedWorkbookError, XlsxReader
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(slots=True)
@@ -26,6 +34,9 @@ class ExcelExtractorConfig:
     metodo_start_row: int
     metodo_end_row: Optional[int] = None
     certificado_map_fallbacks: Optional[dict[str, List[str]]] = None
+    read_only: bool = False
+    engine: str = ExtractionEngine.OPENPYXL.value
+    block_row_stride: Optional[int] = None
 
 
 DEFAULT_CONFIG = ExcelExtractorConfig(
@@ -55,51 +66,346 @@ DEFAULT_CONFIG = ExcelExtractorConfig(
 )
 
 
+class _SheetRows:
+    """Row stream of one worksheet that can be probed before it is consumed.
+
+    Rows pulled by :meth:`value` are cached and replayed first by ``__iter__``,
+    which then continues with the rest of the stream without caching it. Only
+    the rows the extraction actually reaches are ever decoded.
+    """
+
+    def __init__(self, title: str, rows: Iterator[Row]) -> None:
+        self.title = title
+        self._cached: dict[int, Mapping[int, Any]] = {}
+        self._last_row = 0
+        self._source: Optional[Iterator[Row]] = rows
+
+    def close(self) -> None:
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def value(self, row: int, column: int) -> Any:
+        while self._source is not None and self._last_row < row:
+            item = next(self._source, None)
+            if item is None:
+                self._source = None
+                break
+            self._last_row, self._cached[item[0]] = item
+        return self._cached.get(row, {}).get(column)
+
+    def __iter__(self) -> Iterator[Row]:
+        yield from self._cached.items()
+        if self._source is not None:
+            yield from self._source
+
+
+class _RowCursor:
+    """Row iterator shared by the consecutive template blocks of one sheet.
+
+    A plan stops after the first row past its block, so that row is handed
+    again to the next block; plans ignore rows before their own start.
+    """
+
+    def __init__(self, rows: Iterable[Row]) -> None:
+        self._rows = iter(rows)
+        self._last: Optional[Row] = None
+
+    def block(self) -> Iterator[Row]:
+        if self._last is not None:
+            yield self._last
+        for item in self._rows:
+            self._last = item
+            yield item
+
+
+def _openpyxl_rows(worksheet, min_row: int, max_column: int) -> Iterator[Row]:
+    rows = worksheet.iter_rows(min_row=min_row, max_col=max_column, values_only=True)
+    for row, values in enumerate(rows, start=min_row):
+        yield row, {column: value for column, value in enumerate(values, start=1) if value is not None}
+
+
 class ExcelExtractor:
-    def __init__(self, config: ExcelExtractorConfig = DEFAULT_CONFIG):
+    def __init__(
+        self,
+        config: ExcelExtractorConfig = DEFAULT_CONFIG,
+        cache: Optional[ExtractionCache] = None,
+    ):
         self.config = config
+        self.cache = cache
+        self._plan = ExtractionPlan.compile(config)
+        self._fingerprint = config_fingerprint(config) if cache is not None else None
+
+    def extract(self, file_path: Path, file_hash: Optional[str] = None) -> CertificadoBundle:
+        """Extract the certificate of ``file_path``.
+
+        ``file_hash`` is the file's SHA-256 when the caller already has it; the
+        cache then does not read the file again to build its key.
+        """
+        file_path = Path(file_path)
+        if self.cache is None:
+            return self._extract(file_path)
+
+        key = self.cache.key_for(file_path, self._fingerprint, file_hash=file_hash)
+        bundle = self.cache.get(key, arquivo_origem=file_path.name)
+        if bundle is not None:
+            logger.debug(f"Extraction cache hit for {file_path.name}")
+            return bundle
+        bundle = self._extract(file_path)
+        self.cache.put(key, bundle)
+        return bundle
+
+    def _extract(self, file_path: Path) -> CertificadoBundle:
+        if file_path.suffix.lower() == XLS_SUFFIX:
+            return self._extract_xls(file_path)
+        if ExtractionEngine(self.config.engine) is ExtractionEngine.XML:
+            try:
+                return self._extract_xml(file_path)
+            except UnsupportedWorkbookError as exc:
+                logger.info(f"Falling back to openpyxl for {file_path.name}: {exc}")
+
+        if self.config.read_only:
+            return self._extract_streaming(file_path)
+        return self._extract_full(file_path)
+
+    def iter_bundles(self, file_path: Path) -> Iterator[CertificadoBundle]:
+        """Yield one bundle per certificate found in the workbook.
+
+        Every worksheet with numero_certificado and numero_licenca filled is a
+        certificate. With ``block_row_stride`` set, each sheet may also hold the
+        template repeated every ``block_row_stride`` rows; blocks are read until
+        one comes out without numero/licenca. Sheets are streamed one at a time,
+        so only the bundle being yielded is kept in memory.
+
+        ``arquivo_origem`` is ``"<file>#<sheet>"``, plus ``":<block>"`` (1-based)
+        in block mode, so certificates from the same file stay distinguishable.
+
+        The config is validated before anything is read. With the XML engine, a
+        sheet the reader cannot parse hands the rest of the workbook over to
+        openpyxl, which resumes after the last bundle already yielded; an error
+        openpyxl also raises ends the stream after the bundles yielded so far.
+        """
+        stride = self.config.block_row_stride
+        if stride is not None:
+            last_row = self._plan.last_row
+            if last_row is None:
+                raise ValueError("block_row_stride requires metodo_end_row to be set")
+            if stride <= last_row - self._plan.min_row:
+                raise ValueError("block_row_stride is smaller than the template block")
+        return self._iter_bundles(Path(file_path))
+
+    def _iter_bundles(self, file_path: Path) -> Iterator[CertificadoBundle]:
+        if file_path.suffix.lower() == XLS_SUFFIX:
+            with XlsReader(file_path) as reader:
+                for name in reader.sheet_names:
+                    rows = reader.iter_rows(
+                        name, min_row=self._plan.min_row, max_column=self._plan.max_column
+                    )
+                    yield from self._iter_sheet_bundles(file_path.name, name, rows)
+            return
+
+        # (sheets finished, bundles already yielded from the next one) when the
+        # XML reader gives up part of the way through the workbook.
+        resume_at = (0, 0)
+        if ExtractionEngine(self.config.engine) is ExtractionEngine.XML:
+            sheets_done = yielded = 0
+            try:
+                with XlsxReader(file_path) as reader:
+                    for name in reader.sheet_names:
+                        rows = reader.iter_rows(
+                            name, min_row=self._plan.min_row, max_column=self._plan.max_column
+                        )
+                        for bundle in self._iter_sheet_bundles(file_path.name, name, rows):
+                            yield bundle
+                            yielded += 1
+                        sheets_done, yielded = sheets_done + 1, 0
+                return
+            except UnsupportedWorkbookError as exc:
+                logger.info(f"Falling back to openpyxl for {file_path.name}: {exc}")
+                resume_at = (sheets_done, yielded)
+
+        from openpyxl import load_workbook
+
+        sheets_done, yielded = resume_at
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for ws in workbook.worksheets[sheets_done:]:
+                ws.reset_dimensions()
+                rows = _openpyxl_rows(ws, self._plan.min_row, self._plan.max_column)
+                yield from islice(self._iter_sheet_bundles(file_path.name, ws.title, rows), yielded, None)
+                yielded = 0
+        finally:
+            workbook.close()
+
+    def _iter_sheet_bundles(
+        self, file_name: str, sheet_title: str, rows: Iterator[Row]
+    ) -> Iterator[CertificadoBundle]:
+        stride = self.config.block_row_stride
+        cursor = _RowCursor(rows)
+        block = 0
+        try:
+            while True:
+                plan = self._plan.shifted(block * stride) if block else self._plan
+                extracted = plan.execute(cursor.block())
+                if is_blank(extracted.certificado["numero_certificado"]) or is_blank(
+                    extracted.certificado["numero_licenca"]
+                ):
+                    return
+                block += 1
+                arquivo_origem = f"{file_name}#{sheet_title}"
+                if stride:
+                    arquivo_origem = f"{arquivo_origem}:{block}"
+                yield self._build_bundle(extracted, arquivo_origem)
+                if not stride:
+                    return
+        finally:
+            rows.close()
+
+    def _extract_full(self, file_path: Path) -> CertificadoBundle:
+        """Extract from a fully loaded workbook.
+
+        openpyxl can only fully load every sheet at once, so workbooks with
+        several worksheets are probed first (just the numero/licenca cells of
+        each sheet, straight from the XML) and only the winning sheet is then
+        read, in read-only mode. Single-sheet workbooks, and packages the probe
+        cannot read, keep the plain full load.
+        """
+        try:
+            sheet_names, winner = self._probe_worksheets(file_path)
+        except UnsupportedWorkbookError:
+            sheet_names, winner = [], None
+        if len(sheet_names) > 1 and winner is not None:
+            return self._extract_streaming(file_path, sheet_title=winner)
 
-    def extract(self, file_path: Path) -> CertificadoBundle:
         from openpyxl import load_workbook
         
         workbook = load_workbook(file_path, data_only=True)
-        worksheet = self._select_worksheet(workbook) or workbook.active
+        sheets = [self._openpyxl_sheet(ws) for ws in workbook.worksheets]
+        # The active sheet may be a chartsheet, which is not in ``worksheets``.
+        sheet = self._require_sheet(self._pick_sheet(sheets, workbook.active.title), file_path)
+        return self._build_bundle(self._plan.execute(sheet), file_path.name)
+
+    def _probe_worksheets(self, file_path: Path) -> tuple[List[str], Optional[str]]:
+        """Return the worksheet names and the title of the sheet to extract.
+
+        Each sheet is parsed only up to the identifying cells, one sheet at a
+        time, stopping at the first sheet where both are filled.
+        """
+        plan = self._plan
+        min_row = min(plan.numero_cell[0], plan.licenca_cell[0])
+        max_column = max(plan.numero_cell[1], plan.licenca_cell[1])
+        with XlsxReader(file_path) as reader:
+            sheets = [
+                _SheetRows(name, reader.iter_rows(name, min_row=min_row, max_column=max_column))
+                for name in reader.sheet_names
+            ]
+            sheet = self._pick_sheet(sheets, reader.active_sheet_name)
+            return reader.sheet_names, sheet.title if sheet else None
+
+    def _extract_streaming(self, file_path: Path, sheet_title: Optional[str] = None) -> CertificadoBundle:
+        """Extract using openpyxl's read-only mode.
+
+        Only the rows between the first and last cell referenced by the config
+        are decoded (open-ended ranges are followed until they end), and the
+        archive is closed before the models are built. With ``sheet_title``
+        the other sheets are not touched at all.
+        """
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            worksheets = [workbook[sheet_title]] if sheet_title else workbook.worksheets
+            sheets = []
+            for ws in worksheets:
+                # The <dimension> tag is frequently wrong in generated files; full
+                # mode ignores it, so the stream must not be truncated by it either.
+                ws.reset_dimensions()
+                sheets.append(self._openpyxl_sheet(ws))
+            sheet = self._pick_sheet(sheets, workbook.active.title, fallback_first=True)
+            sheet = self._require_sheet(sheet, file_path)
+            extracted = self._plan.execute(sheet)
+        finally:
+            workbook.close()
+        return self._build_bundle(extracted, file_path.name)
+
+    def _extract_xml(self, file_path: Path) -> CertificadoBundle:
+        """Extract straight from the sheet XML, without openpyxl objects.
+
+        Raises :class:`UnsupportedWorkbookError` when the package cannot be
+        read this way; ``extract`` then falls back to openpyxl.
+        """
+        plan = self._plan
+        with XlsxReader(file_path) as reader:
+            sheets = [
+                _SheetRows(name, reader.iter_rows(name, min_row=plan.min_row, max_column=plan.max_column))
+                for name in reader.sheet_names
+            ]
+            sheet = self._require_sheet(self._pick_sheet(sheets, reader.active_sheet_name), file_path)
+            extracted = plan.execute(sheet)
+        return self._build_bundle(extracted, file_path.name)
+
+    def _extract_xls(self, file_path: Path) -> CertificadoBundle:
+        """Extract from a legacy .xls workbook with the same compiled plan."""
+        plan = self._plan
+        with XlsReader(file_path) as reader:
+            sheets = [
+                _SheetRows(name, reader.iter_rows(name, min_row=plan.min_row, max_column=plan.max_column))
+                for name in reader.sheet_names
+            ]
+            sheet = self._require_sheet(self._pick_sheet(sheets, reader.active_sheet_name), file_path)
+            extracted = plan.execute(sheet)
+        return self._build_bundle(extracted, file_path.name)
 
-        certificado_data = self._extract_certificado(worksheet, file_path.name)
-        produtos = self._extract_produtos(worksheet)
-        metodos = self._extract_metodos(worksheet)
+    def _openpyxl_sheet(self, worksheet: "Worksheet") -> _SheetRows:
+        rows = _openpyxl_rows(worksheet, self._plan.min_row, self._plan.max_column)
+        return _SheetRows(worksheet.title, rows)
 
-        return CertificadoBundle(certificado=certificado_data, produtos=produtos, metodos=metodos)
+    def _pick_sheet(
+        self, sheets: List[_SheetRows], active_title: Optional[str], fallback_first: bool = False
+    ) -> Optional[_SheetRows]:
+        """Selected sheet, else the active one; the other streams are closed.
 
-    def _select_worksheet(self, workbook):
-        for ws in getattr(workbook, "worksheets", []):
-            numero = ws[self.config.certificado_map["numero_certificado"]].value if ws[self.config.certificado_map["numero_certificado"]].value is not None else ""
-            licenca = ws[self.config.certificado_map["numero_licenca"]].value if ws[self.config.certificado_map["numero_licenca"]].value is not None else ""
-            if str(numero).strip() and str(licenca).strip():
-                return ws
+        With ``fallback_first`` the first worksheet is used when the active
+        sheet is not among ``sheets`` (a chartsheet), before its stream is
+        closed.
+        """
+        sheet = self._select_worksheet(sheets)
+        if sheet is None:
+            sheet = next((candidate for candidate in sheets if candidate.title == active_title), None)
+        if sheet is None and fallback_first and sheets:
+            sheet = sheets[0]
+        for candidate in sheets:
+            if candidate is not sheet:
+                candidate.close()
+        return sheet
+
+    @staticmethod
+    def _require_sheet(sheet: Optional[_SheetRows], file_path: Path) -> _SheetRows:
+        if sheet is None:
+            raise UnsupportedWorkbookError(f"No worksheet found in {file_path.name}")
+        return sheet
+
+    def _select_worksheet(self, sheets: Iterable[_SheetRows]) -> Optional[_SheetRows]:
+        for sheet in sheets:
+            numero = sheet.value(*self._plan.numero_cell)
+            licenca = sheet.value(*self._plan.licenca_cell)
+            if str(numero if numero is not None else "").strip() and str(licenca if licenca is not None else "").strip():
+                return sheet
         return None
 
-    def _extract_certificado(self, worksheet: "Worksheet", arquivo_origem: str) -> Certificado:
-        values: dict[str, str] = {}
-        for field, cell_ref in self.config.certificado_map.items():
-            # Try primary cell location
-            cell_value = worksheet[cell_ref].value if worksheet[cell_ref].value is not None else ""
-            
-            # If empty and field has fallbacks configured, try alternative cells
-            if (not cell_value or not str(cell_value).strip()) and \
-               self.config.certificado_map_fallbacks and \
-               field in self.config.certificado_map_fallbacks:
-                
-                for fallback_cell in self.config.certificado_map_fallbacks[field]:
-                    fallback_value = worksheet[fallback_cell].value if worksheet[fallback_cell].value is not None else ""
-                    if fallback_value and str(fallback_value).strip():
-                        cell_value = fallback_value
-                        break  # Use first non-empty value found
-            
-            values[field] = normalize_whitespace(str(cell_value))
-
-        data_execucao = parse_pt_br_date(values["data_execucao"])
-        data_validade = parse_pt_br_date(values["data_validade"])
+    def _build_bundle(self, extracted: ExtractedValues, arquivo_origem: str) -> CertificadoBundle:
+        return CertificadoBundle(
+            certificado=self._build_certificado(extracted.certificado, arquivo_origem),
+            produtos=self._build_produtos(extracted),
+            metodos=self._build_metodos(extracted),
+        )
+
+    def _build_certificado(self, raw_values: dict[str, Any], arquivo_origem: str) -> Certificado:
+        values = {field: normalize_whitespace(str(value)) for field, value in raw_values.items()}
+
+        # Date cells arrive as datetime; only text cells need string parsing.
+        data_execucao = parse_pt_br_date(self._date_value(raw_values, values, "data_execucao"))
+        data_validade = parse_pt_br_date(self._date_value(raw_values, values, "data_validade"))
 
         endereco_completo = values["endereco_completo"]
         bairro = None
@@ -127,76 +433,31 @@ class ExcelExtractor:
             cidade=cidade,
         )
 
-    def _extract_produtos(self, worksheet: "Worksheet") -> List[ProdutoQuimico]:
-        produtos: List[ProdutoQuimico] = []
-        
-        classes = self._extract_column_values(
-            worksheet,
-            column=self.config.classe_quimica_column,
-            start_row=self.config.classe_quimica_start_row
-        )
-
-        row = self.config.produto_start_row
-        index = 0
-        while True:
-            nome = worksheet.cell(row=row, column=self.config.produto_nome_column).value
-            if not nome or not str(nome).strip():
-                break
-
-            concentracao_value = worksheet.cell(row=row, column=self.config.produto_concentracao_column).value
-            concentracao = self._convert_concentracao(concentracao_value)
-            classe = classes[index] if index < len(classes) else ""
+    @staticmethod
+    def _date_value(raw_values: dict[str, Any], values: dict[str, str], field: str) -> str | date:
+        raw = raw_values[field]
+        return raw if isinstance(raw, date) else values[field]
 
-            produtos.append(
-                ProdutoQuimico(
-                    nome_produto=normalize_whitespace(str(nome)),
-                    classe_quimica=normalize_whitespace(classe),
-                    concentracao=concentracao,
-                )
-            )
-            index += 1
-            row += 1
-
-        return produtos
-
-    def _extract_metodos(self, worksheet: "Worksheet") -> List[MetodoAplicacao]:
-        metodos: List[MetodoAplicacao] = []
-        start = self.config.metodo_start_row
-        end = self.config.metodo_end_row or worksheet.max_row
-
-        for row in range(start, end + 1):
-            descricao = worksheet.cell(row=row, column=self.config.metodo_descricao_column).value
-            if not descricao or not str(descricao).strip():
-                continue
-            quantidade = worksheet.cell(row=row, column=self.config.metodo_quantidade_column).value
-            quantidade_str = normalize_whitespace(str(quantidade)) if quantidade not in (None, "") else ""
-            metodos.append(
-                MetodoAplicacao(
-                    metodo=normalize_whitespace(str(descricao)),
-                    quantidade=quantidade_str,
-                )
+    def _build_produtos(self, extracted: ExtractedValues) -> List[ProdutoQuimico]:
+        classes = extracted.classes
+        return [
+            ProdutoQuimico(
+                nome_produto=normalize_whitespace(str(nome)),
+                classe_quimica=normalize_whitespace(str(classes[index])) if index < len(classes) else "",
+                concentracao=self._convert_concentracao(concentracao_value),
             )
+            for index, (nome, concentracao_value) in enumerate(extracted.produtos)
+        ]
 
-        return metodos
-
-    def _extract_column_values(
-        self, worksheet: "Worksheet", column: int, start_row: int, end_row: Optional[int] = None
-    ) -> List[str]:
-        values: List[str] = []
-        row = start_row
-        max_row = end_row or worksheet.max_row
-
-        while row <= max_row:
-            cell_value = worksheet.cell(row=row, column=column).value
-            if not cell_value or not str(cell_value).strip():
-                if end_row is None:
-                    break
-                row += 1
-                continue
-            values.append(normalize_whitespace(str(cell_value)))
-            row += 1
-
-        return values
+    @staticmethod
+    def _build_metodos(extracted: ExtractedValues) -> List[MetodoAplicacao]:
+        return [
+            MetodoAplicacao(
+                metodo=normalize_whitespace(str(descricao)),
+                quantidade=normalize_whitespace(str(quantidade)) if quantidade not in (None, "") else "",
+            )
+            for descricao, quantidade in extracted.metodos
+        ]
 
     @staticmethod
     def _convert_concentracao(value) -> Optional[float]:
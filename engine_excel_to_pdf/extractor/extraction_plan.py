@@ -0,0 +1,211 @@
+"""Extraction plan compiled from an :class:`ExcelExtractorConfig`.
+
+The plan resolves every A1 reference once and describes what to collect from
+each row, so a worksheet is read in a single ascending pass that stops as soon
+as nothing else can be found.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .excel_extractor import ExcelExtractorConfig
+
+Coordinate = Tuple[int, int]
+Row = Tuple[int, Mapping[int, Any]]
+
+
+def is_blank(value: Any) -> bool:
+    return not value or not str(value).strip()
+
+
+@dataclass(frozen=True, slots=True)
+class RowRange:
+    """Consecutive rows read from ``key_column`` (plus ``extra_columns``).
+
+    With ``until_blank`` the range ends at the first blank key cell; otherwise
+    blank keys are skipped until ``end_row`` (or the end of the sheet).
+    """
+
+    key_column: int
+    start_row: int
+    extra_columns: Tuple[int, ...] = ()
+    end_row: Optional[int] = None
+    until_blank: bool = False
+
+
+@dataclass(slots=True)
+class ExtractedValues:
+    """Raw cell values collected by :meth:`ExtractionPlan.execute`."""
+
+    certificado: Dict[str, Any]
+    classes: List[Any]
+    produtos: List[Tuple[Any, Any]]
+    metodos: List[Tuple[Any, Any]]
+
+
+@dataclass(slots=True)
+class _RangeState:
+    spec: RowRange
+    next_row: int
+    items: List[Tuple[Any, ...]] = field(default_factory=list)
+    open: bool = True
+
+    def feed(self, row: int, values: Mapping[int, Any]) -> None:
+        spec = self.spec
+        if row < spec.start_row:
+            return
+        if spec.end_row is not None and row > spec.end_row:
+            self.open = False
+            return
+        key = values.get(spec.key_column)
+        if spec.until_blank:
+            if row != self.next_row or is_blank(key):
+                self.open = False
+                return
+            self.next_row += 1
+        elif is_blank(key):
+            return
+        self.items.append((key, *(values.get(column) for column in spec.extra_columns)))
+
+
+@dataclass(frozen=True, slots=True)
+class ExtractionPlan:
+    fields: Tuple[Tuple[str, Tuple[Coordinate, ...]], ...]
+    classes: RowRange
+    produtos: RowRange
+    metodos: RowRange
+    numero_cell: Coordinate
+    licenca_cell: Coordinate
+    min_row: int
+    max_column: int
+    last_cell_row: int
+    cells_by_row: Mapping[int, Tuple[Coordinate, ...]]
+
+    @classmethod
+    def compile(cls, config: "ExcelExtractorConfig") -> "ExtractionPlan":
+        from openpyxl.utils.cell import coordinate_to_tuple
+
+        fallbacks = config.certificado_map_fallbacks or {}
+        fields = tuple(
+            (
+                name,
+                tuple(coordinate_to_tuple(ref) for ref in [cell_ref, *fallbacks.get(name, [])]),
+            )
+            for name, cell_ref in config.certificado_map.items()
+        )
+        classes = RowRange(
+            key_column=config.classe_quimica_column,
+            start_row=config.classe_quimica_start_row,
+            until_blank=True,
+        )
+        produtos = RowRange(
+            key_column=config.produto_nome_column,
+            start_row=config.produto_start_row,
+            extra_columns=(config.produto_concentracao_column,),
+            until_blank=True,
+        )
+        metodos = RowRange(
+            key_column=config.metodo_descricao_column,
+            start_row=config.metodo_start_row,
+            extra_columns=(config.metodo_quantidade_column,),
+            end_row=config.metodo_end_row,
+        )
+        ranges = (classes, produtos, metodos)
+
+        coordinates = sorted({coordinate for _, chain in fields for coordinate in chain})
+        cells_by_row: Dict[int, Tuple[Coordinate, ...]] = {}
+        for coordinate in coordinates:
+            cells_by_row[coordinate[0]] = cells_by_row.get(coordinate[0], ()) + (coordinate,)
+
+        columns = [column for _, column in coordinates]
+        for spec in ranges:
+            columns.append(spec.key_column)
+            columns.extend(spec.extra_columns)
+
+        return cls(
+            fields=fields,
+            classes=classes,
+            produtos=produtos,
+            metodos=metodos,
+            numero_cell=coordinate_to_tuple(config.certificado_map["numero_certificado"]),
+            licenca_cell=coordinate_to_tuple(config.certificado_map["numero_licenca"]),
+            min_row=min([row for row, _ in coordinates] + [spec.start_row for spec in ranges]),
+            max_column=max(columns),
+            last_cell_row=max((row for row, _ in coordinates), default=0),
+            cells_by_row=cells_by_row,
+        )
+
+    @property
+    def last_row(self) -> Optional[int]:
+        """Last row the plan can read, or ``None`` when it runs to the sheet end."""
+        if self.metodos.end_row is None:
+            return None
+        return max(self.last_cell_row, self.metodos.end_row)
+
+    def shifted(self, rows: int) -> "ExtractionPlan":
+        """Same plan moved ``rows`` rows down, for repeated template blocks."""
+
+        def move(coordinate: Coordinate) -> Coordinate:
+            return coordinate[0] + rows, coordinate[1]
+
+        def move_range(spec: RowRange) -> RowRange:
+            end_row = None if spec.end_row is None else spec.end_row + rows
+            return replace(spec, start_row=spec.start_row + rows, end_row=end_row)
+
+        return replace(
+            self,
+            fields=tuple((name, tuple(move(c) for c in chain)) for name, chain in self.fields),
+            classes=move_range(self.classes),
+            produtos=move_range(self.produtos),
+            metodos=move_range(self.metodos),
+            numero_cell=move(self.numero_cell),
+            licenca_cell=move(self.licenca_cell),
+            min_row=self.min_row + rows,
+            last_cell_row=self.last_cell_row + rows,
+            cells_by_row={
+                row + rows: tuple(move(c) for c in coordinates)
+                for row, coordinates in self.cells_by_row.items()
+            },
+        )
+
+    def execute(self, rows: Iterable[Row]) -> ExtractedValues:
+        """Collect every planned value in one pass over ascending ``rows``.
+
+        ``rows`` may skip empty rows. Iteration stops once the last fixed cell
+        has been passed and every range is closed.
+        """
+        cells: Dict[Coordinate, Any] = {}
+        states = [
+            _RangeState(spec, next_row=spec.start_row)
+            for spec in (self.classes, self.produtos, self.metodos)
+        ]
+
+        for row, values in rows:
+            for coordinate in self.cells_by_row.get(row, ()):
+                value = values.get(coordinate[1])
+                if value is not None:
+                    cells[coordinate] = value
+            for state in states:
+                if state.open:
+                    state.feed(row, values)
+            if row >= self.last_cell_row and not any(state.open for state in states):
+                break
+
+        classes, produtos, metodos = states
+        return ExtractedValues(
+            certificado={name: self._resolve(chain, cells) for name, chain in self.fields},
+            classes=[key for key, in classes.items],
+            produtos=produtos.items,
+            metodos=metodos.items,
+        )
+
+    @staticmethod
+    def _resolve(chain: Tuple[Coordinate, ...], cells: Mapping[Coordinate, Any]) -> Any:
+        """First non-blank value along the fallback chain, else the primary cell."""
+        for coordinate in chain:
+            value = cells.get(coordinate)
+            if not is_blank(value):
+                return value
+        return cells.get(chain[0], "")
@@ -0,0 +1,153 @@
+"""Registry of template layouts with anchor-based detection.
+
+Each :class:`TemplateLayout` pairs an :class:`ExcelExtractorConfig` with a few
+anchor cells (template labels or cells that must be filled in). Detection reads
+the anchors of every registered layout in one probe of the sheet XML, stopping
+at the last anchor row of each sheet.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from ..models import CertificadoBundle
+from ..utils import normalize_whitespace
+from .cache import ExtractionCache
+from .excel_extractor import DEFAULT_CONFIG, ExcelExtractor, ExcelExtractorConfig
+from .extraction_plan import Coordinate, is_blank
+from .xlsx_reader import UnsupportedWorkbookError, XlsxReader
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class TemplateLayout:
+    """A template variant and the anchor cells that identify it.
+
+    ``anchors`` maps A1 references to the expected label, compared ignoring
+    case and extra whitespace, or to ``None`` when the cell only has to be
+    filled in.
+    """
+
+    name: str
+    config: ExcelExtractorConfig
+    anchors: Mapping[str, Optional[str]] = field(default_factory=dict)
+
+
+DEFAULT_LAYOUT = TemplateLayout(
+    name="padrao",
+    config=DEFAULT_CONFIG,
+    anchors={"C10": None, "I10": None},
+)
+
+
+def _normalize_label(value: Any) -> str:
+    return normalize_whitespace(str(value)).casefold()
+
+
+@dataclass(frozen=True, slots=True)
+class _CompiledLayout:
+    layout: TemplateLayout
+    anchors: Tuple[Tuple[Coordinate, Optional[str]], ...]
+
+    def matches(self, cells: Mapping[Coordinate, Any]) -> bool:
+        for coordinate, expected in self.anchors:
+            value = cells.get(coordinate)
+            if is_blank(value):
+                return False
+            if expected is not None and _normalize_label(value) != expected:
+                return False
+        return True
+
+
+class LayoutRegistry:
+    """Pick the :class:`TemplateLayout` of each workbook and extract with it.
+
+    Exposes ``extract``/``iter_bundles`` so it can be passed wherever an
+    :class:`ExcelExtractor` is expected. Workbooks matching no registered
+    layout, or that cannot be probed, use ``default``.
+    """
+
+    def __init__(
+        self,
+        layouts: Iterable[TemplateLayout] = (),
+        default: TemplateLayout = DEFAULT_LAYOUT,
+        cache: Optional[ExtractionCache] = None,
+    ) -> None:
+        self.default = default
+        self.cache = cache
+        self._compiled: List[_CompiledLayout] = []
+        self._extractors: Dict[str, ExcelExtractor] = {
+            default.name: ExcelExtractor(default.config, cache=cache)
+        }
+        self._layouts: Dict[str, TemplateLayout] = {default.name: default}
+        self._lock = threading.Lock()
+        self._max_row = 0
+        self._max_column = 0
+        for layout in layouts:
+            self.register(layout)
+
+    def register(self, layout: TemplateLayout) -> None:
+        from openpyxl.utils.cell import coordinate_to_tuple
+
+        if not layout.anchors:
+            raise ValueError(f"Layout {layout.name!r} has no anchors")
+        if layout.name in self._layouts:
+            raise ValueError(f"Layout {layout.name!r} is already registered")
+
+        anchors = tuple(
+            (coordinate_to_tuple(ref), None if expected is None else _normalize_label(expected))
+            for ref, expected in layout.anchors.items()
+        )
+        with self._lock:
+            self._compiled.append(_CompiledLayout(layout, anchors))
+            self._layouts[layout.name] = layout
+            self._extractors[layout.name] = ExcelExtractor(layout.config, cache=self.cache)
+            self._max_row = max(self._max_row, *(row for (row, _), _ in anchors))
+            self._max_column = max(self._max_column, *(column for (_, column), _ in anchors))
+
+    @property
+    def layouts(self) -> List[TemplateLayout]:
+        return [compiled.layout for compiled in self._compiled]
+
+    def detect(self, file_path: Path) -> TemplateLayout:
+        if not self._compiled:
+            return self.default
+        try:
+            with XlsxReader(Path(file_path)) as reader:
+                layout = self._probe(reader)
+        except UnsupportedWorkbookError as exc:
+            logger.info(f"Using layout {self.default.name!r} for {Path(file_path).name}: {exc}")
+            return self.default
+
+        logger.debug(f"Detected layout {layout.name!r} for {Path(file_path).name}")
+        return layout
+
+    def extractor_for(self, file_path: Path) -> ExcelExtractor:
+        return self._extractors[self.detect(file_path).name]
+
+    def extract(self, file_path: Path, file_hash: Optional[str] = None) -> CertificadoBundle:
+        return self.extractor_for(file_path).extract(file_path, file_hash=file_hash)
+
+    def iter_bundles(self, file_path: Path) -> Iterator[CertificadoBundle]:
+        return self.extractor_for(file_path).iter_bundles(file_path)
+
+    def _probe(self, reader: XlsxReader) -> TemplateLayout:
+        """First sheet whose anchors fit a layout; the layout with most anchors wins."""
+        for name in reader.sheet_names:
+            cells: Dict[Coordinate, Any] = {}
+            rows = reader.iter_rows(name, max_column=self._max_column)
+            for row, values in rows:
+                if row > self._max_row:
+                    break
+                for column, value in values.items():
+                    cells[(row, column)] = value
+            rows.close()
+
+            matches = [compiled for compiled in self._compiled if compiled.matches(cells)]
+            if matches:
+                return max(matches, key=lambda compiled: len(compiled.anchors)).layout
+        return self.default
@@ -0,0 +1,99 @@
+"""Cell reader for legacy BIFF ``.xls`` workbooks, backed by xlrd.
+
+Mirrors the :class:`~.xlsx_reader.XlsxReader` interface (``sheet_names``,
+``active_sheet_name`` and ``iter_rows``) so the extraction plan runs unchanged
+on both formats. xlrd is an optional dependency: ``pip install
+engine-excel-to-pdf[xls]``.
+"""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .xlsx_reader import UnsupportedWorkbookError
+
+XLS_SUFFIX = ".xls"
+
+Row = Tuple[int, Dict[int, Any]]
+
+
+def xls_support_available() -> bool:
+    return importlib.util.find_spec("xlrd") is not None
+
+
+class XlsReader:
+    """Read cell values of an ``.xls`` file, loading one sheet at a time.
+
+    Values follow the openpyxl conventions used by the rest of the extractor:
+    ``datetime`` for date cells, ``int`` for integral numbers, ``bool`` and
+    plain ``str``.
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        try:
+            import xlrd
+        except ImportError as exc:
+            raise ImportError(
+                "Reading .xls files requires xlrd: pip install engine-excel-to-pdf[xls]"
+            ) from exc
+
+        self._xlrd = xlrd
+        self.file_path = Path(file_path)
+        try:
+            self._book = xlrd.open_workbook(str(self.file_path), on_demand=True)
+        except xlrd.XLRDError as exc:
+            raise UnsupportedWorkbookError(f"Cannot read {self.file_path.name}: {exc}") from exc
+
+    def __enter__(self) -> "XlsReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._book.release_resources()
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return self._book.sheet_names()
+
+    @property
+    def active_sheet_name(self) -> Optional[str]:
+        # BIFF keeps the selected tab per sheet; the first sheet is used instead
+        # so that picking the active sheet does not load every sheet.
+        names = self.sheet_names
+        return names[0] if names else None
+
+    def iter_rows(self, sheet_name: str, min_row: int = 1, max_column: Optional[int] = None) -> Iterator[Row]:
+        """Yield ``(row, {column: value})`` for non-empty rows, in sheet order."""
+        sheet = self._book.sheet_by_name(sheet_name)
+        try:
+            for row_index in range(max(min_row, 1) - 1, sheet.nrows):
+                values: Dict[int, Any] = {}
+                for column_index, cell in enumerate(sheet.row_slice(row_index, 0, max_column)):
+                    value = self._cell_value(cell)
+                    if value is not None:
+                        values[column_index + 1] = value
+                if values:
+                    yield row_index + 1, values
+        finally:
+            self._book.unload_sheet(sheet_name)
+
+    def _cell_value(self, cell) -> Any:
+        xlrd = self._xlrd
+        ctype = cell.ctype
+        if ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+            return None
+        if ctype == xlrd.XL_CELL_DATE:
+            try:
+                return xlrd.xldate.xldate_as_datetime(cell.value, self._book.datemode)
+            except (xlrd.xldate.XLDateError, OverflowError, ValueError):
+                return "#VALUE!"
+        if ctype == xlrd.XL_CELL_NUMBER:
+            return int(cell.value) if float(cell.value).is_integer() else cell.value
+        if ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        if ctype == xlrd.XL_CELL_ERROR:
+            return xlrd.error_text_from_code.get(cell.value, "#ERR")
+        return cell.value
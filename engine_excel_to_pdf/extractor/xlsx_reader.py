@@ -0,0 +1,330 @@
+"""Minimal .xlsx cell reader working directly on the package XML.
+
+Reads only what the extractor needs: the sheet list, the shared strings (on
+demand) and the rows of a single worksheet, parsed incrementally so the caller
+can stop as soon as it has the rows it wants. Anything outside that subset is
+reported with :class:`UnsupportedWorkbookError` so the caller can fall back to
+openpyxl.
+"""
+from __future__ import annotations
+
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT_REL = f"{REL_NS}/officeDocument"
+WORKSHEET_REL = f"{REL_NS}/worksheet"
+SHARED_STRINGS_REL = f"{REL_NS}/sharedStrings"
+STYLES_REL = f"{REL_NS}/styles"
+
+_SHEET_DATA = f"{{{MAIN_NS}}}sheetData"
+_ROW = f"{{{MAIN_NS}}}row"
+_CELL = f"{{{MAIN_NS}}}c"
+_VALUE = f"{{{MAIN_NS}}}v"
+_TEXT = f"{{{MAIN_NS}}}t"
+_RUN = f"{{{MAIN_NS}}}r"
+_INLINE_STRING = f"{{{MAIN_NS}}}is"
+_STRING_ITEM = f"{{{MAIN_NS}}}si"
+
+Row = Tuple[int, Dict[int, Any]]
+
+
+class UnsupportedWorkbookError(Exception):
+    """Raised when a workbook cannot be read without openpyxl."""
+
+
+def _text_content(node: ElementTree.Element) -> str:
+    """Plain text of a string item: the ``<t>`` child plus rich-text runs."""
+    snippets: List[str] = []
+    for child in node:
+        if child.tag == _TEXT:
+            snippets.append(child.text or "")
+        elif child.tag == _RUN:
+            snippets.append(child.findtext(_TEXT) or "")
+    return "".join(snippets).replace("x005F_", "")
+
+
+def _column_index(cell_ref: str) -> int:
+    column = 0
+    for char in cell_ref:
+        if char.isdigit():
+            break
+        column = column * 26 + (ord(char.upper()) - 64)
+    return column
+
+
+def _cast_number(value: str) -> int | float:
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+class _SharedStrings:
+    """Shared string table parsed only as far as the highest index requested."""
+
+    def __init__(self, archive: zipfile.ZipFile, path: Optional[str]) -> None:
+        self._archive = archive
+        self._path = path
+        self._strings: List[str] = []
+        self._source = None
+        self._events: Optional[Iterator] = None
+
+    def __getitem__(self, index: int) -> str:
+        while index >= len(self._strings) and self._advance():
+            pass
+        if index >= len(self._strings):
+            raise UnsupportedWorkbookError(f"Shared string {index} not found")
+        return self._strings[index]
+
+    def _advance(self) -> bool:
+        if self._events is None:
+            if self._path is None:
+                return False
+            self._source = self._archive.open(self._path)
+            self._events = ElementTree.iterparse(self._source, events=("end",))
+        try:
+            for _, node in self._events:
+                if node.tag == _STRING_ITEM:
+                    self._strings.append(_text_content(node))
+                    node.clear()
+                    return True
+        except ElementTree.ParseError as exc:
+            raise UnsupportedWorkbookError(f"Invalid XML in {self._path}") from exc
+        self.close()
+        self._path = None
+        return False
+
+    def close(self) -> None:
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        self._events = None
+
+
+class XlsxReader:
+    """Read cell values of an .xlsx file without building openpyxl objects.
+
+    Values follow openpyxl's ``data_only=True`` conventions: cached formula
+    results, ``int``/``float`` numbers, ``datetime`` for date-formatted cells,
+    ``bool`` and plain ``str``.
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        self.file_path = Path(file_path)
+        try:
+            self._archive = zipfile.ZipFile(self.file_path)
+        except zipfile.BadZipFile as exc:
+            raise UnsupportedWorkbookError(f"Not a zip package: {self.file_path.name}") from exc
+        try:
+            self._read_workbook()
+        except Exception:
+            self._archive.close()
+            raise
+        self._shared_strings = _SharedStrings(self._archive, self._shared_strings_path)
+        self._date_styles: Optional[Dict[int, bool]] = None
+        self._open_rows: List[Iterator[Row]] = []
+
+    def __enter__(self) -> "XlsxReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for rows in self._open_rows:
+            rows.close()
+        self._open_rows.clear()
+        self._shared_strings.close()
+        self._archive.close()
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return [name for name, _ in self._sheets]
+
+    @property
+    def active_sheet_name(self) -> Optional[str]:
+        if not self._sheets:
+            return None
+        index = min(self._active_index, len(self._sheets) - 1)
+        return self._sheets[index][0]
+
+    def iter_rows(self, sheet_name: str, min_row: int = 1, max_column: Optional[int] = None) -> Iterator[Row]:
+        """Yield ``(row, {column: value})`` for non-empty rows, in sheet order.
+
+        The sheet XML is parsed incrementally: rows are decoded only when the
+        caller asks for them, so stopping early skips the rest of the file.
+        """
+        rows = self._parse_rows(self._sheet_path(sheet_name), min_row, max_column)
+        self._open_rows.append(rows)
+        return rows
+
+    def _sheet_path(self, sheet_name: str) -> str:
+        path = dict(self._sheets).get(sheet_name)
+        if path is None:
+            raise KeyError(sheet_name)
+        return path
+
+    def _parse_rows(self, path: str, min_row: int, max_column: Optional[int]) -> Iterator[Row]:
+        with self._open(path) as source:
+            try:
+                yield from self._parse_sheet_data(source, min_row, max_column)
+            except ElementTree.ParseError as exc:
+                raise UnsupportedWorkbookError(f"Invalid XML in {path}") from exc
+
+    def _parse_sheet_data(self, source, min_row: int, max_column: Optional[int]) -> Iterator[Row]:
+        sheet_data = None
+        row_number = 0
+        for event, node in ElementTree.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if node.tag == _SHEET_DATA:
+                    sheet_data = node
+                continue
+            if node.tag == _ROW:
+                row_ref = node.get("r")
+                row_number = int(row_ref) if row_ref else row_number + 1
+                if row_number >= min_row:
+                    values = self._parse_cells(node, max_column)
+                    if values:
+                        yield row_number, values
+                if sheet_data is not None:
+                    sheet_data.clear()
+            elif node.tag == _SHEET_DATA:
+                return
+
+    def _parse_cells(self, row: ElementTree.Element, max_column: Optional[int]) -> Dict[int, Any]:
+        values: Dict[int, Any] = {}
+        column = 0
+        for cell in row.iter(_CELL):
+            cell_ref = cell.get("r")
+            column = _column_index(cell_ref) if cell_ref else column + 1
+            if max_column is not None and column > max_column:
+                continue
+            value = self._cell_value(cell)
+            if value is not None:
+                values[column] = value
+        return values
+
+    def _cell_value(self, cell: ElementTree.Element) -> Any:
+        data_type = cell.get("t", "n")
+        if data_type == "inlineStr":
+            inline = cell.find(_INLINE_STRING)
+            return _text_content(inline) if inline is not None else None
+
+        raw = cell.findtext(_VALUE) or None
+        if raw is None:
+            return None
+        if data_type == "n":
+            number = _cast_number(raw)
+            style = cell.get("s")
+            if style and self._is_date_style(int(style)):
+                return self._to_datetime(number, int(style))
+            return number
+        if data_type == "s":
+            return self._shared_strings[int(raw)]
+        if data_type == "b":
+            return bool(int(raw))
+        if data_type in ("str", "e"):
+            return raw
+        if data_type == "d":
+            from openpyxl.utils.datetime import from_ISO8601
+
+            return from_ISO8601(raw)
+        raise UnsupportedWorkbookError(f"Unknown cell type: {data_type}")
+
+    def _is_date_style(self, style: int) -> bool:
+        if self._date_styles is None:
+            self._date_styles = self._read_date_styles()
+        return style in self._date_styles
+
+    def _to_datetime(self, number: int | float, style: int) -> Any:
+        from openpyxl.utils.datetime import from_excel
+
+        try:
+            return from_excel(number, self._epoch, timedelta=self._date_styles[style])
+        except (OverflowError, ValueError):
+            return "#VALUE!"
+
+    def _read_date_styles(self) -> Dict[int, bool]:
+        """Map the ``cellXfs`` indexes with a date format to ``is_timedelta``."""
+        from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+
+        if self._styles_path is None:
+            return {}
+        root = self._parse(self._styles_path)
+        custom_formats = {
+            int(fmt.get("numFmtId")): fmt.get("formatCode")
+            for fmt in root.iter(f"{{{MAIN_NS}}}numFmt")
+        }
+        date_styles: Dict[int, bool] = {}
+        cell_xfs = root.find(f"{{{MAIN_NS}}}cellXfs")
+        for index, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+            fmt_id = int(xf.get("numFmtId", 0))
+            fmt = custom_formats.get(fmt_id) or builtin_format_code(fmt_id)
+            if is_date_format(fmt):
+                date_styles[index] = is_timedelta_format(fmt)
+        return date_styles
+
+    def _read_workbook(self) -> None:
+        from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+
+        workbook_path = self._office_document_path()
+        rels = self._relationships(workbook_path)
+        root = self._parse(workbook_path)
+        if root.tag != f"{{{MAIN_NS}}}workbook":
+            raise UnsupportedWorkbookError(f"Unsupported workbook namespace: {root.tag}")
+
+        properties = root.find(f"{{{MAIN_NS}}}workbookPr")
+        date1904 = properties is not None and properties.get("date1904") in ("1", "true")
+        self._epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+
+        view = root.find(f"{{{MAIN_NS}}}bookViews/{{{MAIN_NS}}}workbookView")
+        self._active_index = int(view.get("activeTab", 0)) if view is not None else 0
+
+        self._sheets: List[Tuple[str, str]] = []
+        for sheet in root.iter(f"{{{MAIN_NS}}}sheet"):
+            rel_type, target = rels.get(sheet.get(f"{{{REL_NS}}}id"), (None, None))
+            if rel_type == WORKSHEET_REL:
+                self._sheets.append((sheet.get("name"), target))
+
+        by_type = {rel_type: target for rel_type, target in rels.values()}
+        self._shared_strings_path = by_type.get(SHARED_STRINGS_REL)
+        self._styles_path = by_type.get(STYLES_REL)
+
+    def _office_document_path(self) -> str:
+        for rel_type, target in self._relationships("").values():
+            if rel_type == OFFICE_DOCUMENT_REL:
+                return target
+        raise UnsupportedWorkbookError("Package has no office document")
+
+    def _relationships(self, part: str) -> Dict[str, Tuple[str, str]]:
+        folder, name = posixpath.split(part)
+        rels_path = posixpath.join(folder, "_rels", f"{name}.rels")
+        rels: Dict[str, Tuple[str, str]] = {}
+        for rel in self._parse(rels_path).iter(f"{{{PKG_REL_NS}}}Relationship"):
+            if rel.get("TargetMode") == "External":
+                continue
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            rels[rel.get("Id")] = (rel.get("Type"), target)
+        return rels
+
+    def _open(self, path: str):
+        try:
+            return self._archive.open(path)
+        except KeyError as exc:
+            raise UnsupportedWorkbookError(f"Missing package part: {path}") from exc
+
+    def _parse(self, path: str) -> ElementTree.Element:
+        with self._open(path) as source:
+            try:
+                return ElementTree.parse(source).getroot()
+            except ElementTree.ParseError as exc:
+                raise UnsupportedWorkbookError(f"Invalid XML in {path}") from exc
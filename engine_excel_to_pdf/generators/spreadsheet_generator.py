@@ -1,8 +1,44 @@
+"""Consolidated spreadsheet of every generated certificate.
+
+Rows are not added to ``certificados_consolidados.xlsx`` directly: an ``.xlsx``
+is a zip archive, so appending to it means parsing and re-serializing the
+whole workbook. Each certificate's rows are instead appended to a row journal
+(``.certificados_consolidados.rows``, one JSON array per line) and the
+workbook is materialized from the journal with openpyxl's write-only mode,
+which streams rows without building the workbook in memory.
+
+Materializing still reads the whole journal, so it costs O(rows) every time:
+:meth:`SpreadsheetGenerator.generate` pays it per certificate (O(N²) over N
+certificates) so the returned workbook is always current. Inside
+:meth:`SpreadsheetGenerator.deferred` only the journal is written and the
+touched workbooks are materialized once on exit, which keeps batches at a
+constant cost per certificate. The journal size each workbook was written from
+is kept next to it (``.certificados_consolidados.materialized``), so
+:meth:`SpreadsheetGenerator.materialize` skips workbooks with no new rows,
+whichever process journaled them.
+
+The journal is the source of truth: edits made to the workbook by hand are
+lost on the next materialization. A workbook without a journal (written before
+the journal existed) is imported into one the first time it is needed.
+
+With ``shard_by`` set to ``month``/``year`` (of ``data_execucao``) or
+``cnpj`` (8-digit root) every shard is a workbook of its own, e.g.
+``certificados_consolidados-2025-03.xlsx``, with its own journal; only the
+shard a certificate belongs to is rewritten and
+:meth:`SpreadsheetGenerator.merge` assembles the consolidated workbook on
+demand.
+"""
 from __future__ import annotations
 
+import json
+import logging
+import os
+import tempfile
 import threading
+from contextlib import contextmanager
+from itertools import chain, islice
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 if TYPE_CHECKING:
     from openpyxl import Workbook
@@ -10,78 +46,55 @@ if TYPE_CHECKING:
 
 from ..models import Certificado, CertificadoBundle, MetodoAplicacao, ProdutoQuimico
 from ..config_defaults import PLANILHAS_DIR, ensure_directories
-from ..utils import generate_unique_filename
+from ..utils import cnpj_digits, generate_unique_filename
 from ..constants import (
     EXCEL_COLUMN_WIDTH_DEFAULT,
     EXCEL_COLUMN_WIDTH_WIDE,
     EXCEL_FREEZE_PANES_CELL,
+    SpreadsheetSharding,
 )
 
+logger = logging.getLogger(__name__)
 
-class SpreadsheetGenerator:
-    _lock = threading.Lock()
-    
-    def __init__(self, output_dir: Path = PLANILHAS_DIR, consolidated_filename: str = "certificados_consolidados.xlsx"):
-        ensure_directories()
-        self.output_dir = output_dir
-        self.consolidated_path = self.output_dir / consolidated_filename
+CERTIFICADO_SHEET_HEADERS = [
+    "id",
+    "numero_certificado",
+    "numero_licenca",
+    "razao_social",
+    "nome_fantasia",
+    "cnpj",
+    "endereco_completo",
+    "data_execucao",
+    "data_validade",
+    "pragas_tratadas",
+    "arquivo_origem",
+    "data_cadastro",
+    "valor",
+    "bairro",
+    "cidade",
+]
+PRODUTOS_SHEET_HEADERS = ["numero_certificado", "nome_produto", "classe_quimica", "concentracao"]
+METODOS_SHEET_HEADERS = ["numero_certificado", "metodo", "quantidade"]
 
-    def generate(self, bundle: CertificadoBundle) -> Path:
-        with self._lock:
-            return self._generate_unsafe(bundle)
-    
-    def _generate_unsafe(self, bundle: CertificadoBundle) -> Path:
-        from openpyxl import Workbook, load_workbook
-        from openpyxl.utils import get_column_letter
-        
-        certificado = bundle.certificado
-        
-        if self.consolidated_path.exists():
-            workbook = load_workbook(self.consolidated_path)
-            certificado_sheet = workbook["certificado"]
-            produtos_sheet = workbook["produtos"]
-            metodos_sheet = workbook["metodos"]
-        else:
-            workbook = Workbook()
-            certificado_sheet = workbook.active
-            certificado_sheet.title = "certificado"
-            
-            cert_headers = [
-                "id",
-                "numero_certificado",
-                "numero_licenca",
-                "razao_social",
-                "nome_fantasia",
-                "cnpj",
-                "endereco_completo",
-                "data_execucao",
-                "data_validade",
-                "pragas_tratadas",
-                "arquivo_origem",
-                "data_cadastro",
-                "valor",
-                "bairro",
-                "cidade",
-            ]
-            certificado_sheet.append(cert_headers)
-            
-            for column in range(1, len(cert_headers) + 1):
-                certificado_sheet.column_dimensions[get_column_letter(column)].width = EXCEL_COLUMN_WIDTH_DEFAULT
-            certificado_sheet.freeze_panes = EXCEL_FREEZE_PANES_CELL
-            
-            produtos_sheet = workbook.create_sheet("produtos")
-            produtos_sheet.append(["numero_certificado", "nome_produto", "classe_quimica", "concentracao"])
-            produtos_sheet.freeze_panes = EXCEL_FREEZE_PANES_CELL
-            for column in range(1, 5):
-                produtos_sheet.column_dimensions[get_column_letter(column)].width = EXCEL_COLUMN_WIDTH_WIDE
-            
-            metodos_sheet = workbook.create_sheet("metodos")
-            metodos_sheet.append(["numero_certificado", "metodo", "quantidade"])
-            metodos_sheet.freeze_panes = EXCEL_FREEZE_PANES_CELL
-            for column in range(1, 4):
-                metodos_sheet.column_dimensions[get_column_letter(column)].width = EXCEL_COLUMN_WIDTH_WIDE
-        
-        certificado_sheet.append(
+# (sheet title, headers, column width), in workbook order.
+SHEETS: Tuple[Tuple[str, List[str], int], ...] = (
+    ("certificado", CERTIFICADO_SHEET_HEADERS, EXCEL_COLUMN_WIDTH_DEFAULT),
+    ("produtos", PRODUTOS_SHEET_HEADERS, EXCEL_COLUMN_WIDTH_WIDE),
+    ("metodos", METODOS_SHEET_HEADERS, EXCEL_COLUMN_WIDTH_WIDE),
+)
+
+SheetRow = Tuple[str, List[object]]
+
+_JOURNAL_SUFFIX = ".rows"
+_MATERIALIZED_SUFFIX = ".materialized"
+
+
+def bundle_rows(bundle: CertificadoBundle) -> List[SheetRow]:
+    """``(sheet, values)`` for every row a certificate adds to the consolidated workbook."""
+    certificado = bundle.certificado
+    rows: List[SheetRow] = [
+        (
+            "certificado",
             [
                 certificado.id or "",
                 certificado.numero_certificado,
@@ -98,17 +111,277 @@ class SpreadsheetGenerator:
                 certificado.valor or "",
                 certificado.bairro or "",
                 certificado.cidade or "",
-            ]
+            ],
+        )
+    ]
+    for produto in bundle.produtos:
+        valor = "" if produto.concentracao is None else f"{produto.concentracao:g}"
+        rows.append(
+            ("produtos", [certificado.numero_certificado, produto.nome_produto, produto.classe_quimica, valor])
         )
-        
-        for produto in bundle.produtos:
-            valor = "" if produto.concentracao is None else f"{produto.concentracao:g}"
-            produtos_sheet.append(
-                [certificado.numero_certificado, produto.nome_produto, produto.classe_quimica, valor]
+    for metodo in bundle.metodos:
+        rows.append(("metodos", [certificado.numero_certificado, metodo.metodo, metodo.quantidade]))
+    return rows
+
+
+class SpreadsheetGenerator:
+    _lock = threading.RLock()
+
+    def __init__(
+        self,
+        output_dir: Path = PLANILHAS_DIR,
+        consolidated_filename: str = "certificados_consolidados.xlsx",
+        shard_by: str = SpreadsheetSharding.NONE.value,
+    ):
+        ensure_directories()
+        self.output_dir = output_dir
+        self.consolidated_path = self.output_dir / consolidated_filename
+        self.journal_path = _journal_for(self.consolidated_path)
+        self.shard_by = SpreadsheetSharding(shard_by)
+        self._deferred_depth = 0
+        self._stale: Set[Path] = set()
+
+    def generate(self, bundle: CertificadoBundle) -> Path:
+        with self._lock:
+            return self._generate_unsafe(bundle)
+
+    def _generate_unsafe(self, bundle: CertificadoBundle) -> Path:
+        workbook_path = self.path_for(bundle)
+        self._append_rows(workbook_path, bundle_rows(bundle))
+        if self._deferred_depth == 0:
+            self._materialize([workbook_path])
+        return workbook_path
+
+    def path_for(self, bundle: CertificadoBundle) -> Path:
+        """Workbook holding ``bundle``'s rows: its shard, or the consolidated one when not sharding."""
+        key = self._shard_key(bundle.certificado)
+        if key is None:
+            return self.consolidated_path
+        stem, suffix = self.consolidated_path.stem, self.consolidated_path.suffix
+        return self.output_dir / f"{stem}-{key}{suffix}"
+
+    def _shard_key(self, certificado: Certificado) -> Optional[str]:
+        if self.shard_by is SpreadsheetSharding.MONTH:
+            return certificado.data_execucao.strftime("%Y-%m")
+        if self.shard_by is SpreadsheetSharding.YEAR:
+            return certificado.data_execucao.strftime("%Y")
+        if self.shard_by is SpreadsheetSharding.CNPJ:
+            # The 8-digit root identifies the company across its branches.
+            return cnpj_digits(certificado.cnpj)[:8] or "sem-cnpj"
+        return None
+
+    def shard_paths(self) -> List[Path]:
+        """Every shard workbook with rows, in key order."""
+        prefix = f".{self.consolidated_path.stem}-"
+        return [
+            self.output_dir / f"{journal.name[1:-len(_JOURNAL_SUFFIX)]}{self.consolidated_path.suffix}"
+            for journal in sorted(self.output_dir.glob(f"{prefix}*{_JOURNAL_SUFFIX}"))
+        ]
+
+    @contextmanager
+    def deferred(self) -> Iterator["SpreadsheetGenerator"]:
+        """Write the workbooks touched inside the block once, on exit.
+
+        Blocks may be nested or overlap across threads; the touched workbooks
+        are written when the last one exits.
+        """
+        with self._lock:
+            self._deferred_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred_depth -= 1
+                if self._deferred_depth == 0 and self._stale:
+                    self._materialize(sorted(self._stale))
+
+    def materialize(self) -> Path:
+        """Write the workbooks whose journals have new rows; returns the consolidated path.
+
+        Without sharding that is the consolidated workbook (written even when
+        empty, the first time). With sharding it is every shard behind its
+        journal, so the cost is bounded by the shard size; :meth:`merge`
+        builds the consolidated workbook.
+        """
+        with self._lock:
+            if self.shard_by is SpreadsheetSharding.NONE:
+                self._materialize([self.consolidated_path])
+            else:
+                self._materialize(self.shard_paths())
+            return self.consolidated_path
+
+    def _materialize(self, workbook_paths: Iterable[Path]) -> None:
+        for workbook_path in workbook_paths:
+            self._ensure_journal(workbook_path)
+            journal_path = _journal_for(workbook_path)
+            covered = journal_path.stat().st_size
+            if workbook_path.exists() and _materialized_offset(workbook_path) == covered:
+                self._stale.discard(workbook_path)
+                continue
+            self._write_workbook(workbook_path, self._journal_rows(journal_path))
+            _materialized_for(workbook_path).write_text(str(covered), encoding="utf-8")
+            self._stale.discard(workbook_path)
+
+    def merge(self) -> Path:
+        """Write the consolidated workbook from every shard (on demand).
+
+        Rows journaled before sharding was enabled come first, then each
+        shard in key order. The shards are left as they are.
+        """
+        with self._lock:
+            self._ensure_journal(self.consolidated_path)
+            journals = [self.journal_path, *(_journal_for(path) for path in self.shard_paths())]
+            self._write_workbook(
+                self.consolidated_path, chain.from_iterable(self._journal_rows(journal) for journal in journals)
             )
-        
-        for metodo in bundle.metodos:
-            metodos_sheet.append([certificado.numero_certificado, metodo.metodo, metodo.quantidade])
-        
-        workbook.save(self.consolidated_path)
-        return self.consolidated_path
+            # The merged workbook holds more than its own journal.
+            _materialized_for(self.consolidated_path).unlink(missing_ok=True)
+            self._stale.discard(self.consolidated_path)
+            return self.consolidated_path
+
+    def rebuild_consolidated(self, bundles: Iterable[CertificadoBundle]) -> Path:
+        """Recreate the workbooks and their journals from stored bundles.
+
+        For a lost or corrupted workbook or journal: ``bundles`` (e.g.
+        ``CsvManager.iter_bundles()``) is streamed into fresh journals and the
+        workbooks are written from them in write-only mode, so memory stays
+        flat whatever the row count. With sharding every shard is rebuilt and
+        the consolidated workbook is merged from them. Returns the
+        consolidated path.
+        """
+        with self._lock:
+            rebuilt: Dict[Path, Path] = {}
+            try:
+                for bundle in bundles:
+                    workbook_path = self.path_for(bundle)
+                    if workbook_path not in rebuilt:
+                        # Truncates what an interrupted rebuild may have left.
+                        rebuilt[workbook_path] = _journal_for(workbook_path).with_suffix(".rebuild")
+                        rebuilt[workbook_path].write_bytes(b"")
+                    # Opened per bundle: a CNPJ-sharded rebuild may touch thousands of shards.
+                    with rebuilt[workbook_path].open("a", encoding="utf-8") as handle:
+                        handle.writelines(_encode_row(sheet, values) for sheet, values in bundle_rows(bundle))
+            except BaseException:
+                for pending in rebuilt.values():
+                    pending.unlink(missing_ok=True)
+                raise
+
+            # Shards that no longer have rows go; the base journal stays, empty.
+            for shard in self.shard_paths():
+                if shard not in rebuilt:
+                    shard.unlink(missing_ok=True)
+                _journal_for(shard).unlink(missing_ok=True)
+                _materialized_for(shard).unlink(missing_ok=True)
+            self.journal_path.unlink(missing_ok=True)
+            self.journal_path.touch()
+            _materialized_for(self.consolidated_path).unlink(missing_ok=True)
+            for workbook_path, pending in rebuilt.items():
+                os.replace(pending, _journal_for(workbook_path))
+                _materialized_for(workbook_path).unlink(missing_ok=True)
+            self._materialize(sorted(rebuilt))
+            if self.shard_by is SpreadsheetSharding.NONE:
+                if self.consolidated_path not in rebuilt:
+                    self._materialize([self.consolidated_path])
+                return self.consolidated_path
+            return self.merge()
+
+    def _write_workbook(self, workbook_path: Path, rows: Iterable[SheetRow]) -> None:
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
+
+        workbook = Workbook(write_only=True)
+        sheets = {}
+        for title, headers, width in SHEETS:
+            sheet = workbook.create_sheet(title)
+            for column in range(1, len(headers) + 1):
+                sheet.column_dimensions[get_column_letter(column)].width = width
+            sheet.freeze_panes = EXCEL_FREEZE_PANES_CELL
+            sheet.append(headers)
+            sheets[title] = sheet
+        for title, values in rows:
+            if title in sheets:
+                sheets[title].append(values)
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.output_dir, suffix=".xlsx.tmp")
+        os.close(fd)
+        try:
+            workbook.save(tmp_name)
+            os.replace(tmp_name, workbook_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def _append_rows(self, workbook_path: Path, rows: Iterable[SheetRow]) -> None:
+        self._ensure_journal(workbook_path)
+        lines = "".join(_encode_row(sheet, values) for sheet, values in rows)
+        with _journal_for(workbook_path).open("a+b") as handle:
+            if handle.tell() and (handle.seek(-1, os.SEEK_END), handle.read(1))[1] != b"\n":
+                # Keep a line torn by a crash from swallowing the next one.
+                lines = "\n" + lines
+            handle.write(lines.encode("utf-8"))
+        self._stale.add(workbook_path)
+
+    @staticmethod
+    def _journal_rows(journal_path: Path) -> Iterator[SheetRow]:
+        with journal_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    sheet, values = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash: its certificate is regenerated on retry.
+                    continue
+                yield sheet, values
+
+    def _ensure_journal(self, workbook_path: Path) -> None:
+        journal_path = _journal_for(workbook_path)
+        if journal_path.exists():
+            return
+        rows = self._read_workbook_rows(workbook_path) if workbook_path.exists() else []
+        fd, tmp_name = tempfile.mkstemp(dir=self.output_dir, suffix=".rows.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.writelines(_encode_row(sheet, values) for sheet, values in rows)
+            os.replace(tmp_name, journal_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        if rows:
+            logger.info(f"Imported {len(rows)} rows of {workbook_path.name} into its row journal")
+
+    @staticmethod
+    def _read_workbook_rows(workbook_path: Path) -> List[SheetRow]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(workbook_path, read_only=True)
+        try:
+            rows: List[SheetRow] = []
+            for title, _, _ in SHEETS:
+                if title not in workbook.sheetnames:
+                    continue
+                for values in islice(workbook[title].iter_rows(values_only=True), 1, None):
+                    if any(value not in (None, "") for value in values):
+                        rows.append((title, ["" if value is None else value for value in values]))
+            return rows
+        finally:
+            workbook.close()
+
+
+def _journal_for(workbook_path: Path) -> Path:
+    return workbook_path.with_name(f".{workbook_path.stem}{_JOURNAL_SUFFIX}")
+
+
+def _materialized_for(workbook_path: Path) -> Path:
+    """Sidecar holding the journal size ``workbook_path`` was last written from."""
+    return workbook_path.with_name(f".{workbook_path.stem}{_MATERIALIZED_SUFFIX}")
+
+
+def _materialized_offset(workbook_path: Path) -> Optional[int]:
+    try:
+        return int(_materialized_for(workbook_path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _encode_row(sheet: str, values: List[object]) -> str:
+    # Cells typed by hand into an imported workbook may hold dates.
+    return json.dumps([sheet, values], ensure_ascii=False, default=str) + "\n"
@@ -0,0 +1,126 @@
+"""Asynchronous front end for :class:`SpreadsheetGenerator`.
+
+Callers push bundles onto a bounded queue and get a
+:class:`~concurrent.futures.Future` back instead of waiting for the workbook
+to be written. A single writer thread takes whatever has queued up (at most
+``max_batch`` bundles), journals their rows and materializes the touched
+workbooks once for the whole batch, then resolves the futures with the
+workbook path. A full queue blocks :meth:`SpreadsheetSink.submit`, which
+keeps producers from running arbitrarily far ahead of the writer.
+
+A failed batch sets the exception on its futures and is also kept until the
+next :meth:`SpreadsheetSink.drain` or :meth:`SpreadsheetSink.close`, which
+re-raise it, so callers that never look at the futures still see it.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from ..models import CertificadoBundle
+from .spreadsheet_generator import SpreadsheetGenerator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_MAX_BATCH = 64
+
+_STOP = object()
+
+Job = Tuple[CertificadoBundle, "Future[Path]"]
+
+
+class SpreadsheetSink:
+    def __init__(
+        self,
+        generator: SpreadsheetGenerator,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ) -> None:
+        self.generator = generator
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._errors: List[BaseException] = []
+        self._state_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, bundle: CertificadoBundle) -> "Future[Path]":
+        """Queue ``bundle``'s rows; the future resolves to its workbook once written.
+
+        Inside an open :meth:`SpreadsheetGenerator.deferred` block the future
+        resolves when the rows are journaled; the workbook follows on exit.
+        """
+        future: "Future[Path]" = Future()
+        with self._state_lock:
+            self._ensure_thread()
+        self._queue.put((bundle, future))
+        return future
+
+    def drain(self) -> None:
+        """Block until every bundle submitted so far is written; re-raise failed batches."""
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self) -> None:
+        """Drain and stop the writer thread; re-raise failed batches."""
+        with self._state_lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+        self._raise_errors()
+
+    def _raise_errors(self) -> None:
+        with self._state_lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="spreadsheet-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                return
+            batch: List[Job] = [first]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[Job]) -> None:
+        paths: List[Path] = []
+        try:
+            with self.generator.deferred():
+                for bundle, _ in batch:
+                    paths.append(self.generator.generate(bundle))
+        except BaseException as exc:
+            logger.error(f"Spreadsheet batch of {len(batch)} certificates failed: {exc}")
+            with self._state_lock:
+                self._errors.append(exc)
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), path in zip(batch, paths):
+            future.set_result(path)
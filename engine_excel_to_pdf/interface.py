@@ -1,18 +1,24 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
 from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from .config import EngineConfig
+from .extractor.cache import ExtractionCache
 from .extractor.excel_extractor import ExcelExtractor
+from .extractor.layouts import LayoutRegistry
 from .generators.pdf_generator import PDFGenerator
 from .generators.spreadsheet_generator import SpreadsheetGenerator
+from .generators.spreadsheet_sink import SpreadsheetSink
 from .models import Certificado, CertificadoBundle, MetodoAplicacao, ProdutoQuimico
-from .config_defaults import ensure_directories
+from .config_defaults import DATA_DIR, ensure_directories
 from .storage.csv_manager import CsvManager
+from .storage.sqlite_manager import SqliteManager
+from .utils import file_sha256
 from .validators import CertificadoValidator, ValidationError
-from .constants import FILE_ORIGIN_MANUAL
+from .constants import FILE_ORIGIN_MANUAL, StorageBackend
 
 
 class MotorCertificados:
@@ -28,12 +34,18 @@ class MotorCertificados:
         self.config = config or EngineConfig()
         self.config.criar_diretorios()
         self.skip_validation = skip_validation
-        
+        cache = (
+            ExtractionCache(self.config.cache_dir, max_bytes=self.config.cache_max_bytes)
+            if self.config.usar_cache_extracao
+            else None
+        )
+
         if config:
-            self.extractor = extractor or ExcelExtractor()
-            self.csv_manager = csv_manager or CsvManager(data_dir=self.config.dados_dir)
+            self.extractor = extractor or ExcelExtractor(cache=cache)
+            self.csv_manager = csv_manager or self._create_storage(self.config.dados_dir)
             self.spreadsheet_generator = spreadsheet_generator or SpreadsheetGenerator(
-                output_dir=self.config.planilhas_dir
+                output_dir=self.config.planilhas_dir,
+                shard_by=self.config.spreadsheet_sharding,
             )
             self.pdf_generator = pdf_generator or PDFGenerator(
                 output_dir=self.config.pdfs_dir,
@@ -43,14 +55,64 @@ class MotorCertificados:
             )
         else:
             ensure_directories()
-            self.extractor = extractor or ExcelExtractor()
-            self.csv_manager = csv_manager or CsvManager()
+            self.extractor = extractor or ExcelExtractor(cache=cache)
+            self.csv_manager = csv_manager or self._create_storage(DATA_DIR)
             self.spreadsheet_generator = spreadsheet_generator or SpreadsheetGenerator()
             self.pdf_generator = pdf_generator or PDFGenerator()
 
+        self.spreadsheet_sink = (
+            SpreadsheetSink(self.spreadsheet_generator) if self.config.planilha_assincrona else None
+        )
+
+    def _create_storage(self, data_dir: Path) -> CsvManager | SqliteManager:
+        if StorageBackend(self.config.storage_backend) is StorageBackend.SQLITE:
+            return SqliteManager(data_dir=data_dir)
+        return CsvManager(data_dir=data_dir)
+
     def processar_upload(self, arquivo_excel: Path) -> Dict[str, Path | Certificado]:
-        bundle = self.extractor.extract(Path(arquivo_excel))
-        return self._persistir_bundle(bundle)
+        """Extract, store and render one spreadsheet.
+
+        A spreadsheet whose exact bytes were processed before is not extracted
+        again: the stored certificado is returned (unless
+        ``sobrescrever_existentes``).
+        """
+        arquivo_excel = Path(arquivo_excel)
+        file_hash = file_sha256(arquivo_excel)
+        if not self.config.sobrescrever_existentes:
+            stored = self.csv_manager.get_bundles_by_file_hash(file_hash)
+            if stored:
+                return self._existing_outputs(stored[0])
+        if isinstance(self.extractor, (ExcelExtractor, LayoutRegistry)):
+            bundle = self.extractor.extract(arquivo_excel, file_hash=file_hash)
+        else:
+            # Injected extractors keep the plain extract(file_path) signature.
+            bundle = self.extractor.extract(arquivo_excel)
+        resultado = self._persistir_bundle(bundle)
+        self.csv_manager.record_file_hash(file_hash, [resultado["certificado"].id])
+        return resultado
+
+    def processar_upload_multiplo(self, arquivo_excel: Path) -> Iterator[Dict[str, Path | Certificado]]:
+        """Persist every certificate of a multi-certificate workbook, one at a time.
+
+        Generator: each bundle is extracted, stored and rendered only when the
+        caller asks for the next result. A workbook already processed in full
+        yields its stored certificados without being read again.
+        """
+        arquivo_excel = Path(arquivo_excel)
+        file_hash = file_sha256(arquivo_excel)
+        if not self.config.sobrescrever_existentes:
+            stored = self.csv_manager.get_bundles_by_file_hash(file_hash)
+            if stored:
+                for bundle in stored:
+                    yield self._existing_outputs(bundle)
+                return
+        ids = []
+        for bundle in self.extractor.iter_bundles(arquivo_excel):
+            resultado = self._persistir_bundle(bundle)
+            ids.append(resultado["certificado"].id)
+            yield resultado
+        # Only a fully consumed workbook counts as processed.
+        self.csv_manager.record_file_hash(file_hash, ids)
 
     def criar_manual(self, payload: Dict[str, object]) -> Dict[str, Path | Certificado]:
         bundle = self._bundle_from_payload(payload)
@@ -62,42 +124,116 @@ class MotorCertificados:
             return None
         return self._generate_outputs(bundle, bundle.certificado)
 
-    def listar_certificados(self) -> List[Certificado]:
-        return self.csv_manager.list_certificados()
+    def exportar_certificados(self, numeros: Iterable[str]) -> Iterator[Dict[str, Path | Certificado]]:
+        """Regenerate the outputs of many stored certificados.
+
+        The bundles are loaded together with one read per data file; unknown
+        numeros are skipped. Generator: outputs are produced as it is consumed.
+        """
+        bundles = self.csv_manager.get_bundles(numeros)
+        for bundle in bundles.values():
+            yield self._generate_outputs(bundle, bundle.certificado)
+
+    def listar_certificados(self, **filtros) -> List[Certificado]:
+        """All matching certificados as a list; takes the filters of :meth:`iterar_certificados`."""
+        return list(self.iterar_certificados(**filtros))
+
+    def iterar_certificados(
+        self,
+        cnpj: Optional[str] = None,
+        validade_inicio: Optional[date] = None,
+        validade_fim: Optional[date] = None,
+        cidade: Optional[str] = None,
+        arquivo_origem: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Iterator[Certificado]:
+        """Stream stored certificados without loading the whole history.
+
+        Filters combine with AND; ``validade_inicio``/``validade_fim`` bound
+        ``data_validade`` inclusively. ``limit``/``offset`` paginate the
+        filtered result in insertion order.
+        """
+        return self.csv_manager.iter_certificados(
+            cnpj=cnpj,
+            validade_inicio=validade_inicio,
+            validade_fim=validade_fim,
+            cidade=cidade,
+            arquivo_origem=arquivo_origem,
+            limit=limit,
+            offset=offset,
+        )
 
     def _persistir_bundle(self, bundle: CertificadoBundle) -> Dict[str, Path | Certificado]:
-        existing = self.csv_manager.get_bundle_by_arquivo(bundle.certificado.arquivo_origem)
-
-        if existing and not self.config.sobrescrever_existentes:
-            if existing.certificado.id == bundle.certificado.id:
-                planilha = self.spreadsheet_generator.consolidated_path
-                pdf_pattern = f"*{existing.certificado.cnpj.replace('.', '').replace('/', '').replace('-', '')[:8]}*{existing.certificado.numero_certificado.replace('/', '-')}*.pdf"
-                pdfs = list(self.pdf_generator.output_dir.glob(pdf_pattern))
-                if pdfs:
-                    pdf = pdfs[0]
-                else:
-                    pdf = self.pdf_generator.generate(existing)
-                return {
-                    "certificado": existing.certificado,
-                    "planilha": planilha,
-                    "pdf": pdf,
-                }
+        if not self.config.sobrescrever_existentes:
+            existing = self.csv_manager.find_duplicate(bundle)
+            if not existing:
+                existing = self.csv_manager.get_bundle_by_arquivo(bundle.certificado.arquivo_origem)
+                if existing and existing.certificado.id != bundle.certificado.id:
+                    existing = None
+            if existing:
+                return self._existing_outputs(existing)
 
         certificado = self.csv_manager.append_bundle(bundle, skip_if_exists=False)
         return self._generate_outputs(bundle, certificado)
 
+    def _existing_outputs(self, existing: CertificadoBundle) -> Dict[str, Path | Certificado]:
+        planilha = self.spreadsheet_generator.path_for(existing)
+        pdf_pattern = f"*{existing.certificado.cnpj.replace('.', '').replace('/', '').replace('-', '')[:8]}*{existing.certificado.numero_certificado.replace('/', '-')}*.pdf"
+        pdfs = list(self.pdf_generator.output_dir.glob(pdf_pattern))
+        if pdfs:
+            pdf = pdfs[0]
+        else:
+            pdf = self.pdf_generator.generate(existing)
+        return {
+            "certificado": existing.certificado,
+            "planilha": planilha,
+            "pdf": pdf,
+        }
+
+    def reconstruir_planilha(self) -> Path:
+        """Rebuild the consolidated spreadsheet from storage (e.g. after losing the ``.xlsx``)."""
+        self.aguardar_planilhas()
+        self.csv_manager.flush()
+        return self.spreadsheet_generator.rebuild_consolidated(self.csv_manager.iter_bundles())
+
+    def aguardar_planilhas(self) -> None:
+        """Wait until every queued spreadsheet row is written (``planilha_assincrona``).
+
+        Re-raises the error of a spreadsheet write that failed since the last call.
+        """
+        if self.spreadsheet_sink is not None:
+            self.spreadsheet_sink.drain()
+
+    def fechar(self) -> None:
+        """Drain pending spreadsheet rows and storage writes; call on shutdown."""
+        try:
+            if self.spreadsheet_sink is not None:
+                self.spreadsheet_sink.close()
+        finally:
+            self.csv_manager.close()
+
     def _generate_outputs(
         self, bundle: CertificadoBundle, certificado: Certificado
-    ) -> Dict[str, Path | Certificado]:
+    ) -> Dict[str, Path | Certificado | Future]:
         if not self.skip_validation:
             CertificadoValidator.validate_bundle(bundle)
-        planilha = self.spreadsheet_generator.generate(bundle)
+        if self.spreadsheet_sink is not None:
+            # The workbook is written by the sink thread while the PDF renders.
+            pendente = self.spreadsheet_sink.submit(bundle)
+            planilha = self.spreadsheet_generator.path_for(bundle)
+        else:
+            pendente = None
+            planilha = self.spreadsheet_generator.generate(bundle)
         pdf = self.pdf_generator.generate(bundle)
-        return {
+        resultado = {
             "certificado": certificado,
             "planilha": planilha,
             "pdf": pdf,
         }
+        if pendente is not None:
+            resultado["planilha_pendente"] = pendente
+        return resultado
 
     def _bundle_from_payload(self, payload: Dict[str, object]) -> CertificadoBundle:
         if not self.skip_validation:
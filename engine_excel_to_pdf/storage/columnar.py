@@ -0,0 +1,501 @@
+"""Typed columnar archive for closed periods of ``certificados.csv``.
+
+:meth:`CsvManager.compact` moves certificados registered in past months into
+one file per month (``certificados-AAAA-MM.col``). Each file stores the
+columns separately and zlib-compressed: text as a dictionary of distinct
+values plus integer codes, dates as day ordinals and ``data_cadastro`` as
+microseconds plus UTC offset. Reading a period is a handful of array decodes
+instead of CSV parsing and ``fromisoformat`` calls per row, and filters are
+evaluated on the codes before any :class:`Certificado` is built.
+
+Lookups by id, número or arquivo de origem go through ``certificados.keys``,
+which lists the distinct values of those columns per period. It is written
+whenever :meth:`ColumnarArchive.add_rows` writes a period, so a lookup only
+decodes the period that holds the key; a period changed behind the index's
+back (by another process, or an older version) is re-read once and the index
+updated.
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import fields
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from ..models import Certificado
+from ..utils import same_cnpj
+
+ARCHIVE_FORMAT_VERSION = 1
+_MAGIC = b"ECOL"
+_HEADER_LEN = struct.Struct("<I")
+_PREFIX = "certificados-"
+_SUFFIX = ".col"
+# Decoded periods kept for lookups; full scans decode without caching.
+DEFAULT_CACHED_SEGMENTS = 12
+_KEY_INDEX = "certificados.keys"
+_KEY_COLUMNS = ("id", "numero_certificado", "arquivo_origem")
+
+_DATE_COLUMNS = frozenset({"data_execucao", "data_validade"})
+_DATETIME_COLUMNS = frozenset({"data_cadastro"})
+_EPOCH = datetime(1970, 1, 1)
+# utcoffset stored for naive datetimes (no real offset reaches 2**31 seconds).
+_NAIVE = -(2 ** 31)
+
+# Empty text is stored for these; the model uses None.
+_OPTIONAL_TEXT = frozenset({"valor", "bairro", "cidade"})
+_CERTIFICADO_FIELDS = tuple(item.name for item in fields(Certificado))
+
+Period = Tuple[int, int]
+Version = Tuple[int, int]
+SegmentKeys = Dict[str, frozenset]
+
+
+class ArchiveFormatError(ValueError):
+    """An archive file is truncated, corrupt or from a newer format version."""
+
+
+def period_of(value: date) -> Period:
+    return value.year, value.month
+
+
+def _array_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array_from(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _code_typecode(size: int) -> str:
+    if size <= 0xFF:
+        return "B"
+    if size <= 0xFFFF:
+        return "H"
+    return "I"
+
+
+class _TextColumn:
+    __slots__ = ("values", "codes", "_postings")
+
+    def __init__(self, values: List[str], codes: array) -> None:
+        self.values = values
+        self.codes = codes
+        self._postings: Optional[Dict[str, List[int]]] = None
+
+    def __getitem__(self, row: int) -> str:
+        return self.values[self.codes[row]]
+
+    def find(self, value: str) -> List[int]:
+        if self._postings is None:
+            postings: Dict[int, List[int]] = {}
+            for row, code in enumerate(self.codes):
+                postings.setdefault(code, []).append(row)
+            self._postings = {self.values[code]: rows for code, rows in postings.items()}
+        return self._postings.get(value, [])
+
+    def matching_codes(self, predicate) -> frozenset:
+        return frozenset(code for code, value in enumerate(self.values) if predicate(value))
+
+
+class ArchiveSegment:
+    """One archived period, decoded into memory."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        data = self.path.read_bytes()
+        if data[:4] != _MAGIC or len(data) < 4 + _HEADER_LEN.size:
+            raise ArchiveFormatError(f"{self.path.name} is not a certificados archive")
+        (header_len,) = _HEADER_LEN.unpack_from(data, 4)
+        body_start = 4 + _HEADER_LEN.size + header_len
+        try:
+            header = json.loads(data[4 + _HEADER_LEN.size:body_start])
+            if header["version"] > ARCHIVE_FORMAT_VERSION:
+                raise ArchiveFormatError(f"{self.path.name} uses archive format {header['version']}")
+            self.rows: int = header["rows"]
+            self.columns: List[str] = [column["name"] for column in header["columns"]]
+            self._text: Dict[str, _TextColumn] = {}
+            self._dates: Dict[str, array] = {}
+            self._datetimes: Dict[str, Tuple[array, array]] = {}
+            for column in header["columns"]:
+                blocks = [zlib.decompress(data[body_start + start:body_start + start + size])
+                          for start, size in column["blocks"]]
+                self._decode_column(column, blocks)
+        except ArchiveFormatError:
+            raise
+        except (KeyError, TypeError, ValueError, zlib.error) as exc:
+            raise ArchiveFormatError(f"Corrupt archive {self.path.name}: {exc}") from exc
+
+    def _decode_column(self, column: Mapping[str, object], blocks: List[bytes]) -> None:
+        name = column["name"]
+        kind = column["kind"]
+        if kind == "text":
+            values = json.loads(blocks[0])
+            self._text[name] = _TextColumn(values, _array_from(column["typecode"], blocks[1]))
+        elif kind == "date":
+            self._dates[name] = _array_from("i", blocks[0])
+        elif kind == "datetime":
+            self._datetimes[name] = (_array_from("q", blocks[0]), _array_from("i", blocks[1]))
+        else:
+            raise ArchiveFormatError(f"Unknown column kind {kind!r}")
+
+    @staticmethod
+    def write(path: Path, headers: Sequence[str], rows: Sequence[Mapping[str, str]]) -> None:
+        """Encode CSV-shaped ``rows`` into ``path`` atomically."""
+        columns = []
+        blocks: List[bytes] = []
+        offset = 0
+
+        def add_block(payload: bytes) -> List[int]:
+            nonlocal offset
+            compressed = zlib.compress(payload, 6)
+            blocks.append(compressed)
+            start, offset = offset, offset + len(compressed)
+            return [start, len(compressed)]
+
+        for name in headers:
+            raw = [row.get(name) or "" for row in rows]
+            if name in _DATE_COLUMNS:
+                ordinals = array("i", (date.fromisoformat(value).toordinal() for value in raw))
+                columns.append({"name": name, "kind": "date", "blocks": [add_block(_array_bytes(ordinals))]})
+            elif name in _DATETIME_COLUMNS:
+                micros = array("q")
+                offsets = array("i")
+                for value in raw:
+                    moment = datetime.fromisoformat(value)
+                    delta = moment.utcoffset()
+                    offsets.append(_NAIVE if delta is None else int(delta.total_seconds()))
+                    micros.append((moment.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1))
+                columns.append({
+                    "name": name,
+                    "kind": "datetime",
+                    "blocks": [add_block(_array_bytes(micros)), add_block(_array_bytes(offsets))],
+                })
+            else:
+                codes_by_value: Dict[str, int] = {}
+                codes = [codes_by_value.setdefault(value, len(codes_by_value)) for value in raw]
+                typecode = _code_typecode(len(codes_by_value))
+                columns.append({
+                    "name": name,
+                    "kind": "text",
+                    "typecode": typecode,
+                    "blocks": [
+                        add_block(json.dumps(list(codes_by_value), ensure_ascii=False).encode("utf-8")),
+                        add_block(_array_bytes(array(typecode, codes))),
+                    ],
+                })
+
+        header = json.dumps(
+            {"version": ARCHIVE_FORMAT_VERSION, "rows": len(rows), "columns": columns}
+        ).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(_MAGIC + _HEADER_LEN.pack(len(header)) + header)
+                for block in blocks:
+                    handle.write(block)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def text(self, column: str, row: int) -> str:
+        return self._text[column][row]
+
+    def date_value(self, column: str, row: int) -> date:
+        return date.fromordinal(self._dates[column][row])
+
+    def datetime_value(self, column: str, row: int) -> datetime:
+        micros, offsets = self._datetimes[column]
+        moment = _EPOCH + timedelta(microseconds=micros[row])
+        if offsets[row] != _NAIVE:
+            moment = moment.replace(tzinfo=timezone(timedelta(seconds=offsets[row])))
+        return moment
+
+    def row(self, row: int) -> Dict[str, str]:
+        """Record ``row`` exactly as it read in ``certificados.csv``."""
+        values: Dict[str, str] = {}
+        for column in self.columns:
+            if column in self._dates:
+                values[column] = self.date_value(column, row).isoformat()
+            elif column in self._datetimes:
+                values[column] = self.datetime_value(column, row).isoformat()
+            else:
+                values[column] = self.text(column, row)
+        return values
+
+    def certificado(self, row: int) -> Certificado:
+        return Certificado(*(self._field_value(name, row) for name in _CERTIFICADO_FIELDS))
+
+    def certificados(self, rows: Optional[Iterable[int]] = None) -> Iterator[Certificado]:
+        """Certificados at ``rows`` (default: all of them), in that order."""
+        if rows is not None:
+            for row in rows:
+                yield self.certificado(row)
+            return
+        for values in zip(*(self._field_values(name) for name in _CERTIFICADO_FIELDS)):
+            yield Certificado(*values)
+
+    def _field_value(self, name: str, row: int):
+        if name in self._dates:
+            return self.date_value(name, row)
+        if name in self._datetimes:
+            return self.datetime_value(name, row)
+        value = self.text(name, row)
+        return (value or None) if name in _OPTIONAL_TEXT else value
+
+    def _field_values(self, name: str) -> list:
+        """Every value of ``name`` decoded at once, for full scans.
+
+        Built per scan rather than kept: the archive only holds the encoded
+        arrays in memory, not a Python object per value.
+        """
+        if name in self._dates:
+            cache: Dict[int, date] = {}
+            return [
+                cache.get(ordinal) or cache.setdefault(ordinal, date.fromordinal(ordinal))
+                for ordinal in self._dates[name]
+            ]
+        if name in self._datetimes:
+            return [self.datetime_value(name, row) for row in range(self.rows)]
+        column = self._text[name]
+        values = column.values
+        if name in _OPTIONAL_TEXT:
+            values = [value or None for value in values]
+        return [values[code] for code in column.codes]
+
+    def find(self, column: str, value: str) -> List[int]:
+        return self._text[column].find(value)
+
+    def distinct(self, column: str) -> List[str]:
+        return self._text[column].values
+
+    def select(
+        self,
+        cnpj: Optional[str] = None,
+        validade_inicio: Optional[date] = None,
+        validade_fim: Optional[date] = None,
+        cidade: Optional[str] = None,
+        arquivo_origem: Optional[str] = None,
+    ) -> Iterator[int]:
+        """Rows matching every given filter, in archive order."""
+        if arquivo_origem is not None:
+            candidates: Iterable[int] = self.find("arquivo_origem", arquivo_origem)
+        else:
+            candidates = range(self.rows)
+
+        checks = []
+        if cnpj is not None:
+            column = self._text["cnpj"]
+            codes = column.matching_codes(lambda value: same_cnpj(value, cnpj))
+            checks.append(lambda row, c=column.codes, wanted=codes: c[row] in wanted)
+        if cidade is not None:
+            key = cidade.strip().casefold()
+            column = self._text["cidade"]
+            codes = column.matching_codes(lambda value: value.strip().casefold() == key)
+            checks.append(lambda row, c=column.codes, wanted=codes: c[row] in wanted)
+        ordinals = self._dates["data_validade"]
+        if validade_inicio is not None:
+            low = validade_inicio.toordinal()
+            checks.append(lambda row: ordinals[row] >= low)
+        if validade_fim is not None:
+            high = validade_fim.toordinal()
+            checks.append(lambda row: ordinals[row] <= high)
+
+        for row in candidates:
+            if all(check(row) for check in checks):
+                yield row
+
+
+class ColumnarArchive:
+    """The set of archived periods under ``directory``.
+
+    The ``max_cached`` most recently used decoded periods are kept in memory
+    for lookups and filtered listings. Unfiltered scans (``iter_rows``,
+    ``iter_certificados()`` without filters) reuse cached periods but decode
+    the others without caching them, so memory does not grow with the
+    archived history.
+    """
+
+    def __init__(self, directory: Path, max_cached: int = DEFAULT_CACHED_SEGMENTS) -> None:
+        self.directory = Path(directory)
+        self.max_cached = max_cached
+        self._segments: "OrderedDict[Path, Tuple[Version, ArchiveSegment]]" = OrderedDict()
+        self._keys: Optional[Dict[str, Tuple[Version, SegmentKeys]]] = None
+        self._lock = threading.Lock()
+
+    def path_for(self, period: Period) -> Path:
+        year, month = period
+        return self.directory / f"{_PREFIX}{year:04d}-{month:02d}{_SUFFIX}"
+
+    def paths(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob(f"{_PREFIX}*{_SUFFIX}"))
+
+    def segments(self, cache: bool = True) -> Iterator[ArchiveSegment]:
+        """Archived periods, oldest first; ``cache=False`` for one-off full scans."""
+        for path in self.paths():
+            segment = self._segment(path, cache)
+            if segment is not None:
+                yield segment
+
+    def _segment(self, path: Path, cache: bool = True) -> Optional[ArchiveSegment]:
+        version = _version(path)
+        if version is None:
+            return None
+        with self._lock:
+            cached = self._segments.get(path)
+            if cached is not None and cached[0] == version:
+                self._segments.move_to_end(path)
+                return cached[1]
+        segment = ArchiveSegment(path)
+        if cache:
+            with self._lock:
+                self._segments[path] = (version, segment)
+                self._segments.move_to_end(path)
+                while len(self._segments) > self.max_cached:
+                    self._segments.popitem(last=False)
+        return segment
+
+    def find_first(self, column: str, value: str) -> Optional[Certificado]:
+        for path in self.paths():
+            if column in _KEY_COLUMNS:
+                keys = self._segment_keys(path)
+                if keys is None or value not in keys[column]:
+                    continue
+            segment = self._segment(path)
+            if segment is None:
+                continue
+            rows = segment.find(column, value)
+            if rows:
+                return segment.certificado(rows[0])
+        return None
+
+    def _segment_keys(self, path: Path) -> Optional[SegmentKeys]:
+        """Distinct key values of one period, from the key index when it is current."""
+        version = _version(path)
+        if version is None:
+            return None
+        with self._lock:
+            cached = self._known_keys().get(path.name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        segment = self._segment(path)
+        if segment is None:
+            return None
+        keys = {column: frozenset(segment.distinct(column)) for column in _KEY_COLUMNS}
+        self._store_keys({path.name: (version, keys)})
+        return keys
+
+    def _known_keys(self) -> Dict[str, Tuple[Version, SegmentKeys]]:
+        if self._keys is None:
+            self._keys = {}
+            try:
+                payload = json.loads((self.directory / _KEY_INDEX).read_text(encoding="utf-8"))
+                for name, entry in payload["segments"].items():
+                    keys = {column: frozenset(entry["keys"][column]) for column in _KEY_COLUMNS}
+                    self._keys[name] = (tuple(entry["version"]), keys)
+            except (FileNotFoundError, KeyError, TypeError, ValueError):
+                # Missing or unreadable: periods are re-read once and indexed again.
+                self._keys = {}
+        return self._keys
+
+    def _store_keys(self, updates: Mapping[str, Tuple[Version, SegmentKeys]]) -> None:
+        with self._lock:
+            known = self._known_keys()
+            known.update(updates)
+            existing = {path.name for path in self.paths()}
+            for name in [name for name in known if name not in existing]:
+                del known[name]
+            payload = {
+                "version": ARCHIVE_FORMAT_VERSION,
+                "segments": {
+                    name: {
+                        "version": list(version),
+                        "keys": {column: sorted(keys[column]) for column in _KEY_COLUMNS},
+                    }
+                    for name, (version, keys) in known.items()
+                },
+            }
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(payload, handle, ensure_ascii=False)
+                os.replace(tmp_name, self.directory / _KEY_INDEX)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+
+    def iter_certificados(self, **filters) -> Iterator[Certificado]:
+        """Archived certificados matching ``filters`` (see :meth:`ArchiveSegment.select`)."""
+        filtered = any(value is not None for value in filters.values())
+        for segment in self.segments(cache=filtered):
+            if filtered:
+                yield from segment.certificados(segment.select(**filters))
+            else:
+                yield from segment.certificados()
+
+    def iter_rows(self) -> Iterator[Dict[str, str]]:
+        for segment in self.segments(cache=False):
+            for row in range(segment.rows):
+                yield segment.row(row)
+
+    def add_rows(self, headers: Sequence[str], rows: Iterable[Mapping[str, str]]) -> int:
+        """Merge CSV-shaped ``rows`` into their periods; returns how many were new.
+
+        Rows whose id is already archived are skipped, so re-running an
+        interrupted compaction does not duplicate anything.
+        """
+        by_period: Dict[Period, List[Mapping[str, str]]] = {}
+        for row in rows:
+            by_period.setdefault(period_of(datetime.fromisoformat(row["data_cadastro"])), []).append(row)
+
+        added = 0
+        written: Dict[str, Tuple[Version, SegmentKeys]] = {}
+        for period, new_rows in sorted(by_period.items()):
+            path = self.path_for(period)
+            existing = self._segment(path, cache=False)
+            merged: List[Mapping[str, str]] = []
+            seen = set()
+            if existing is not None:
+                merged.extend(existing.row(index) for index in range(existing.rows))
+                seen.update(row["id"] for row in merged)
+            for row in new_rows:
+                if row["id"] in seen:
+                    continue
+                seen.add(row["id"])
+                merged.append(row)
+                added += 1
+            ArchiveSegment.write(path, headers, merged)
+            keys = {column: frozenset(row.get(column) or "" for row in merged) for column in _KEY_COLUMNS}
+            written[path.name] = (_version(path), keys)
+        if written:
+            self._store_keys(written)
+        return added
+
+
+def _version(path: Path) -> Optional[Version]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,249 @@
+"""Persistent byte-offset indexes over the CSV data files.
+
+Each CSV gets a sibling ``<name>.idx`` file (itself a small CSV) with one line
+per data record: the record's byte offset and length plus the indexed column
+values. Indexes are loaded once, extended as records are appended and caught
+up from the last covered byte when the CSV grew behind their back (another
+writer, a crash between the two writes). Lookups then seek straight to the
+record instead of scanning the whole file.
+
+The index header records the identity (device and inode) of the CSV it was
+built from. A CSV replaced wholesale (``CsvManager.compact`` swaps in a new
+file with ``os.replace``) gets a new identity, so every index over it, in
+this process or another, is rebuilt instead of resuming at an offset that
+belongs to the old file.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+Entry = Tuple[int, int]
+
+_INDEX_SUFFIX = ".idx"
+
+
+def encode_row(headers: Sequence[str], row: Mapping[str, object]) -> bytes:
+    """One CSV record exactly as ``csv.DictWriter`` writes it, UTF-8 encoded."""
+    buffer = io.StringIO(newline="")
+    csv.DictWriter(buffer, fieldnames=headers).writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+
+def decode_record(record: bytes) -> List[str]:
+    return next(csv.reader(io.StringIO(record.decode("utf-8"), newline="")))
+
+
+def iter_records(handle: BinaryIO, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, raw record)`` for every complete record from ``offset``.
+
+    Records may span lines inside quoted fields; a record is complete once its
+    quote count is even. A trailing record without line terminator (a write in
+    progress) is not yielded.
+    """
+    handle.seek(offset)
+    start = offset
+    pending = b""
+    for line in handle:
+        pending += line
+        if pending.count(b'"') % 2 or not pending.endswith(b"\n"):
+            continue
+        yield start, pending
+        start += len(pending)
+        pending = b""
+
+
+def scan_records(path: Path, offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """:func:`iter_records` over a memory map of ``path``.
+
+    Records are sliced straight out of the mapping (one ``find`` per line, no
+    buffered line iteration), so callers can test raw field bytes before paying
+    for any decoding. The file is read as it was when the scan started.
+    """
+    with Path(path).open("rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size <= offset:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            start = offset
+            end = offset
+            while True:
+                newline = view.find(b"\n", end, size)
+                if newline < 0:
+                    return
+                end = newline + 1
+                record = view[start:end]
+                if record.count(b'"') % 2:
+                    continue
+                yield start, record
+                start = end
+
+
+class CsvIndex:
+    """Offset index of one CSV file over ``key_columns``.
+
+    Safe to share between threads; another process appending to the same CSV is
+    picked up by the next :meth:`refresh`.
+    """
+
+    def __init__(self, csv_path: Path, key_columns: Sequence[str]) -> None:
+        self.csv_path = Path(csv_path)
+        self.index_path = self.csv_path.with_name(self.csv_path.name + _INDEX_SUFFIX)
+        self.key_columns = tuple(key_columns)
+        self._fieldnames: List[str] = []
+        self._entries: Dict[str, Dict[str, List[Entry]]] = {}
+        self._covered = 0
+        self._file_id = ""
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @property
+    def fieldnames(self) -> List[str]:
+        with self._lock:
+            self.refresh()
+            return self._fieldnames
+
+    def lookup(self, column: str, key: str) -> List[Entry]:
+        """``(offset, length)`` of every record with ``column == key``, in file order."""
+        with self._lock:
+            self.refresh()
+            return list(self._entries[column].get(key, ()))
+
+    def keys(self, column: str) -> List[str]:
+        with self._lock:
+            self.refresh()
+            return list(self._entries[column])
+
+    def read_rows(self, column: str, key: str) -> List[Dict[str, str]]:
+        """Records with ``column == key``; the index is rebuilt once if it went stale."""
+        for _ in range(2):
+            rows = self._read_entries(self.lookup(column, key))
+            if all(row.get(column) == key for row in rows):
+                return rows
+            self.rebuild()
+        return [row for row in rows if row.get(column) == key]
+
+    def add(self, offset: int, length: int, row: Mapping[str, object]) -> None:
+        """Register a record just appended at ``offset``."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if offset != self._covered or self._current_file_id() != self._file_id:
+                # Something else was appended in between (or the file was
+                # replaced): pick it up from the file.
+                self.refresh()
+                return
+            self._register(offset, length, row)
+            self._write_lines([self._index_line(offset, length, row)])
+
+    def refresh(self) -> None:
+        """Load the index on first use and catch up with records appended since."""
+        with self._lock:
+            size = self.csv_path.stat().st_size if self.csv_path.exists() else 0
+            if not self._loaded:
+                self._load()
+            if size < self._covered or self._current_file_id() != self._file_id:
+                self.rebuild()
+            elif size > self._covered:
+                self._scan_from(self._covered)
+
+    def rebuild(self) -> None:
+        with self._lock:
+            self._reset()
+            self.index_path.unlink(missing_ok=True)
+            self._loaded = True
+            self._scan_from(0)
+
+    def _reset(self) -> None:
+        self._entries = {column: {} for column in self.key_columns}
+        self._fieldnames = []
+        self._covered = 0
+        self._file_id = self._current_file_id()
+
+    def _current_file_id(self) -> str:
+        try:
+            stat = self.csv_path.stat()
+        except FileNotFoundError:
+            return ""
+        return f"{stat.st_dev}:{stat.st_ino}"
+
+    def _header(self) -> List[str]:
+        return ["offset", "length", *self.key_columns, f"file={self._file_id}"]
+
+    def _load(self) -> None:
+        self._reset()
+        self._loaded = True
+        if not self.csv_path.exists():
+            return
+        self._scan_from(0, header_only=True)
+        if not self.index_path.exists():
+            return
+
+        width = 2 + len(self.key_columns)
+        with self.index_path.open("r", newline="", encoding="utf-8") as handle:
+            lines = list(csv.reader(handle))
+        if not lines or lines[0] != self._header() or any(len(line) != width for line in lines[1:]):
+            self.rebuild()
+            return
+        for line in lines[1:]:
+            self._register(int(line[0]), int(line[1]), dict(zip(self.key_columns, line[2:])))
+
+    def _scan_from(self, offset: int, header_only: bool = False) -> None:
+        new_lines = []
+        with self.csv_path.open("rb") as handle:
+            for start, record in iter_records(handle, offset):
+                if not self._fieldnames:
+                    self._fieldnames = decode_record(record)
+                    self._covered = start + len(record)
+                    if header_only:
+                        return
+                    continue
+                row = dict(zip(self._fieldnames, decode_record(record)))
+                self._register(start, len(record), row)
+                new_lines.append(self._index_line(start, len(record), row))
+
+        if new_lines:
+            self._write_lines(new_lines)
+
+    def _write_lines(self, lines: List[List[object]]) -> None:
+        write_header = not self.index_path.exists()
+        with self.index_path.open("a", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            if write_header:
+                writer.writerow(self._header())
+            writer.writerows(lines)
+
+    def _register(self, offset: int, length: int, row: Mapping[str, object]) -> None:
+        if offset < self._covered:
+            # Already registered (a catch-up scan raced with the writer's own add).
+            return
+        for column in self.key_columns:
+            key = row.get(column)
+            self._entries[column].setdefault("" if key is None else str(key), []).append((offset, length))
+        self._covered = max(self._covered, offset + length)
+
+    def _index_line(self, offset: int, length: int, row: Mapping[str, object]) -> List[object]:
+        return [offset, length, *(row.get(column, "") for column in self.key_columns)]
+
+    def iter_entries(self, entries: Iterable[Entry]) -> Iterator[Dict[str, str]]:
+        """Read the records at ``entries`` one at a time, in the given order."""
+        fieldnames = self.fieldnames
+        for record in self.iter_raw(entries):
+            yield dict(zip(fieldnames, decode_record(record)))
+
+    def iter_raw(self, entries: Iterable[Entry]) -> Iterator[bytes]:
+        """Undecoded records at ``entries``, in the given order."""
+        with self.csv_path.open("rb") as handle:
+            for offset, length in entries:
+                handle.seek(offset)
+                yield handle.read(length)
+
+    def _read_entries(self, entries: List[Entry]) -> List[Dict[str, str]]:
+        if not entries:
+            return []
+        return list(self.iter_entries(entries))
@@ -1,17 +1,45 @@
 from __future__ import annotations
 
 import csv
-from contextlib import ExitStack
+import heapq
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime, date
+from itertools import chain, islice
 from pathlib import Path
-from typing import Callable, Iterable, List, Optional, TypeVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
 from ..models import Certificado, CertificadoBundle, MetodoAplicacao, ProdutoQuimico
 from ..config_defaults import DATA_DIR
-from ..constants import CSV_CERTIFICATES, CSV_PRODUCTS, CSV_METHODS
+from ..constants import (
+    CSV_ARCHIVE_DIR,
+    CSV_CERTIFICATES,
+    CSV_JOURNAL_FILE,
+    CSV_LOCK_FILE,
+    CSV_METHODS,
+    CSV_PRODUCTS,
+    IDENTITY_INDEX,
+)
+from ..utils import cnpj_variants, same_cnpj
+from .columnar import ColumnarArchive
+from .csv_index import CsvIndex, decode_record, encode_row, iter_records, scan_records
+from .csv_writer import (
+    DEFAULT_GROUP_BUNDLES,
+    DEFAULT_GROUP_BYTES,
+    DEFAULT_GROUP_DELAY,
+    CsvWriter,
+    GroupCommitPolicy,
+)
+from .identity import IdentityIndex
+from .rows import bundle_rows, certificado_row, metodo_row, produto_row
 
 T = TypeVar('T')
 
+logger = logging.getLogger(__name__)
+
 CERTIFICADOS_HEADERS = [
     "id",
     "numero_certificado",
@@ -47,6 +75,47 @@ METODOS_HEADERS = [
     "quantidade",
 ]
 
+# Certificados per produtos/metodos pass when every bundle is read back.
+_BUNDLE_CHUNK_SIZE = 1000
+
+
+def _column_checks(
+    cnpj: Optional[str],
+    validade_inicio: Optional[date],
+    validade_fim: Optional[date],
+    cidade: Optional[str],
+    arquivo_origem: Optional[str],
+) -> List[Tuple[str, Callable[[str], bool]]]:
+    """``iter_certificados`` filters as ``(column, test on the stored text)``."""
+    checks: List[Tuple[str, Callable[[str], bool]]] = []
+    if arquivo_origem is not None:
+        checks.append(("arquivo_origem", arquivo_origem.__eq__))
+    if cnpj is not None:
+        checks.append(("cnpj", lambda value: same_cnpj(value, cnpj)))
+    # ISO dates compare correctly as strings.
+    if validade_inicio is not None:
+        inicio = validade_inicio.isoformat()
+        checks.append(("data_validade", lambda value: value >= inicio))
+    if validade_fim is not None:
+        fim = validade_fim.isoformat()
+        checks.append(("data_validade", lambda value: value <= fim))
+    if cidade is not None:
+        key = cidade.strip().casefold()
+        checks.append(("cidade", lambda value: value.strip().casefold() == key))
+    return checks
+
+
+def _cidade_needle(cidade: Optional[str]) -> Optional[bytes]:
+    """Bytes every record of ``cidade`` contains once lower-cased.
+
+    A substring test on the raw record is far cheaper than parsing it, so
+    records of other cities are dropped before the ``csv`` module sees them.
+    Only ASCII names qualify: ``bytes.lower`` leaves accented letters alone.
+    """
+    if cidade and cidade.strip().isascii():
+        return cidade.strip().lower().encode("ascii")
+    return None
+
 
 class CsvManager:
     def __init__(self, data_dir: Path = DATA_DIR):
@@ -58,6 +127,25 @@ class CsvManager:
         self.metodos_path = self.data_dir / CSV_METHODS
         self._ensure_headers()
 
+        self._certificados_index = CsvIndex(
+            self.certificados_path, ("id", "numero_certificado", "arquivo_origem", "cnpj")
+        )
+        self._produtos_index = CsvIndex(self.produtos_path, ("id_certificado",))
+        self._metodos_index = CsvIndex(self.metodos_path, ("id_certificado",))
+        self.archive = ColumnarArchive(self.data_dir / CSV_ARCHIVE_DIR)
+        self.identities = IdentityIndex(self.data_dir / IDENTITY_INDEX, source=self.iter_bundles)
+
+        self._policy_lock = threading.Lock()
+        self._buffered_depth = 0
+        self._writer = CsvWriter(
+            lock_path=self.data_dir / CSV_LOCK_FILE,
+            # Items first: a certificado row is only visible once its items are.
+            file_order=(self.produtos_path, self.metodos_path, self.certificados_path),
+            journal_path=self.data_dir / CSV_JOURNAL_FILE,
+        )
+        # Finish bundles a previous run was writing when it died.
+        self._writer.recover()
+
     def _ensure_headers(self) -> None:
         self._ensure_file(self.certificados_path, CERTIFICADOS_HEADERS)
         self._ensure_file(self.produtos_path, PRODUTOS_HEADERS)
@@ -73,89 +161,149 @@ class CsvManager:
 
     def append_bundle(self, bundle: CertificadoBundle, skip_if_exists: bool = True) -> Certificado:
         if skip_if_exists:
+            existing = self.find_duplicate(bundle)
+            if existing:
+                return existing.certificado
             existing = self.get_bundle_by_arquivo(bundle.certificado.arquivo_origem)
             if existing and existing.certificado.id == bundle.certificado.id:
                 return existing.certificado
-        
+
         if bundle.certificado.id is None:
             bundle.certificado.id = bundle.certificado._generate_id()
         
-        certificado_id = bundle.certificado.id
-        
-        with ExitStack() as stack:
-            cert_file = stack.enter_context(
-                self.certificados_path.open("a", newline="", encoding="utf-8")
-            )
-            prod_file = stack.enter_context(
-                self.produtos_path.open("a", newline="", encoding="utf-8")
-            )
-            met_file = stack.enter_context(
-                self.metodos_path.open("a", newline="", encoding="utf-8")
-            )
-            
-            cert_writer = csv.DictWriter(cert_file, fieldnames=CERTIFICADOS_HEADERS)
-            cert_row = {
-                "id": certificado_id,
-                "numero_certificado": bundle.certificado.numero_certificado,
-                "numero_licenca": bundle.certificado.numero_licenca,
-                "razao_social": bundle.certificado.razao_social,
-                "nome_fantasia": bundle.certificado.nome_fantasia,
-                "cnpj": bundle.certificado.cnpj,
-                "endereco_completo": bundle.certificado.endereco_completo,
-                "data_execucao": bundle.certificado.data_execucao.isoformat(),
-                "data_validade": bundle.certificado.data_validade.isoformat(),
-                "pragas_tratadas": bundle.certificado.pragas_tratadas,
-                "arquivo_origem": bundle.certificado.arquivo_origem,
-                "data_cadastro": bundle.certificado.data_cadastro.isoformat(),
-                "valor": bundle.certificado.valor or "",
-                "bairro": bundle.certificado.bairro or "",
-                "cidade": bundle.certificado.cidade or "",
-            }
-            cert_writer.writerow(cert_row)
-            
-            prod_writer = csv.DictWriter(prod_file, fieldnames=PRODUTOS_HEADERS)
-            for idx, produto in enumerate(bundle.produtos, start=1):
-                prod_row = {
-                    "id": f"{certificado_id}-P{idx:03d}",
-                    "id_certificado": certificado_id,
-                    "numero_certificado": bundle.certificado.numero_certificado,
-                    "nome_produto": produto.nome_produto,
-                    "classe_quimica": produto.classe_quimica,
-                    "concentracao": "" if produto.concentracao is None else str(produto.concentracao),
-                }
-                prod_writer.writerow(prod_row)
-            
-            met_writer = csv.DictWriter(met_file, fieldnames=METODOS_HEADERS)
-            for idx, metodo in enumerate(bundle.metodos, start=1):
-                met_row = {
-                    "id": f"{certificado_id}-M{idx:03d}",
-                    "id_certificado": certificado_id,
-                    "numero_certificado": bundle.certificado.numero_certificado,
-                    "metodo": metodo.metodo,
-                    "quantidade": metodo.quantidade,
-                }
-                met_writer.writerow(met_row)
-        
+        cert_row, produto_rows, metodo_rows = bundle_rows(bundle)
+        writes = [
+            (self.certificados_path, self._certificados_index, CERTIFICADOS_HEADERS, [cert_row]),
+            (self.produtos_path, self._produtos_index, PRODUTOS_HEADERS, produto_rows),
+            (self.metodos_path, self._metodos_index, METODOS_HEADERS, metodo_rows),
+        ]
+
+        records = [
+            (path, index, encode_row(headers, row), row)
+            for path, index, headers, rows in writes
+            for row in rows
+        ]
+        self._writer.submit(records, payload=bundle, sync=self._writer.policy is None)
+        self.identities.add(bundle)
+
         return bundle.certificado
 
+    def find_duplicate(self, bundle: CertificadoBundle) -> Optional[CertificadoBundle]:
+        """The stored bundle with the same CNPJ, numero and data_execucao and the same content.
+
+        Answered from the identity index without scanning the data files.
+        """
+        certificado_id = self.identities.find(bundle)
+        # An index entry can outlive its rows (buffered bundles lost in a crash).
+        return self.get_bundle_by_id(certificado_id) if certificado_id else None
+
+    def get_bundles_by_file_hash(self, file_hash: str) -> List[CertificadoBundle]:
+        """Bundles stored from the spreadsheet with this SHA-256 (see :meth:`record_file_hash`)."""
+        bundles = (self.get_bundle_by_id(certificado_id) for certificado_id in self.identities.ids_for_file(file_hash))
+        return [bundle for bundle in bundles if bundle]
+
+    def record_file_hash(self, file_hash: str, certificado_ids: Iterable[str]) -> None:
+        self.identities.add_file(file_hash, certificado_ids)
+
+    @contextmanager
+    def buffered(
+        self,
+        max_bundles: int = DEFAULT_GROUP_BUNDLES,
+        max_bytes: int = DEFAULT_GROUP_BYTES,
+        max_delay: Optional[float] = DEFAULT_GROUP_DELAY,
+    ) -> Iterator["CsvManager"]:
+        """Group-commit mode: bundles are journaled and written in groups, one fsync each.
+
+        Appends return as soon as the bundle is queued for the writer thread,
+        which flushes a group once it holds ``max_bundles`` bundles or
+        ``max_bytes`` bytes or is ``max_delay`` seconds old, and always on exit.
+        Queued bundles are visible to ``get_bundle_by_numero``/
+        ``get_bundle_by_arquivo`` but are lost if the process dies before the
+        flush. Outside this block every append waits for its own fsync
+        (concurrent appends still share one). Overlapping blocks, from nested
+        calls or other threads, keep the policy of the outermost one.
+        """
+        with self._policy_lock:
+            if self._buffered_depth == 0:
+                self._writer.policy = GroupCommitPolicy(max_bundles, max_bytes, max_delay)
+            self._buffered_depth += 1
+        try:
+            yield self
+        finally:
+            with self._policy_lock:
+                self._buffered_depth -= 1
+                if self._buffered_depth == 0:
+                    self._writer.policy = None
+            self._writer.flush()
+
+    def flush(self) -> None:
+        """Wait until every queued bundle is on disk."""
+        self._writer.flush()
+
+    def close(self) -> None:
+        """Flush and stop the writer thread."""
+        self._writer.flush()
+        self._writer.close()
+
+    def _pending_bundle(self, field: str, value: str) -> Optional[CertificadoBundle]:
+        for bundle in self._writer.pending_payloads():
+            if getattr(bundle.certificado, field) == value:
+                return bundle
+        return None
+
+    def compact(self, before: Optional[date] = None) -> int:
+        """Move certificados of closed months into the columnar archive.
+
+        Every certificado whose ``data_cadastro`` falls before the month of
+        ``before`` (default: today) is written to ``historico/`` and removed
+        from ``certificados.csv``; returns how many rows were moved. Produtos
+        and metodos stay in their CSVs. Lookups and listings read archived
+        periods transparently. Safe to re-run after an interruption.
+        """
+        cutoff = (before or date.today()).replace(day=1)
+        self.flush()
+        with self._writer.lock:
+            header = b""
+            kept: List[bytes] = []
+            archived: List[dict] = []
+            with self.certificados_path.open("rb") as handle:
+                for _, record in iter_records(handle, 0):
+                    if not header:
+                        header = record
+                        continue
+                    row = dict(zip(CERTIFICADOS_HEADERS, decode_record(record)))
+                    if datetime.fromisoformat(row["data_cadastro"]).date() < cutoff:
+                        archived.append(row)
+                    else:
+                        kept.append(record)
+            if not archived:
+                return 0
+
+            # The journal addresses rows by offset: settle it before the rewrite.
+            self._writer.checkpoint()
+            self.archive.add_rows(CERTIFICADOS_HEADERS, archived)
+            fd, tmp_name = tempfile.mkstemp(dir=self.data_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(header + b"".join(kept))
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                os.replace(tmp_name, self.certificados_path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+            self._certificados_index.rebuild()
+        logger.info(f"Archived {len(archived)} certificados registered before {cutoff.isoformat()}")
+        return len(archived)
+
+    def rebuild_indexes(self) -> None:
+        """Re-derive the ``.idx`` files from the CSVs (e.g. after editing them by hand)."""
+        for index in (self._certificados_index, self._produtos_index, self._metodos_index):
+            index.rebuild()
+        self.identities.rebuild()
+
     def _append_certificado(self, certificado: Certificado) -> None:
-        row = {
-            "id": certificado.id,
-            "numero_certificado": certificado.numero_certificado,
-            "numero_licenca": certificado.numero_licenca,
-            "razao_social": certificado.razao_social,
-            "nome_fantasia": certificado.nome_fantasia,
-            "cnpj": certificado.cnpj,
-            "endereco_completo": certificado.endereco_completo,
-            "data_execucao": certificado.data_execucao.isoformat(),
-            "data_validade": certificado.data_validade.isoformat(),
-            "pragas_tratadas": certificado.pragas_tratadas,
-            "arquivo_origem": certificado.arquivo_origem,
-            "data_cadastro": certificado.data_cadastro.isoformat(),
-            "valor": certificado.valor or "",
-            "bairro": certificado.bairro or "",
-            "cidade": certificado.cidade or "",
-        }
+        row = certificado_row(certificado)
         with self.certificados_path.open("a", newline="", encoding="utf-8") as handle:
             writer = csv.DictWriter(handle, fieldnames=CERTIFICADOS_HEADERS)
             writer.writerow(row)
@@ -177,32 +325,15 @@ class CsvManager:
                 writer.writerow(row)
 
     def _append_produtos(self, certificado_id: str, numero_certificado: str, produtos: Iterable[ProdutoQuimico]) -> None:
-        def map_produto(item_id: str, cert_id: str, cert_numero: str, produto: ProdutoQuimico) -> dict:
-            return {
-                "id": item_id,
-                "id_certificado": cert_id,
-                "numero_certificado": cert_numero,
-                "nome_produto": produto.nome_produto,
-                "classe_quimica": produto.classe_quimica,
-                "concentracao": "" if produto.concentracao is None else str(produto.concentracao),
-            }
-        self._append_items(self.produtos_path, PRODUTOS_HEADERS, certificado_id, numero_certificado, produtos, map_produto)
+        self._append_items(self.produtos_path, PRODUTOS_HEADERS, certificado_id, numero_certificado, produtos, produto_row)
 
     def _append_metodos(self, certificado_id: str, numero_certificado: str, metodos: Iterable[MetodoAplicacao]) -> None:
-        def map_metodo(item_id: str, cert_id: str, cert_numero: str, metodo: MetodoAplicacao) -> dict:
-            return {
-                "id": item_id,
-                "id_certificado": cert_id,
-                "numero_certificado": cert_numero,
-                "metodo": metodo.metodo,
-                "quantidade": metodo.quantidade,
-            }
-        self._append_items(self.metodos_path, METODOS_HEADERS, certificado_id, numero_certificado, metodos, map_metodo)
+        self._append_items(self.metodos_path, METODOS_HEADERS, certificado_id, numero_certificado, metodos, metodo_row)
 
     def get_bundle_by_numero(self, numero_certificado: str) -> Optional[CertificadoBundle]:
         certificado = self._load_certificado(numero_certificado)
         if not certificado:
-            return None
+            return self._pending_bundle("numero_certificado", numero_certificado)
         produtos = self._load_produtos(certificado.id)
         metodos = self._load_metodos(certificado.id)
         return CertificadoBundle(certificado=certificado, produtos=produtos, metodos=metodos)
@@ -210,73 +341,214 @@ class CsvManager:
     def get_bundle_by_arquivo(self, arquivo_origem: str) -> Optional[CertificadoBundle]:
         certificado = self._load_certificado_by_arquivo(arquivo_origem)
         if not certificado:
-            return None
+            return self._pending_bundle("arquivo_origem", arquivo_origem)
         produtos = self._load_produtos(certificado.id)
         metodos = self._load_metodos(certificado.id)
         return CertificadoBundle(certificado=certificado, produtos=produtos, metodos=metodos)
 
+    def get_bundle_by_id(self, certificado_id: str) -> Optional[CertificadoBundle]:
+        certificado = self.archive.find_first("id", certificado_id)
+        if not certificado:
+            rows = self._certificados_index.read_rows("id", certificado_id)
+            certificado = self._row_to_certificado(rows[0]) if rows else None
+        if not certificado:
+            return self._pending_bundle("id", certificado_id)
+        produtos = self._load_produtos(certificado.id)
+        metodos = self._load_metodos(certificado.id)
+        return CertificadoBundle(certificado=certificado, produtos=produtos, metodos=metodos)
+
+    def get_bundles(self, numeros: Iterable[str]) -> Dict[str, CertificadoBundle]:
+        """Bundles for many ``numero_certificado`` values at once, keyed by numero.
+
+        Each CSV is read once: the wanted records are located through the offset
+        indexes and read in file order, then produtos/metodos are grouped by
+        ``id_certificado``. Unknown numeros are left out of the result.
+        """
+        self.flush()
+        wanted = set(numeros)
+        certificados: Dict[str, Certificado] = {}
+        for numero in wanted:
+            archived = self.archive.find_first("numero_certificado", numero)
+            if archived:
+                certificados[numero] = archived
+
+        index = self._certificados_index
+        entries = sorted(
+            {entry for numero in wanted - certificados.keys()
+             for entry in index.lookup("numero_certificado", numero)}
+        )
+        for row in index.iter_entries(entries):
+            # Same rule as get_bundle_by_numero: the first record for a numero wins.
+            if row["numero_certificado"] in wanted:
+                certificados.setdefault(row["numero_certificado"], self._row_to_certificado(row))
+
+        ids = {certificado.id for certificado in certificados.values()}
+        produtos = self._group_items(self._produtos_index, ids, self._row_to_produto)
+        metodos = self._group_items(self._metodos_index, ids, self._row_to_metodo)
+        return {
+            numero: CertificadoBundle(
+                certificado=certificado,
+                produtos=produtos.get(certificado.id, []),
+                metodos=metodos.get(certificado.id, []),
+            )
+            for numero, certificado in certificados.items()
+        }
+
+    @staticmethod
+    def _group_items(
+        index: CsvIndex, certificado_ids: Iterable[str], map_fn: Callable[[dict], T]
+    ) -> Dict[str, List[T]]:
+        ids = set(certificado_ids)
+        entries = sorted(
+            {entry for certificado_id in ids for entry in index.lookup("id_certificado", certificado_id)}
+        )
+        grouped: Dict[str, List[T]] = {}
+        for row in index.iter_entries(entries):
+            if row["id_certificado"] in ids:
+                grouped.setdefault(row["id_certificado"], []).append(map_fn(row))
+        return grouped
+
+    def iter_bundles(self) -> Iterator[CertificadoBundle]:
+        """Every stored bundle in insertion order, reading items for 1000 certificados at a time."""
+        certificados = self.iter_certificados()
+        while chunk := list(islice(certificados, _BUNDLE_CHUNK_SIZE)):
+            ids = [certificado.id for certificado in chunk]
+            produtos = self._group_items(self._produtos_index, ids, self._row_to_produto)
+            metodos = self._group_items(self._metodos_index, ids, self._row_to_metodo)
+            for certificado in chunk:
+                yield CertificadoBundle(
+                    certificado=certificado,
+                    produtos=produtos.get(certificado.id, []),
+                    metodos=metodos.get(certificado.id, []),
+                )
+
     def list_certificados(self) -> List[Certificado]:
-        certificados: List[Certificado] = []
+        return list(self.iter_certificados())
+
+    def iter_certificados(
+        self,
+        cnpj: Optional[str] = None,
+        validade_inicio: Optional[date] = None,
+        validade_fim: Optional[date] = None,
+        cidade: Optional[str] = None,
+        arquivo_origem: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Iterator[Certificado]:
+        """Stream certificados in insertion order, optionally filtered and paginated.
+
+        ``validade_inicio``/``validade_fim`` bound ``data_validade`` inclusively,
+        ``cidade`` matches case-insensitively and ``cnpj`` matches with or without
+        punctuation. Archived periods (see :meth:`compact`) come first, oldest
+        month first, followed by the live CSV. In the CSV, ``cnpj`` and
+        ``arquivo_origem`` are answered from the offset index; the other filters
+        scan the file one row at a time.
+        """
+        self.flush()
+        archived = self.archive.iter_certificados(
+            cnpj=cnpj,
+            validade_inicio=validade_inicio,
+            validade_fim=validade_fim,
+            cidade=cidade,
+            arquivo_origem=arquivo_origem,
+        )
         if not self.certificados_path.exists():
-            return certificados
-        with self.certificados_path.open("r", newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                certificados.append(self._row_to_certificado(row))
-        return certificados
+            return islice(archived, offset, None if limit is None else offset + limit)
+
+        checks = _column_checks(cnpj, validade_inicio, validade_fim, cidade, arquivo_origem)
+        records = self._candidate_records(cnpj, arquivo_origem, _cidade_needle(cidade))
+        live = self._matching_certificados(records, checks)
+        stop = None if limit is None else offset + limit
+        return islice(chain(archived, live), offset, stop)
+
+    def _matching_certificados(
+        self, records: Iterable[bytes], checks: List[Tuple[str, Callable[[str], bool]]]
+    ) -> Iterator[Certificado]:
+        """Parse ``records`` as plain lists and build certificados only for matches."""
+        fieldnames = self._certificados_fieldnames()
+        positions = [(fieldnames.index(column), check) for column, check in checks]
+        # One reader for the whole stream: each record is a complete CSV record.
+        for values in csv.reader(record.decode("utf-8") for record in records):
+            if len(values) < len(fieldnames):
+                values += [""] * (len(fieldnames) - len(values))
+            if positions and not all(check(values[position]) for position, check in positions):
+                continue
+            yield self._row_to_certificado(dict(zip(fieldnames, values)))
+
+    def _certificados_fieldnames(self) -> List[str]:
+        with self.certificados_path.open("rb") as handle:
+            header = next(iter_records(handle, 0), (0, b""))[1]
+        return decode_record(header) if header else list(CERTIFICADOS_HEADERS)
+
+    def _candidate_records(
+        self, cnpj: Optional[str], arquivo_origem: Optional[str], needle: Optional[bytes]
+    ) -> Iterator[bytes]:
+        index = self._certificados_index
+        lookups = []
+        if arquivo_origem is not None:
+            lookups.append(index.lookup("arquivo_origem", arquivo_origem))
+        if cnpj is not None:
+            lookups.append(list(heapq.merge(*(index.lookup("cnpj", key) for key in cnpj_variants(cnpj)))))
+        if lookups:
+            return index.iter_raw(min(lookups, key=len))
+        return self._scan_certificados(needle)
+
+    def _scan_certificados(self, needle: Optional[bytes] = None) -> Iterator[bytes]:
+        """Raw data records of ``certificados.csv``, read through a memory map.
+
+        With ``needle``, records whose lower-cased bytes do not contain it are
+        skipped without being decoded.
+        """
+        records = scan_records(self.certificados_path)
+        next(records, None)  # header
+        for _, record in records:
+            if needle is None or needle in record.lower():
+                yield record
 
     def _load_certificado(self, numero_certificado: str) -> Optional[Certificado]:
-        if not self.certificados_path.exists():
-            return None
-        with self.certificados_path.open("r", newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                if row["numero_certificado"] == numero_certificado:
-                    return self._row_to_certificado(row)
-        return None
+        archived = self.archive.find_first("numero_certificado", numero_certificado)
+        if archived:
+            return archived
+        rows = self._certificados_index.read_rows("numero_certificado", numero_certificado)
+        return self._row_to_certificado(rows[0]) if rows else None
     
     def _load_certificado_by_arquivo(self, arquivo_origem: str) -> Optional[Certificado]:
-        if not self.certificados_path.exists():
-            return None
-        with self.certificados_path.open("r", newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                if row["arquivo_origem"] == arquivo_origem:
-                    return self._row_to_certificado(row)
-        return None
+        archived = self.archive.find_first("arquivo_origem", arquivo_origem)
+        if archived:
+            return archived
+        rows = self._certificados_index.read_rows("arquivo_origem", arquivo_origem)
+        return self._row_to_certificado(rows[0]) if rows else None
 
     def _load_items(
         self,
-        path: Path,
+        index: CsvIndex,
         certificado_id: Optional[str],
         map_fn: Callable[[dict], T]
     ) -> List[T]:
-        items: List[T] = []
-        if not path.exists() or certificado_id is None:
-            return items
-        with path.open("r", newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                if row["id_certificado"] == certificado_id:
-                    items.append(map_fn(row))
-        return items
+        if certificado_id is None:
+            return []
+        return [map_fn(row) for row in index.read_rows("id_certificado", certificado_id)]
 
     def _load_produtos(self, certificado_id: Optional[str]) -> List[ProdutoQuimico]:
-        def map_produto(row: dict) -> ProdutoQuimico:
-            return ProdutoQuimico(
-                nome_produto=row["nome_produto"],
-                classe_quimica=row["classe_quimica"],
-                concentracao=float(row["concentracao"]) if row["concentracao"] else None,
-            )
-        return self._load_items(self.produtos_path, certificado_id, map_produto)
+        return self._load_items(self._produtos_index, certificado_id, self._row_to_produto)
 
     def _load_metodos(self, certificado_id: Optional[str]) -> List[MetodoAplicacao]:
-        def map_metodo(row: dict) -> MetodoAplicacao:
-            return MetodoAplicacao(
-                metodo=row["metodo"],
-                quantidade=row["quantidade"],
-            )
-        return self._load_items(self.metodos_path, certificado_id, map_metodo)
+        return self._load_items(self._metodos_index, certificado_id, self._row_to_metodo)
+
+    @staticmethod
+    def _row_to_produto(row: dict) -> ProdutoQuimico:
+        return ProdutoQuimico(
+            nome_produto=row["nome_produto"],
+            classe_quimica=row["classe_quimica"],
+            concentracao=float(row["concentracao"]) if row["concentracao"] else None,
+        )
+
+    @staticmethod
+    def _row_to_metodo(row: dict) -> MetodoAplicacao:
+        return MetodoAplicacao(
+            metodo=row["metodo"],
+            quantidade=row["quantidade"],
+        )
 
     @staticmethod
     def _row_to_certificado(row: dict[str, str]) -> Certificado:
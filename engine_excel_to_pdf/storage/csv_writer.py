@@ -0,0 +1,277 @@
+"""Single writer thread that group-commits CSV appends.
+
+Producers hand encoded records to :class:`CsvWriter` through a queue and only
+wait when they need durability. The writer drains whatever has queued up,
+writes it under an advisory file lock with one ``write`` per file, then updates
+the offset indexes. Files are written in the order given at construction
+(items before certificados), so a certificado row is never visible before its
+produtos/metodos rows.
+
+With a :class:`~.journal.Journal` the group is first recorded there, one frame
+per bundle, and that single fsync makes it durable: the CSVs are only fsynced
+at checkpoints, and :meth:`CsvWriter.recover` completes bundles a crash cut in
+half. Without one every file is fsynced on each write.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .csv_index import CsvIndex
+from .file_lock import FileLock
+from .journal import Journal, JournalWrite
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_BUNDLES = 100
+DEFAULT_GROUP_BYTES = 1024 * 1024
+DEFAULT_GROUP_DELAY = 2.0
+DEFAULT_CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+Record = Tuple[Path, CsvIndex, bytes, Dict[str, Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class GroupCommitPolicy:
+    max_bundles: int = DEFAULT_GROUP_BUNDLES
+    max_bytes: int = DEFAULT_GROUP_BYTES
+    max_delay: Optional[float] = DEFAULT_GROUP_DELAY
+
+    def is_due(self, bundles: int, size: int, since: float) -> bool:
+        if bundles >= self.max_bundles or size >= self.max_bytes:
+            return True
+        return self.max_delay is not None and time.monotonic() - since >= self.max_delay
+
+    def remaining(self, since: float) -> Optional[float]:
+        if self.max_delay is None:
+            return None
+        return max(0.0, self.max_delay - (time.monotonic() - since))
+
+
+@dataclass(eq=False, slots=True)
+class Submission:
+    records: List[Record]
+    payload: Any = None
+    sync: bool = False
+    done: threading.Event = field(default_factory=threading.Event)
+    error: Optional[BaseException] = None
+
+    @property
+    def size(self) -> int:
+        return sum(len(data) for _, _, data, _ in self.records)
+
+
+_STOP = object()
+
+
+class CsvWriter:
+    def __init__(
+        self,
+        lock_path: Path,
+        file_order: Sequence[Path],
+        journal_path: Optional[Path] = None,
+        checkpoint_bytes: int = DEFAULT_CHECKPOINT_BYTES,
+    ) -> None:
+        self.lock = FileLock(lock_path)
+        self.file_order = list(file_order)
+        self.journal = Journal(journal_path) if journal_path is not None else None
+        self.checkpoint_bytes = checkpoint_bytes
+        self.policy: Optional[GroupCommitPolicy] = None
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._pending: List[Submission] = []
+        self._errors: List[BaseException] = []
+        self._state_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, records: List[Record], payload: Any = None, sync: bool = False) -> Submission:
+        """Queue ``records``; with ``sync`` wait until they are on disk."""
+        submission = Submission(records, payload=payload, sync=sync)
+        with self._state_lock:
+            self._pending.append(submission)
+            self._ensure_thread()
+        self._queue.put(submission)
+        if sync:
+            submission.done.wait()
+            if submission.error is not None:
+                raise submission.error
+        return submission
+
+    def flush(self) -> None:
+        """Write everything queued so far and re-raise deferred write errors."""
+        try:
+            self.submit([], sync=True)
+        finally:
+            with self._state_lock:
+                errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def pending_payloads(self) -> List[Any]:
+        with self._state_lock:
+            return [submission.payload for submission in self._pending if submission.payload is not None]
+
+    def close(self) -> None:
+        with self._state_lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+        self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Fsync the data files and empty the journal."""
+        if self.journal is None:
+            return
+        with self.lock:
+            if self.journal.size() == 0:
+                return
+            for path in self.file_order:
+                if path.exists():
+                    with path.open("ab") as handle:
+                        os.fsync(handle.fileno())
+            self.journal.truncate()
+
+    def recover(self) -> int:
+        """Replay the journal into the data files; returns how many bundles were repaired.
+
+        Pieces already on disk are left alone, so replaying twice (or while
+        another process is writing) is harmless.
+        """
+        if self.journal is None:
+            return 0
+        paths = {path.name: path for path in self.file_order}
+        repaired = 0
+        with self.lock:
+            for writes in self.journal.read():
+                # Evaluate every piece: a bundle may be missing more than one.
+                if sum([self._replay(paths.get(write.file), write) for write in writes]):
+                    repaired += 1
+            self.checkpoint()
+        if repaired:
+            logger.warning(f"Recovered {repaired} partially written bundles from {self.journal.path}")
+        return repaired
+
+    @staticmethod
+    def _replay(path: Optional[Path], write: JournalWrite) -> bool:
+        if path is None or not path.exists():
+            logger.error(f"Journal refers to missing data file {write.file}")
+            return False
+        with path.open("r+b") as handle:
+            handle.seek(write.offset)
+            present = handle.read(len(write.data))
+            if present == write.data:
+                return False
+            size = handle.seek(0, os.SEEK_END)
+            if write.offset > size or write.offset + len(present) != size or not write.data.startswith(present):
+                logger.error(f"{path.name} does not match its journal at offset {write.offset}; not replayed")
+                return False
+            handle.write(write.data[len(present):])
+        return True
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="csv-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stop = self._fill(batch)
+            self._write(batch)
+            if stop:
+                return
+
+    def _fill(self, batch: List[Submission]) -> bool:
+        """Grow ``batch`` until the group is due; returns True when asked to stop."""
+        started = time.monotonic()
+        size = batch[0].size
+        while True:
+            policy = self.policy
+            # Waiting producers: take whatever is already queued, then write.
+            urgent = policy is None or any(submission.sync for submission in batch)
+            if not urgent and policy.is_due(self._bundle_count(batch), size, started):
+                return False
+            try:
+                if urgent:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=policy.remaining(started))
+            except queue.Empty:
+                if urgent:
+                    return False
+                continue
+            if item is _STOP:
+                return True
+            batch.append(item)
+            size += item.size
+
+    @staticmethod
+    def _bundle_count(batch: List[Submission]) -> int:
+        return sum(1 for submission in batch if submission.payload is not None)
+
+    def _write(self, batch: List[Submission]) -> None:
+        by_path: Dict[Path, List[Record]] = {}
+        for submission in batch:
+            for record in submission.records:
+                by_path.setdefault(record[0], []).append(record)
+
+        error: Optional[BaseException] = None
+        try:
+            if by_path:
+                with self.lock:
+                    offsets = {path: path.stat().st_size if path.exists() else 0 for path in by_path}
+                    appended = []
+                    bundles = []
+                    for submission in batch:
+                        starts: Dict[Path, int] = {}
+                        pieces: Dict[Path, List[bytes]] = {}
+                        for path, index, data, row in submission.records:
+                            starts.setdefault(path, offsets[path])
+                            pieces.setdefault(path, []).append(data)
+                            appended.append((index, offsets[path], len(data), row))
+                            offsets[path] += len(data)
+                        if pieces:
+                            bundles.append([
+                                JournalWrite(path.name, starts[path], b"".join(pieces[path]))
+                                for path in sorted(pieces, key=self._rank)
+                            ])
+                    if self.journal is not None:
+                        self.journal.append(bundles)
+                    self._append_files(by_path)
+                    for index, offset, length, row in appended:
+                        index.add(offset, length, row)
+                    if self.journal is not None and self.journal.size() >= self.checkpoint_bytes:
+                        self.checkpoint()
+        except BaseException as exc:
+            logger.error(f"CSV group commit failed: {exc}")
+            error = exc
+
+        with self._state_lock:
+            for submission in batch:
+                self._pending.remove(submission)
+                submission.error = error
+                if error is not None and not submission.sync:
+                    self._errors.append(error)
+        for submission in batch:
+            submission.done.set()
+
+    def _append_files(self, by_path: Dict[Path, List[Record]]) -> None:
+        for path in sorted(by_path, key=self._rank):
+            with path.open("ab") as handle:
+                handle.write(b"".join(data for _, _, data, _ in by_path[path]))
+                handle.flush()
+                if self.journal is None:
+                    os.fsync(handle.fileno())
+
+    def _rank(self, path: Path) -> int:
+        return self.file_order.index(path) if path in self.file_order else len(self.file_order)
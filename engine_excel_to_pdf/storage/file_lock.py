@@ -0,0 +1,73 @@
+"""Advisory inter-process file lock (``flock`` on POSIX, ``msvcrt`` on Windows)."""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import IO, Optional
+
+
+class FileLock:
+    """Exclusive lock held on ``path`` for the duration of a ``with`` block.
+
+    Re-entrant within a thread of the same process; other processes using a
+    ``FileLock`` on the same path block until it is released. The lock is
+    advisory: writers that do not take it are not stopped.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._handle: Optional[IO[bytes]] = None
+        self._depth = 0
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._handle = self._acquire()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._handle is not None:
+            self._release(self._handle)
+            self._handle = None
+        self._thread_lock.release()
+
+    def _acquire(self) -> IO[bytes]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = self.path.open("a+b")
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            handle.close()
+            raise
+        return handle
+
+    @staticmethod
+    def _release(handle: IO[bytes]) -> None:
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
@@ -0,0 +1,192 @@
+"""Persistent duplicate-detection index.
+
+Maps a certificate's identity — CNPJ digits, ``numero_certificado`` and
+``data_execucao`` — to the stored certificado id together with a digest of its
+content, and the SHA-256 of each uploaded spreadsheet to the certificados it
+produced. Both live in one append-only file next to the data and are loaded
+into dictionaries once, so "was this already stored?" is a dict lookup.
+
+A same-identity bundle whose content differs (a corrected re-issue) is not a
+duplicate: the digest must match too.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..models import Certificado, CertificadoBundle
+from ..utils import cnpj_digits
+from .file_lock import FileLock
+
+_HEADER = ["tipo", "chave", "id_certificado", "digest"]
+_IDENTITY = "identidade"
+_FILE = "arquivo"
+
+
+def identity_key(certificado: Certificado) -> str:
+    return "|".join(
+        (cnpj_digits(certificado.cnpj), certificado.numero_certificado, certificado.data_execucao.isoformat())
+    )
+
+
+def content_digest(bundle: CertificadoBundle) -> str:
+    """Hash of everything printed on the certificate (not id, origin or timestamp)."""
+    certificado = bundle.certificado
+    payload = {
+        "numero_certificado": certificado.numero_certificado,
+        "numero_licenca": certificado.numero_licenca,
+        "razao_social": certificado.razao_social,
+        "nome_fantasia": certificado.nome_fantasia,
+        "cnpj": cnpj_digits(certificado.cnpj),
+        "endereco_completo": certificado.endereco_completo,
+        "data_execucao": certificado.data_execucao.isoformat(),
+        "data_validade": certificado.data_validade.isoformat(),
+        "pragas_tratadas": certificado.pragas_tratadas,
+        "valor": certificado.valor or "",
+        "bairro": certificado.bairro or "",
+        "cidade": certificado.cidade or "",
+        "produtos": [produto.to_dict() for produto in bundle.produtos],
+        "metodos": [metodo.to_dict() for metodo in bundle.metodos],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class IdentityIndex:
+    """Identity and file-hash lookups backed by ``path``.
+
+    ``source`` yields every stored bundle; it is only used to build the file
+    the first time (existing data from before the index) or on :meth:`rebuild`.
+    Lines appended by other processes are picked up on the next lookup.
+    """
+
+    def __init__(self, path: Path, source: Callable[[], Iterable[CertificadoBundle]]) -> None:
+        self.path = Path(path)
+        self._source = source
+        self._identities: Dict[str, List[Tuple[str, str]]] = {}
+        self._files: Dict[str, List[str]] = {}
+        self._covered = 0
+        self._loaded = False
+        self._lock = threading.RLock()
+        # Appends from several processes are serialized on a sibling lock file.
+        self._file_lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+
+    def find(self, bundle: CertificadoBundle) -> Optional[str]:
+        """Id of a stored certificado with the same identity and content."""
+        key = identity_key(bundle.certificado)
+        digest = content_digest(bundle)
+        with self._lock:
+            self._refresh()
+            for certificado_id, stored_digest in reversed(self._identities.get(key, ())):
+                if stored_digest == digest:
+                    return certificado_id
+        return None
+
+    def ids_for_identity(self, certificado: Certificado) -> List[str]:
+        """Every stored certificado id with this identity, oldest first."""
+        with self._lock:
+            self._refresh()
+            return [certificado_id for certificado_id, _ in self._identities.get(identity_key(certificado), ())]
+
+    def ids_for_file(self, file_hash: str) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return list(self._files.get(file_hash, ()))
+
+    def add(self, bundle: CertificadoBundle) -> None:
+        certificado = bundle.certificado
+        line = [_IDENTITY, identity_key(certificado), certificado.id, content_digest(bundle)]
+        with self._lock:
+            self._refresh()
+            self._append([line])
+
+    def add_file(self, file_hash: str, certificado_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._refresh()
+            known = set(self._files.get(file_hash, ()))
+            lines = [[_FILE, file_hash, certificado_id, ""]
+                     for certificado_id in dict.fromkeys(certificado_ids) if certificado_id not in known]
+            if lines:
+                self._append(lines)
+
+    def rebuild(self) -> None:
+        """Recreate the identity entries from the stored data.
+
+        File hashes cannot be recomputed (the uploads are gone) and are kept.
+        """
+        with self._lock, self._file_lock:
+            self._catch_up()
+            files = [[_FILE, file_hash, certificado_id, ""]
+                     for file_hash, ids in self._files.items() for certificado_id in ids]
+            identities = [
+                [_IDENTITY, identity_key(bundle.certificado), bundle.certificado.id, content_digest(bundle)]
+                for bundle in self._source()
+            ]
+            self._reset()
+            with self.path.open("wb") as handle:
+                handle.write(_encode([_HEADER, *identities, *files]))
+                self._covered = handle.tell()
+            for line in identities + files:
+                self._register(line)
+
+    def _refresh(self) -> None:
+        if not self._loaded:
+            self._loaded = True
+            if not self.path.exists() or self.path.stat().st_size == 0:
+                self.rebuild()
+                return
+        self._catch_up()
+
+    def _catch_up(self) -> None:
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size < self._covered:
+            self._reset()
+        if size > self._covered:
+            self._read_from(self._covered)
+
+    def _reset(self) -> None:
+        self._identities = {}
+        self._files = {}
+        self._covered = 0
+
+    def _read_from(self, offset: int) -> None:
+        with self.path.open("rb") as handle:
+            handle.seek(offset)
+            data = handle.read()
+        # Ignore a line still being written by another process.
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in csv.reader(io.StringIO(complete.decode("utf-8"), newline="")):
+            if line != _HEADER:
+                self._register(line)
+        self._covered = offset + len(complete)
+
+    def _register(self, line: List[str]) -> None:
+        if len(line) != len(_HEADER):
+            return
+        kind, key, certificado_id, digest = line
+        if kind == _IDENTITY:
+            self._identities.setdefault(key, []).append((certificado_id, digest))
+        elif kind == _FILE:
+            self._files.setdefault(key, []).append(certificado_id)
+
+    def _append(self, lines: List[List[str]]) -> None:
+        with self._file_lock:
+            self._catch_up()
+            with self.path.open("ab") as handle:
+                if handle.tell() == 0:
+                    handle.write(_encode([_HEADER]))
+                handle.write(_encode(lines))
+                self._covered = handle.tell()
+        for line in lines:
+            self._register(line)
+
+
+def _encode(lines: List[List[str]]) -> bytes:
+    buffer = io.StringIO(newline="")
+    csv.writer(buffer).writerows(lines)
+    return buffer.getvalue().encode("utf-8")
@@ -0,0 +1,85 @@
+"""Write-ahead journal for the CSV data files.
+
+Before :class:`~.csv_writer.CsvWriter` touches the CSVs it appends one frame
+per bundle to the journal and fsyncs it once for the whole group. A frame holds
+every piece of the bundle (produtos, metodos and certificado rows) together
+with the offset each piece goes to, and is checksummed, so after a crash a
+frame is either complete or ignored. Replaying the journal finishes any bundle
+whose CSV writes were cut short; once the CSVs are fsynced the journal is
+truncated (a checkpoint).
+
+Frame layout: ``uint32 length | uint32 crc32 | JSON payload`` (little endian).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct("<II")
+
+
+@dataclass(frozen=True, slots=True)
+class JournalWrite:
+    """``data`` appended to the data file named ``file`` at ``offset``."""
+
+    file: str
+    offset: int
+    data: bytes
+
+
+class Journal:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+
+    def size(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def append(self, bundles: List[List[JournalWrite]]) -> None:
+        """Durably record one frame per bundle (a single write and fsync)."""
+        frames = []
+        for writes in bundles:
+            payload = json.dumps(
+                [[write.file, write.offset, write.data.decode("utf-8")] for write in writes],
+                ensure_ascii=False,
+            ).encode("utf-8")
+            frames.append(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+        with self.path.open("ab") as handle:
+            handle.write(b"".join(frames))
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def read(self) -> List[List[JournalWrite]]:
+        """Every complete frame, in order; a torn or corrupt tail ends the read."""
+        if not self.path.exists():
+            return []
+        data = self.path.read_bytes()
+        bundles: List[List[JournalWrite]] = []
+        position = 0
+        while position + _FRAME.size <= len(data):
+            length, checksum = _FRAME.unpack_from(data, position)
+            payload = data[position + _FRAME.size:position + _FRAME.size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            bundles.append(
+                [JournalWrite(name, offset, text.encode("utf-8")) for name, offset, text in json.loads(payload)]
+            )
+            position += _FRAME.size + length
+        if position < len(data):
+            logger.warning(f"Ignoring {len(data) - position} bytes of incomplete journal data in {self.path}")
+        return bundles
+
+    def truncate(self) -> None:
+        if not self.path.exists():
+            return
+        with self.path.open("r+b") as handle:
+            handle.truncate(0)
+            handle.flush()
+            os.fsync(handle.fileno())
@@ -0,0 +1,66 @@
+"""Flat rows of a bundle, shared by the CSV and SQLite backends.
+
+Each row is a ``dict`` keyed by the CSV headers (which are also the SQLite
+column names), with every value already rendered as stored text.
+"""
+from __future__ import annotations
+
+from typing import List, Tuple
+
+from ..models import Certificado, CertificadoBundle, MetodoAplicacao, ProdutoQuimico
+
+
+def certificado_row(certificado: Certificado) -> dict:
+    return {
+        "id": certificado.id,
+        "numero_certificado": certificado.numero_certificado,
+        "numero_licenca": certificado.numero_licenca,
+        "razao_social": certificado.razao_social,
+        "nome_fantasia": certificado.nome_fantasia,
+        "cnpj": certificado.cnpj,
+        "endereco_completo": certificado.endereco_completo,
+        "data_execucao": certificado.data_execucao.isoformat(),
+        "data_validade": certificado.data_validade.isoformat(),
+        "pragas_tratadas": certificado.pragas_tratadas,
+        "arquivo_origem": certificado.arquivo_origem,
+        "data_cadastro": certificado.data_cadastro.isoformat(),
+        "valor": certificado.valor or "",
+        "bairro": certificado.bairro or "",
+        "cidade": certificado.cidade or "",
+    }
+
+
+def produto_row(item_id: str, cert_id: str, cert_numero: str, produto: ProdutoQuimico) -> dict:
+    return {
+        "id": item_id,
+        "id_certificado": cert_id,
+        "numero_certificado": cert_numero,
+        "nome_produto": produto.nome_produto,
+        "classe_quimica": produto.classe_quimica,
+        "concentracao": "" if produto.concentracao is None else str(produto.concentracao),
+    }
+
+
+def metodo_row(item_id: str, cert_id: str, cert_numero: str, metodo: MetodoAplicacao) -> dict:
+    return {
+        "id": item_id,
+        "id_certificado": cert_id,
+        "numero_certificado": cert_numero,
+        "metodo": metodo.metodo,
+        "quantidade": metodo.quantidade,
+    }
+
+
+def bundle_rows(bundle: CertificadoBundle) -> Tuple[dict, List[dict], List[dict]]:
+    """Certificado, produto and metodo rows of a bundle whose certificado already has an id."""
+    certificado_id = bundle.certificado.id
+    numero = bundle.certificado.numero_certificado
+    produtos = [
+        produto_row(f"{certificado_id}-P{idx:03d}", certificado_id, numero, produto)
+        for idx, produto in enumerate(bundle.produtos, start=1)
+    ]
+    metodos = [
+        metodo_row(f"{certificado_id}-M{idx:03d}", certificado_id, numero, metodo)
+        for idx, metodo in enumerate(bundle.metodos, start=1)
+    ]
+    return certificado_row(bundle.certificado), produtos, metodos
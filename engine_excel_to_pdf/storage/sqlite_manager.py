@@ -0,0 +1,401 @@
+"""SQLite persistence with the same interface as :class:`CsvManager`.
+
+Certificados, produtos and metodos live in indexed tables of a single WAL-mode
+database, so lookups stay fast no matter how much history is stored. Existing
+CSV data can be moved over once with :meth:`SqliteManager.import_from_csv`.
+"""
+from __future__ import annotations
+
+import csv
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+from ..config_defaults import DATA_DIR
+from ..constants import (
+    CSV_ARCHIVE_DIR,
+    CSV_CERTIFICATES,
+    CSV_METHODS,
+    CSV_PRODUCTS,
+    IDENTITY_INDEX,
+    SQLITE_DATABASE,
+)
+from ..models import Certificado, CertificadoBundle, MetodoAplicacao, ProdutoQuimico
+from ..utils import cnpj_variants
+from .columnar import ColumnarArchive
+from .csv_manager import CERTIFICADOS_HEADERS, METODOS_HEADERS, PRODUTOS_HEADERS
+from .csv_writer import DEFAULT_GROUP_BUNDLES, DEFAULT_GROUP_BYTES, DEFAULT_GROUP_DELAY
+from .identity import IdentityIndex
+from .rows import bundle_rows
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS certificados (
+    id TEXT PRIMARY KEY,
+    numero_certificado TEXT NOT NULL,
+    numero_licenca TEXT NOT NULL,
+    razao_social TEXT NOT NULL,
+    nome_fantasia TEXT NOT NULL,
+    cnpj TEXT NOT NULL,
+    endereco_completo TEXT NOT NULL,
+    data_execucao TEXT NOT NULL,
+    data_validade TEXT NOT NULL,
+    pragas_tratadas TEXT NOT NULL,
+    arquivo_origem TEXT NOT NULL,
+    data_cadastro TEXT NOT NULL,
+    valor TEXT,
+    bairro TEXT,
+    cidade TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_certificados_numero ON certificados (numero_certificado);
+CREATE INDEX IF NOT EXISTS idx_certificados_arquivo ON certificados (arquivo_origem);
+CREATE INDEX IF NOT EXISTS idx_certificados_cnpj ON certificados (cnpj);
+CREATE INDEX IF NOT EXISTS idx_certificados_validade ON certificados (data_validade);
+
+CREATE TABLE IF NOT EXISTS produtos (
+    id TEXT PRIMARY KEY,
+    id_certificado TEXT NOT NULL,
+    numero_certificado TEXT NOT NULL,
+    nome_produto TEXT NOT NULL,
+    classe_quimica TEXT NOT NULL,
+    concentracao REAL
+);
+CREATE INDEX IF NOT EXISTS idx_produtos_certificado ON produtos (id_certificado);
+
+CREATE TABLE IF NOT EXISTS metodos (
+    id TEXT PRIMARY KEY,
+    id_certificado TEXT NOT NULL,
+    numero_certificado TEXT NOT NULL,
+    metodo TEXT NOT NULL,
+    quantidade TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metodos_certificado ON metodos (id_certificado);
+"""
+
+_IMPORT_BATCH_SIZE = 10_000
+# Stays under SQLITE_MAX_VARIABLE_NUMBER on old builds (999).
+_QUERY_BATCH_SIZE = 500
+
+T = TypeVar("T")
+
+
+def _placeholders(values: Sequence[object]) -> str:
+    return ", ".join("?" for _ in values)
+
+
+def _insert_sql(table: str, columns: Sequence[str]) -> str:
+    return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({_placeholders(columns)})"
+
+
+def _fold(value: Optional[str]) -> Optional[str]:
+    # SQLite's lower() only folds ASCII; cidade names carry accents.
+    return value.strip().casefold() if value else value
+
+
+_INSERT_CERTIFICADO = _insert_sql("certificados", CERTIFICADOS_HEADERS)
+_INSERT_PRODUTO = _insert_sql("produtos", PRODUTOS_HEADERS)
+_INSERT_METODO = _insert_sql("metodos", METODOS_HEADERS)
+
+
+class SqliteManager:
+    def __init__(self, data_dir: Path = DATA_DIR, database_name: str = SQLITE_DATABASE):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.database_path = self.data_dir / database_name
+        self._local = threading.local()
+        with self._transaction() as connection:
+            connection.executescript(_SCHEMA)
+        self.identities = IdentityIndex(self.data_dir / IDENTITY_INDEX, source=self.iter_bundles)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.database_path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.create_function("fold", 1, _fold, deterministic=True)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection()
+        with connection:
+            yield connection
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def append_bundle(self, bundle: CertificadoBundle, skip_if_exists: bool = True) -> Certificado:
+        if skip_if_exists:
+            existing = self.find_duplicate(bundle)
+            if existing:
+                return existing.certificado
+            existing = self.get_bundle_by_arquivo(bundle.certificado.arquivo_origem)
+            if existing and existing.certificado.id == bundle.certificado.id:
+                return existing.certificado
+
+        if bundle.certificado.id is None:
+            bundle.certificado.id = bundle.certificado._generate_id()
+
+        cert_row, produto_rows, metodo_rows = bundle_rows(bundle)
+
+        with self._transaction() as connection:
+            connection.execute(_INSERT_CERTIFICADO, self._values(cert_row, CERTIFICADOS_HEADERS))
+            connection.executemany(
+                _INSERT_PRODUTO, [self._values(row, PRODUTOS_HEADERS) for row in produto_rows]
+            )
+            connection.executemany(
+                _INSERT_METODO, [self._values(row, METODOS_HEADERS) for row in metodo_rows]
+            )
+        self.identities.add(bundle)
+
+        return bundle.certificado
+
+    def find_duplicate(self, bundle: CertificadoBundle) -> Optional[CertificadoBundle]:
+        """Same as :meth:`CsvManager.find_duplicate`."""
+        certificado_id = self.identities.find(bundle)
+        return self.get_bundle_by_id(certificado_id) if certificado_id else None
+
+    def get_bundles_by_file_hash(self, file_hash: str) -> List[CertificadoBundle]:
+        bundles = (self.get_bundle_by_id(certificado_id) for certificado_id in self.identities.ids_for_file(file_hash))
+        return [bundle for bundle in bundles if bundle]
+
+    def record_file_hash(self, file_hash: str, certificado_ids: Iterable[str]) -> None:
+        self.identities.add_file(file_hash, certificado_ids)
+
+    @contextmanager
+    def buffered(
+        self,
+        max_bundles: int = DEFAULT_GROUP_BUNDLES,
+        max_bytes: int = DEFAULT_GROUP_BYTES,
+        max_delay: Optional[float] = DEFAULT_GROUP_DELAY,
+    ) -> Iterator["SqliteManager"]:
+        """Interface parity with :meth:`CsvManager.buffered`.
+
+        The group-commit policy is ignored: every append is committed in its
+        own transaction, and WAL mode already keeps each commit cheap.
+        """
+        yield self
+
+    def flush(self) -> None:
+        """Nothing to flush: appends are committed immediately."""
+
+    def get_bundle_by_numero(self, numero_certificado: str) -> Optional[CertificadoBundle]:
+        return self._load_bundle("numero_certificado", numero_certificado)
+
+    def get_bundle_by_arquivo(self, arquivo_origem: str) -> Optional[CertificadoBundle]:
+        return self._load_bundle("arquivo_origem", arquivo_origem)
+
+    def get_bundle_by_id(self, certificado_id: str) -> Optional[CertificadoBundle]:
+        return self._load_bundle("id", certificado_id)
+
+    def get_bundles(self, numeros: Iterable[str]) -> Dict[str, CertificadoBundle]:
+        """Bundles for many numeros with three queries per batch, keyed by numero."""
+        connection = self._connection()
+        wanted = list(dict.fromkeys(numeros))
+        certificados: Dict[str, Certificado] = {}
+        for start in range(0, len(wanted), _QUERY_BATCH_SIZE):
+            batch = wanted[start:start + _QUERY_BATCH_SIZE]
+            rows = connection.execute(
+                f"SELECT * FROM certificados WHERE numero_certificado IN ({_placeholders(batch)}) ORDER BY rowid",
+                batch,
+            )
+            for row in rows:
+                certificados.setdefault(row["numero_certificado"], self._row_to_certificado(row))
+
+        ids = [certificado.id for certificado in certificados.values()]
+        produtos = self._group_items(connection, "produtos", ids, self._row_to_produto)
+        metodos = self._group_items(connection, "metodos", ids, self._row_to_metodo)
+        return {
+            numero: CertificadoBundle(
+                certificado=certificado,
+                produtos=produtos.get(certificado.id, []),
+                metodos=metodos.get(certificado.id, []),
+            )
+            for numero, certificado in certificados.items()
+        }
+
+    @staticmethod
+    def _group_items(
+        connection: sqlite3.Connection, table: str, ids: List[str], map_fn: Callable[[sqlite3.Row], T]
+    ) -> Dict[str, List[T]]:
+        grouped: Dict[str, List[T]] = {}
+        for start in range(0, len(ids), _QUERY_BATCH_SIZE):
+            batch = ids[start:start + _QUERY_BATCH_SIZE]
+            rows = connection.execute(
+                f"SELECT * FROM {table} WHERE id_certificado IN ({_placeholders(batch)}) ORDER BY rowid",
+                batch,
+            )
+            for row in rows:
+                grouped.setdefault(row["id_certificado"], []).append(map_fn(row))
+        return grouped
+
+    def iter_bundles(self) -> Iterator[CertificadoBundle]:
+        """Same as :meth:`CsvManager.iter_bundles`, in batches of ``_QUERY_BATCH_SIZE``."""
+        connection = self._connection()
+        certificados = self.iter_certificados()
+        while chunk := list(islice(certificados, _QUERY_BATCH_SIZE)):
+            ids = [certificado.id for certificado in chunk]
+            produtos = self._group_items(connection, "produtos", ids, self._row_to_produto)
+            metodos = self._group_items(connection, "metodos", ids, self._row_to_metodo)
+            for certificado in chunk:
+                yield CertificadoBundle(
+                    certificado=certificado,
+                    produtos=produtos.get(certificado.id, []),
+                    metodos=metodos.get(certificado.id, []),
+                )
+
+    def list_certificados(self) -> List[Certificado]:
+        return list(self.iter_certificados())
+
+    def iter_certificados(
+        self,
+        cnpj: Optional[str] = None,
+        validade_inicio: Optional[date] = None,
+        validade_fim: Optional[date] = None,
+        cidade: Optional[str] = None,
+        arquivo_origem: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Iterator[Certificado]:
+        """Same filters and ordering as :meth:`CsvManager.iter_certificados`."""
+        clauses: List[str] = []
+        params: List[object] = []
+        if cnpj is not None:
+            variants = cnpj_variants(cnpj)
+            clauses.append(f"cnpj IN ({_placeholders(variants)})")
+            params.extend(variants)
+        if validade_inicio is not None:
+            clauses.append("data_validade >= ?")
+            params.append(validade_inicio.isoformat())
+        if validade_fim is not None:
+            clauses.append("data_validade <= ?")
+            params.append(validade_fim.isoformat())
+        if cidade is not None:
+            clauses.append("fold(cidade) = ?")
+            params.append(_fold(cidade))
+        if arquivo_origem is not None:
+            clauses.append("arquivo_origem = ?")
+            params.append(arquivo_origem)
+
+        sql = "SELECT * FROM certificados"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY rowid LIMIT ? OFFSET ?"
+        params.extend((-1 if limit is None else limit, offset))
+
+        for row in self._connection().execute(sql, params):
+            yield self._row_to_certificado(row)
+
+    def import_from_csv(self, csv_dir: Optional[Path] = None) -> int:
+        """Copy the CSV data files into the database; returns the certificados imported.
+
+        Rows whose id is already stored are skipped, so re-running is harmless.
+        """
+        csv_dir = Path(csv_dir) if csv_dir else self.data_dir
+        sources = (
+            (csv_dir / CSV_CERTIFICATES, _INSERT_CERTIFICADO, CERTIFICADOS_HEADERS),
+            (csv_dir / CSV_PRODUCTS, _INSERT_PRODUTO, PRODUTOS_HEADERS),
+            (csv_dir / CSV_METHODS, _INSERT_METODO, METODOS_HEADERS),
+        )
+        with self._transaction() as connection:
+            before = self._count_certificados(connection)
+            # Periods compacted by CsvManager.compact are older than the live CSV.
+            archived = ColumnarArchive(csv_dir / CSV_ARCHIVE_DIR).iter_rows()
+            self._insert_batches(connection, _INSERT_CERTIFICADO, CERTIFICADOS_HEADERS, archived)
+            for path, sql, headers in sources:
+                if not path.exists():
+                    continue
+                with path.open("r", newline="", encoding="utf-8") as handle:
+                    self._insert_batches(connection, sql, headers, csv.DictReader(handle))
+            imported = self._count_certificados(connection) - before
+        if imported:
+            self.identities.rebuild()
+        return imported
+
+    def _insert_batches(
+        self, connection: sqlite3.Connection, sql: str, headers: Sequence[str], rows: Iterable[Dict[str, str]]
+    ) -> None:
+        batch = []
+        for row in rows:
+            batch.append(self._values(row, headers))
+            if len(batch) >= _IMPORT_BATCH_SIZE:
+                connection.executemany(sql, batch)
+                batch = []
+        connection.executemany(sql, batch)
+
+    @staticmethod
+    def _count_certificados(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT COUNT(*) FROM certificados").fetchone()[0]
+
+    @staticmethod
+    def _values(row: Dict[str, object], headers: Sequence[str]) -> tuple:
+        values = []
+        for column in headers:
+            value = row.get(column)
+            if value == "" and column in ("valor", "bairro", "cidade", "concentracao"):
+                value = None
+            values.append(value)
+        return tuple(values)
+
+    def _load_bundle(self, column: str, value: str) -> Optional[CertificadoBundle]:
+        connection = self._connection()
+        row = connection.execute(
+            f"SELECT * FROM certificados WHERE {column} = ? ORDER BY rowid LIMIT 1", (value,)
+        ).fetchone()
+        if row is None:
+            return None
+        certificado = self._row_to_certificado(row)
+        produtos = [
+            self._row_to_produto(item)
+            for item in connection.execute(
+                "SELECT * FROM produtos WHERE id_certificado = ? ORDER BY rowid", (certificado.id,)
+            )
+        ]
+        metodos = [
+            self._row_to_metodo(item)
+            for item in connection.execute(
+                "SELECT * FROM metodos WHERE id_certificado = ? ORDER BY rowid", (certificado.id,)
+            )
+        ]
+        return CertificadoBundle(certificado=certificado, produtos=produtos, metodos=metodos)
+
+    @staticmethod
+    def _row_to_produto(row: sqlite3.Row) -> ProdutoQuimico:
+        return ProdutoQuimico(
+            nome_produto=row["nome_produto"],
+            classe_quimica=row["classe_quimica"],
+            concentracao=row["concentracao"],
+        )
+
+    @staticmethod
+    def _row_to_metodo(row: sqlite3.Row) -> MetodoAplicacao:
+        return MetodoAplicacao(metodo=row["metodo"], quantidade=row["quantidade"])
+
+    @staticmethod
+    def _row_to_certificado(row: sqlite3.Row) -> Certificado:
+        return Certificado(
+            id=row["id"],
+            numero_certificado=row["numero_certificado"],
+            numero_licenca=row["numero_licenca"],
+            razao_social=row["razao_social"],
+            nome_fantasia=row["nome_fantasia"],
+            cnpj=row["cnpj"],
+            endereco_completo=row["endereco_completo"],
+            data_execucao=date.fromisoformat(row["data_execucao"]),
+            data_validade=date.fromisoformat(row["data_validade"]),
+            pragas_tratadas=row["pragas_tratadas"],
+            arquivo_origem=row["arquivo_origem"],
+            data_cadastro=datetime.fromisoformat(row["data_cadastro"]),
+            valor=row["valor"] or None,
+            bairro=row["bairro"] or None,
+            cidade=row["cidade"] or None,
+        )
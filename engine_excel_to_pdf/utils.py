@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import hashlib
 import re
 from datetime import date, datetime
+from functools import lru_cache
 import secrets
 from pathlib import Path
 from typing import Iterable, Optional, TYPE_CHECKING
@@ -26,6 +28,13 @@ _PT_BR_MONTHS = {
     "DEZEMBRO": "December",
 }
 
+_FILE_CHUNK_SIZE = 1024 * 1024
+
+_PT_BR_MONTH_NUMBERS = {month: number for number, month in enumerate(_PT_BR_MONTHS, start=1)}
+_LONG_DATE_RE = re.compile(r"(\d{1,2}) (?:DE )?([A-ZÇ]+) (?:DE )?(\d{4})")
+_NUMERIC_DATE_RE = re.compile(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})")
+_ISO_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?")
+
 _CNPJ_RE = re.compile(r"(\d{2})\.?\d{3}\.\d{3}/\d{4}-\d{2}")
 _NON_DIGIT_RE = re.compile(r"\D")
 
@@ -95,8 +104,64 @@ def format_cnpj(digits: str) -> str:
     return f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}/{digits[8:12]}-{digits[12:]}"
 
 
-def parse_pt_br_date(value: str) -> date:
+def cnpj_variants(cnpj: str) -> tuple[str, ...]:
+    """Spellings a stored CNPJ may have: as given, digits only and formatted."""
+    digits = cnpj_digits(cnpj)
+    variants = [cnpj, digits]
+    if len(digits) == 14:
+        variants.append(format_cnpj(digits))
+    return tuple(dict.fromkeys(variants))
+
+
+def cnpj_digits(cnpj: str) -> str:
+    return _NON_DIGIT_RE.sub("", cnpj or "")
+
+
+def same_cnpj(stored: str, cnpj: str) -> bool:
+    return cnpj_digits(stored) == cnpj_digits(cnpj)
+
+
+def parse_pt_br_date(value: str | date) -> date:
+    """Parse "15 DE JANEIRO DE 2024", "15/01/2024", ISO strings or date cells.
+
+    Known formats are matched by regex and memoized; anything else goes
+    through dateutil with ``dayfirst=True``.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return _parse_pt_br_date_text(value)
+
+
+@lru_cache(maxsize=1024)
+def _parse_pt_br_date_text(value: str) -> date:
     normalized = normalize_whitespace(value).upper()
+
+    # Fast paths; a match that is not a valid date (e.g. "01/13/2024") is
+    # left to dateutil, which may still read it another way.
+    match = _LONG_DATE_RE.fullmatch(normalized)
+    if match and match.group(2) in _PT_BR_MONTH_NUMBERS:
+        day, month, year = match.groups()
+        try:
+            return date(int(year), _PT_BR_MONTH_NUMBERS[month], int(day))
+        except ValueError:
+            pass
+    match = _NUMERIC_DATE_RE.fullmatch(normalized)
+    if match:
+        day, month, year = match.groups()
+        try:
+            return date(int(year), int(month), int(day))
+        except ValueError:
+            pass
+    match = _ISO_DATE_RE.fullmatch(normalized)
+    if match:
+        year, month, day = match.groups()
+        try:
+            return date(int(year), int(month), int(day))
+        except ValueError:
+            pass
+
     for pt_month, en_month in _PT_BR_MONTHS.items():
         if pt_month in normalized:
             normalized = normalized.replace(pt_month, en_month)
@@ -162,6 +227,14 @@ def generate_unique_filename(certificado: "Certificado", extensao: str = "") ->
     return f"{prefix}-{nome_fantasia}_{cnpj_short}_{numero_cert}_{timestamp}{suffix}{extensao}"
 
 
+def file_sha256(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(file_path).open("rb") as source:
+        for chunk in iter(lambda: source.read(_FILE_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def ensure_path(path_like) -> Path:
     """
     Convert path-like object to Path and ensure parent directories exist.
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import copy
 import shutil
 import tempfile
 from datetime import date, datetime
+from functools import partial
 from pathlib import Path
-from typing import Generator
+from typing import Any, Callable, Generator, Optional
 
 import pytest
 from openpyxl import Workbook
@@ -85,6 +87,40 @@ def sample_bundle(
     )
 
 
+def copy_bundle(
+    bundle: CertificadoBundle,
+    numero: Optional[str] = None,
+    *,
+    produtos: Optional[list[ProdutoQuimico]] = None,
+    metodos: Optional[list[MetodoAplicacao]] = None,
+    **fields: Any,
+) -> CertificadoBundle:
+    """Deep copy of ``bundle`` that storage treats as a new certificado.
+
+    ``numero`` sets numero_certificado and ``arquivo_origem`` (``<numero>.xlsx``);
+    other keyword arguments set certificado fields. ``id`` is always cleared.
+    """
+    copied = copy.deepcopy(bundle)
+    certificado = copied.certificado
+    if numero is not None:
+        certificado.numero_certificado = numero
+        certificado.arquivo_origem = f"{numero}.xlsx"
+    for name, value in fields.items():
+        setattr(certificado, name, value)
+    certificado.id = None
+    if produtos is not None:
+        copied.produtos = produtos
+    if metodos is not None:
+        copied.metodos = metodos
+    return copied
+
+
+@pytest.fixture
+def make_bundle(sample_bundle: CertificadoBundle) -> Callable[..., CertificadoBundle]:
+    """:func:`copy_bundle` bound to ``sample_bundle``; picklable for worker processes."""
+    return partial(copy_bundle, sample_bundle)
+
+
 @pytest.fixture
 def sample_excel_file(temp_dir: Path) -> Path:
     wb = Workbook()
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
 from pathlib import Path
 
 import pytest
 from openpyxl import Workbook
 
-from engine_excel_to_pdf.batch_processor import BatchProcessor
+from engine_excel_to_pdf.batch_processor import BatchProcessor, ProcessingResult
 
 
 class TestBatchProcessor:
@@ -55,3 +56,41 @@ class TestBatchProcessor:
         
         with pytest.raises(FileNotFoundError):
             processor.processar_pasta(temp_dir / "inexistente")
+
+    def test_processar_pasta_grava_planilha_uma_vez(self, temp_dir, sample_excel_file, engine_config, assets_dir, monkeypatch):
+        engine_config.assets_dir = assets_dir
+        from engine_excel_to_pdf.generators.spreadsheet_generator import SpreadsheetGenerator
+        from engine_excel_to_pdf.interface import MotorCertificados
+        from openpyxl import load_workbook
+        motor = MotorCertificados(config=engine_config)
+        gravacoes = []
+        original = SpreadsheetGenerator._write_workbook
+        monkeypatch.setattr(
+            SpreadsheetGenerator, "_write_workbook", lambda self, *args: gravacoes.append(1) or original(self, *args)
+        )
+
+        processor = BatchProcessor(motor=motor, max_workers=2)
+
+        pasta_entrada = temp_dir / "entrada"
+        pasta_entrada.mkdir()
+        for numero in range(3):
+            wb = load_workbook(sample_excel_file)
+            wb.active["C10"] = f"CERT-2024-00{numero}"
+            wb.save(pasta_entrada / f"cert{numero}.xlsx")
+
+        resultado = processor.processar_pasta(pasta_entrada)
+
+        assert len(resultado["sucessos"]) == 3
+        assert gravacoes == [1]
+        assert {r.planilha_path for r in resultado["sucessos"]} == {motor.spreadsheet_generator.consolidated_path}
+        assert load_workbook(motor.spreadsheet_generator.consolidated_path)["certificado"].max_row == 4
+
+    def test_planilha_com_erro_nao_conta_como_sucesso(self, temp_dir):
+        pendente = Future()
+        pendente.set_exception(OSError("disco cheio"))
+        resultado = ProcessingResult(arquivo=temp_dir / "cert.xlsx", sucesso=True, planilha_pendente=pendente)
+
+        BatchProcessor._conferir_planilha(resultado)
+
+        assert not resultado.sucesso
+        assert resultado.erro == "Planilha: disco cheio"
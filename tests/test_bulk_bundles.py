@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+
+from engine_excel_to_pdf.models import ProdutoQuimico
+from engine_excel_to_pdf.storage.csv_index import CsvIndex
+from engine_excel_to_pdf.storage.csv_manager import CsvManager
+from engine_excel_to_pdf.storage.sqlite_manager import SqliteManager
+
+
+def make_produtos(numero: str, count: int = 2) -> list[ProdutoQuimico]:
+    return [
+        ProdutoQuimico(nome_produto=f"{numero}-produto-{i}", classe_quimica="Piretroide", concentracao=1.0)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("backend", [CsvManager, SqliteManager], ids=["csv", "sqlite"])
+def test_get_bundles_matches_single_lookups(backend, temp_dir, sample_bundle, make_bundle):
+    manager = backend(data_dir=temp_dir)
+    for i in range(6):
+        manager.append_bundle(make_bundle(f"CERT-{i}", produtos=make_produtos(f"CERT-{i}", i % 3)))
+
+    bundles = manager.get_bundles(["CERT-4", "CERT-1", "INEXISTENTE", "CERT-4"])
+
+    assert sorted(bundles) == ["CERT-1", "CERT-4"]
+    for numero, bundle in bundles.items():
+        single = manager.get_bundle_by_numero(numero)
+        assert bundle.certificado.id == single.certificado.id
+        assert bundle.produtos == single.produtos
+        assert bundle.metodos == single.metodos
+    assert [p.nome_produto for p in bundles["CERT-4"].produtos] == ["CERT-4-produto-0"]
+    assert bundles["CERT-1"].metodos == sample_bundle.metodos
+
+
+def test_csv_get_bundles_reads_each_file_once(temp_dir, make_bundle, monkeypatch):
+    manager = CsvManager(data_dir=temp_dir)
+    for i in range(10):
+        manager.append_bundle(make_bundle(f"CERT-{i}", produtos=make_produtos(f"CERT-{i}")))
+
+    reads = []
+    original = CsvIndex.iter_entries
+
+    def counting(self, entries):
+        reads.append(self.csv_path.name)
+        return original(self, entries)
+
+    monkeypatch.setattr(CsvIndex, "iter_entries", counting)
+    bundles = manager.get_bundles(f"CERT-{i}" for i in range(0, 10, 2))
+
+    assert len(bundles) == 5
+    assert sorted(reads) == sorted(
+        [manager.certificados_path.name, manager.produtos_path.name, manager.metodos_path.name]
+    )
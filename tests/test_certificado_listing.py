@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from engine_excel_to_pdf.storage.csv_manager import CsvManager
+from engine_excel_to_pdf.storage.sqlite_manager import SqliteManager
+
+BACKENDS = [CsvManager, SqliteManager]
+
+
+@pytest.fixture(params=BACKENDS, ids=["csv", "sqlite"])
+def manager(request, temp_dir, make_bundle):
+    manager = request.param(data_dir=temp_dir)
+    rows = [
+        ("CERT-1", "11.222.333/0001-81", date(2024, 6, 30), "São Paulo"),
+        ("CERT-2", "11222333000181", date(2024, 7, 10), "Campinas"),
+        ("CERT-3", "45.997.418/0001-53", date(2024, 7, 20), "SÃO PAULO"),
+        ("CERT-4", "45.997.418/0001-53", date(2024, 8, 1), None),
+        ("CERT-5", "11.222.333/0001-81", date(2024, 7, 31), "São Paulo"),
+    ]
+    for numero, cnpj, validade, cidade in rows:
+        manager.append_bundle(make_bundle(numero, cnpj=cnpj, data_validade=validade, cidade=cidade))
+    return manager
+
+
+def numeros(certificados):
+    return [c.numero_certificado for c in certificados]
+
+
+class TestIterCertificados:
+    def test_no_filters_streams_everything_in_order(self, manager):
+        result = manager.iter_certificados()
+
+        assert not isinstance(result, list)
+        assert numeros(result) == ["CERT-1", "CERT-2", "CERT-3", "CERT-4", "CERT-5"]
+
+    def test_cnpj_matches_any_spelling(self, manager):
+        assert numeros(manager.iter_certificados(cnpj="11222333000181")) == ["CERT-1", "CERT-2", "CERT-5"]
+        assert numeros(manager.iter_certificados(cnpj="45.997.418/0001-53")) == ["CERT-3", "CERT-4"]
+
+    def test_validade_range_is_inclusive(self, manager):
+        result = manager.iter_certificados(
+            validade_inicio=date(2024, 7, 1), validade_fim=date(2024, 7, 31)
+        )
+
+        assert numeros(result) == ["CERT-2", "CERT-3", "CERT-5"]
+
+    def test_cidade_ignores_case(self, manager):
+        assert numeros(manager.iter_certificados(cidade="são paulo")) == ["CERT-1", "CERT-3", "CERT-5"]
+
+    def test_filters_combine(self, manager):
+        result = manager.iter_certificados(
+            cnpj="11.222.333/0001-81", validade_inicio=date(2024, 7, 1), cidade="São Paulo"
+        )
+
+        assert numeros(result) == ["CERT-5"]
+        assert numeros(manager.iter_certificados(arquivo_origem="CERT-4.xlsx")) == ["CERT-4"]
+
+    def test_limit_and_offset(self, manager):
+        assert numeros(manager.iter_certificados(limit=2)) == ["CERT-1", "CERT-2"]
+        assert numeros(manager.iter_certificados(limit=2, offset=2)) == ["CERT-3", "CERT-4"]
+        assert numeros(manager.iter_certificados(cnpj="11222333000181", offset=1)) == ["CERT-2", "CERT-5"]
+        assert numeros(manager.iter_certificados(offset=10)) == []
+
+
+def test_csv_cnpj_filter_uses_index(temp_dir, sample_bundle, monkeypatch):
+    manager = CsvManager(data_dir=temp_dir)
+    manager.append_bundle(sample_bundle)
+    monkeypatch.setattr(manager, "_scan_certificados", lambda: pytest.fail("full scan"))
+
+    assert numeros(manager.iter_certificados(cnpj="11222333000181")) == ["CERT-2024-001"]
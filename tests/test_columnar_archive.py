@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import csv
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from engine_excel_to_pdf.storage import columnar
+from engine_excel_to_pdf.storage.columnar import ArchiveFormatError, ArchiveSegment
+from engine_excel_to_pdf.storage.csv_manager import CERTIFICADOS_HEADERS, CsvManager
+from engine_excel_to_pdf.storage.sqlite_manager import SqliteManager
+
+
+@pytest.fixture
+def manager(temp_dir, make_bundle):
+    manager = CsvManager(data_dir=temp_dir)
+    entries = [
+        ("CERT-1", datetime(2024, 1, 5, 9, 0), {"cidade": "Campinas", "valor": "R$ 100,00"}),
+        ("CERT-2", datetime(2024, 1, 20, 9, 0, 0, 1234, tzinfo=timezone.utc), {"cidade": None}),
+        ("CERT-3", datetime(2024, 2, 1, 8, 0, tzinfo=timezone(timedelta(hours=-3))),
+         {"data_validade": date(2024, 8, 1)}),
+        ("CERT-4", datetime(2024, 3, 1, 8, 0), {"cnpj": "45.997.418/0001-53"}),
+    ]
+    for numero, cadastro, fields in entries:
+        manager.append_bundle(make_bundle(numero, data_cadastro=cadastro, **fields))
+    return manager
+
+
+class TestCompaction:
+    def test_moves_closed_months_out_of_csv(self, manager):
+        before = manager.list_certificados()
+
+        moved = manager.compact(before=date(2024, 3, 15))
+
+        assert moved == 3
+        assert sorted(p.name for p in manager.archive.paths()) == [
+            "certificados-2024-01.col",
+            "certificados-2024-02.col",
+        ]
+        assert manager.certificados_path.read_text(encoding="utf-8").count("\n") == 2
+        assert manager.list_certificados() == before
+
+    def test_lookups_read_archived_periods(self, manager):
+        manager.compact(before=date(2024, 3, 1))
+
+        bundle = manager.get_bundle_by_numero("CERT-2")
+        assert bundle.certificado.data_cadastro == datetime(2024, 1, 20, 9, 0, 0, 1234, tzinfo=timezone.utc)
+        assert bundle.certificado.cidade is None
+        assert len(bundle.produtos) == 2
+        assert manager.get_bundle_by_arquivo("CERT-3.xlsx").certificado.numero_certificado == "CERT-3"
+        assert sorted(manager.get_bundles(["CERT-1", "CERT-4"])) == ["CERT-1", "CERT-4"]
+
+    def test_archived_bundle_is_not_appended_again(self, manager, make_bundle):
+        manager.compact(before=date(2024, 3, 1))
+        bundle = make_bundle("CERT-1", data_cadastro=datetime(2024, 1, 5, 9, 0), cidade="Campinas", valor="R$ 100,00")
+        bundle.certificado.id = bundle.certificado._generate_id()
+
+        manager.append_bundle(bundle)
+
+        assert len(manager.list_certificados()) == 4
+
+    def test_filters_and_pages_span_archive_and_csv(self, manager):
+        manager.compact(before=date(2024, 2, 15))
+
+        numeros = lambda result: [c.numero_certificado for c in result]
+        assert numeros(manager.iter_certificados(cnpj="11222333000181")) == ["CERT-1", "CERT-2", "CERT-3"]
+        assert numeros(manager.iter_certificados(validade_inicio=date(2024, 7, 20))) == ["CERT-3"]
+        assert numeros(manager.iter_certificados(cidade="CAMPINAS")) == ["CERT-1"]
+        assert numeros(manager.iter_certificados(arquivo_origem="CERT-2.xlsx")) == ["CERT-2"]
+        assert numeros(manager.iter_certificados(limit=2, offset=1)) == ["CERT-2", "CERT-3"]
+
+    def test_rerun_after_interruption_does_not_duplicate(self, manager):
+        with manager.certificados_path.open(newline="", encoding="utf-8") as handle:
+            rows = [row for row in csv.DictReader(handle) if row["numero_certificado"] == "CERT-1"]
+        manager.archive.add_rows(CERTIFICADOS_HEADERS, rows)
+
+        manager.compact(before=date(2024, 2, 1))
+
+        assert [c.numero_certificado for c in manager.list_certificados()] == [
+            "CERT-1", "CERT-2", "CERT-3", "CERT-4"
+        ]
+
+    def test_other_manager_sees_compacted_csv(self, manager, make_bundle, temp_dir):
+        other = CsvManager(data_dir=temp_dir)
+        assert other.get_bundle_by_arquivo("CERT-4.xlsx") is not None
+
+        manager.compact(before=date(2024, 3, 15))
+        for i in range(1, 8):
+            manager.append_bundle(make_bundle(f"NEW-{i}"))
+
+        for i in range(1, 8):
+            found = other.iter_certificados(arquivo_origem=f"NEW-{i}.xlsx")
+            assert [c.numero_certificado for c in found] == [f"NEW-{i}"]
+
+    def test_decoded_periods_cache_is_bounded(self, manager, make_bundle):
+        for month in range(4, 10):
+            manager.append_bundle(make_bundle(f"CERT-M{month}", data_cadastro=datetime(2024, month, 1, 8, 0)))
+        manager.compact(before=date(2024, 12, 1))
+        manager.archive.max_cached = 2
+
+        assert len(list(manager.archive.iter_rows())) == 10
+        assert not manager.archive._segments
+        for numero in ("CERT-1", "CERT-3", "CERT-M5", "CERT-M9"):
+            assert manager.get_bundle_by_numero(numero) is not None
+        assert len(manager.archive._segments) == 2
+
+    def test_lookups_decode_only_the_period_holding_the_key(self, manager, make_bundle, temp_dir, monkeypatch):
+        for month in range(1, 13):
+            manager.append_bundle(make_bundle(f"CERT-2023-{month}", data_cadastro=datetime(2023, month, 1, 8, 0)))
+        manager.compact(before=date(2024, 12, 1))
+        decodes = []
+        original = columnar.ArchiveSegment.__init__
+
+        def counting_init(self, path):
+            decodes.append(Path(path).name)
+            original(self, path)
+
+        monkeypatch.setattr(columnar.ArchiveSegment, "__init__", counting_init)
+        reader = CsvManager(data_dir=temp_dir)
+        reader.archive.max_cached = 2
+        assert len(reader.archive.paths()) > reader.archive.max_cached
+
+        for _ in range(5):
+            assert reader.get_bundle_by_arquivo("missing.xlsx") is None
+        assert decodes == []
+
+        assert reader.get_bundle_by_numero("CERT-2023-7").certificado.numero_certificado == "CERT-2023-7"
+        assert decodes == ["certificados-2023-07.col"]
+
+    def test_key_index_is_rebuilt_when_missing(self, manager, temp_dir):
+        manager.compact(before=date(2024, 3, 1))
+        (manager.archive.directory / "certificados.keys").unlink()
+
+        reader = CsvManager(data_dir=temp_dir)
+
+        assert reader.get_bundle_by_arquivo("CERT-2.xlsx").certificado.numero_certificado == "CERT-2"
+        assert (manager.archive.directory / "certificados.keys").exists()
+
+    def test_sqlite_import_includes_archive(self, manager, temp_dir):
+        manager.compact(before=date(2024, 3, 1))
+        sqlite = SqliteManager(data_dir=temp_dir / "sqlite")
+
+        assert sqlite.import_from_csv(temp_dir) == 4
+        assert sqlite.list_certificados() == manager.list_certificados()
+
+
+def test_corrupt_archive_is_reported(temp_dir):
+    path = temp_dir / "certificados-2024-01.col"
+    path.write_bytes(b"ECOL\x05\x00\x00\x00{oops")
+
+    with pytest.raises(ArchiveFormatError):
+        ArchiveSegment(path)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import csv
+import multiprocessing
+import threading
+from pathlib import Path
+
+from engine_excel_to_pdf.storage.csv_manager import CsvManager
+
+
+def _read_rows(path: Path) -> list[dict]:
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _append_from_process(data_dir: str, prefix: str, count: int, make_bundle) -> None:
+    manager = CsvManager(data_dir=Path(data_dir))
+    for idx in range(count):
+        manager.append_bundle(make_bundle(f"{prefix}-{idx}"))
+    manager.close()
+
+
+class TestCsvConcurrency:
+    def test_threads_share_one_manager(self, temp_dir, sample_bundle, make_bundle):
+        manager = CsvManager(data_dir=temp_dir)
+
+        def worker(prefix: str, buffered: bool) -> None:
+            for idx in range(20):
+                bundle = make_bundle(f"{prefix}-{idx}")
+                if buffered:
+                    with manager.buffered(max_bundles=5):
+                        manager.append_bundle(bundle)
+                else:
+                    manager.append_bundle(bundle)
+
+        threads = [
+            threading.Thread(target=worker, args=(f"T{n}", n % 2 == 0)) for n in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        manager.flush()
+
+        assert len(manager.list_certificados()) == 120
+        assert len(_read_rows(manager.produtos_path)) == 240
+        for n in range(6):
+            bundle = manager.get_bundle_by_numero(f"T{n}-19")
+            assert len(bundle.produtos) == 2
+            assert len(bundle.metodos) == len(sample_bundle.metodos)
+
+    def test_processes_append_to_same_directory(self, temp_dir, make_bundle):
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_append_from_process, args=(str(temp_dir), f"P{n}", 15, make_bundle))
+            for n in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+            assert process.exitcode == 0
+
+        manager = CsvManager(data_dir=temp_dir)
+        certificados = manager.list_certificados()
+        assert len(certificados) == 45
+        assert len({c.numero_certificado for c in certificados}) == 45
+        produtos = _read_rows(manager.produtos_path)
+        assert len(produtos) == 90
+        assert all(row["id_certificado"] for row in produtos)
+        assert len(manager.get_bundle_by_numero("P2-14").produtos) == 2
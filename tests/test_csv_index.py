@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from engine_excel_to_pdf.storage import csv_index
+from engine_excel_to_pdf.storage.csv_manager import CsvManager
+
+
+class TestCsvIndex:
+    def test_append_maintains_index_files(self, temp_dir, sample_bundle):
+        manager = CsvManager(data_dir=temp_dir)
+        manager.append_bundle(sample_bundle)
+
+        index_lines = (temp_dir / "certificados.csv.idx").read_text().splitlines()
+        assert index_lines[0].startswith("offset,length,id,numero_certificado,arquivo_origem,cnpj,file=")
+        assert len(index_lines) == 2
+        assert len((temp_dir / "produtos_quimicos.csv.idx").read_text().splitlines()) == 3
+
+    def test_lookups_seek_without_scanning(self, temp_dir, make_bundle, monkeypatch):
+        writer = CsvManager(data_dir=temp_dir)
+        for i in range(5):
+            writer.append_bundle(make_bundle(f"CERT-{i}", arquivo_origem=f"arquivo-{i}.xlsx"))
+
+        def fail_scan(*args, **kwargs):
+            raise AssertionError("lookup should use the persisted index")
+
+        reader = CsvManager(data_dir=temp_dir)
+        reader._certificados_index.refresh()
+        reader._produtos_index.refresh()
+        reader._metodos_index.refresh()
+        monkeypatch.setattr(csv_index, "iter_records", fail_scan)
+
+        bundle = reader.get_bundle_by_numero("CERT-3")
+        assert bundle.certificado.arquivo_origem == "arquivo-3.xlsx"
+        assert [p.nome_produto for p in bundle.produtos] == ["Inseticida Alpha", "Raticida Beta"]
+        assert reader.get_bundle_by_arquivo("arquivo-4.xlsx").certificado.numero_certificado == "CERT-4"
+
+    def test_index_catches_up_with_external_appends(self, temp_dir, make_bundle):
+        manager = CsvManager(data_dir=temp_dir)
+        manager.append_bundle(make_bundle("CERT-A", arquivo_origem="a.xlsx"))
+        other = CsvManager(data_dir=temp_dir)
+        other.append_bundle(make_bundle("CERT-B", arquivo_origem="b.xlsx"))
+
+        bundle = manager.get_bundle_by_numero("CERT-B")
+
+        assert bundle is not None
+        assert len(bundle.metodos) == 2
+
+    def test_stale_index_is_rebuilt(self, temp_dir, make_bundle):
+        manager = CsvManager(data_dir=temp_dir)
+        manager.append_bundle(make_bundle("CERT-A", arquivo_origem="a.xlsx"))
+        manager.append_bundle(make_bundle("CERT-B", arquivo_origem="b.xlsx"))
+        (temp_dir / "certificados.csv.idx").write_text("lixo\n")
+
+        reloaded = CsvManager(data_dir=temp_dir)
+
+        assert reloaded.get_bundle_by_numero("CERT-B").certificado.arquivo_origem == "b.xlsx"
+
+    def test_multiline_fields_round_trip(self, temp_dir, make_bundle):
+        bundle = make_bundle("CERT-ML", arquivo_origem="ml.xlsx")
+        bundle.certificado.endereco_completo = 'Rua "A", 10\nBloco 2'
+        manager = CsvManager(data_dir=temp_dir)
+        manager.append_bundle(bundle)
+        manager.append_bundle(make_bundle("CERT-NEXT", arquivo_origem="next.xlsx"))
+
+        reloaded = CsvManager(data_dir=temp_dir)
+        reloaded.rebuild_indexes()
+
+        assert reloaded.get_bundle_by_numero("CERT-ML").certificado.endereco_completo == 'Rua "A", 10\nBloco 2'
+        assert reloaded.get_bundle_by_numero("CERT-NEXT") is not None
+
+
+class TestScanRecords:
+    def test_matches_line_iteration(self, temp_dir):
+        path = temp_dir / "data.csv"
+        path.write_bytes(b'a,b\n1,"x\ny"\n2,"z, w"\n3,"incomplete')
+
+        with path.open("rb") as handle:
+            expected = list(csv_index.iter_records(handle, 0))
+
+        assert list(csv_index.scan_records(path)) == expected
+        assert [offset for offset, _ in expected] == [0, 4, 12]
+        assert list(csv_index.scan_records(path, offset=4))[0] == (4, b'1,"x\ny"\n')
+
+    def test_empty_file(self, temp_dir):
+        path = temp_dir / "empty.csv"
+        path.write_bytes(b"")
+
+        assert list(csv_index.scan_records(path)) == []
+
+    def test_filtered_scan_builds_only_matching_certificados(self, temp_dir, make_bundle, monkeypatch):
+        manager = CsvManager(data_dir=temp_dir)
+        for i in range(6):
+            bundle = make_bundle(f"CERT-{i}", arquivo_origem=f"arquivo-{i}.xlsx")
+            bundle.certificado.cidade = "Santos" if i % 3 == 0 else "Campinas"
+            manager.append_bundle(bundle)
+
+        built = []
+        original = CsvManager._row_to_certificado
+        monkeypatch.setattr(
+            CsvManager, "_row_to_certificado", staticmethod(lambda row: built.append(row) or original(row))
+        )
+        result = [c.numero_certificado for c in manager.iter_certificados(cidade="SANTOS")]
+
+        assert result == ["CERT-0", "CERT-3"]
+        assert len(built) == 2
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import pytest
+
+from engine_excel_to_pdf.storage.csv_manager import CsvManager
+from engine_excel_to_pdf.storage.csv_writer import CsvWriter
+from engine_excel_to_pdf.storage.journal import Journal, JournalWrite
+
+
+def crash_after(written: int):
+    """Stand-in for ``_append_files`` that dies after ``written`` bytes of the first file."""
+    def append(self, by_path):
+        path = min(by_path, key=self._rank)
+        data = b"".join(record[2] for record in by_path[path])
+        with path.open("ab") as handle:
+            handle.write(data[:written])
+        raise OSError("simulated crash")
+    return append
+
+
+class TestRecovery:
+    def test_interrupted_bundle_is_completed_on_startup(self, temp_dir, sample_bundle, make_bundle, monkeypatch):
+        manager = CsvManager(data_dir=temp_dir)
+        manager.append_bundle(make_bundle("CERT-1"))
+        monkeypatch.setattr(CsvWriter, "_append_files", crash_after(10))
+        with pytest.raises(OSError):
+            manager.append_bundle(make_bundle("CERT-2"))
+        monkeypatch.undo()
+
+        recovered = CsvManager(data_dir=temp_dir)
+
+        assert [c.numero_certificado for c in recovered.list_certificados()] == ["CERT-1", "CERT-2"]
+        bundle = recovered.get_bundle_by_numero("CERT-2")
+        assert bundle.produtos == sample_bundle.produtos
+        assert bundle.metodos == sample_bundle.metodos
+        assert recovered._writer.journal.size() == 0
+
+    def test_replay_is_idempotent(self, temp_dir, make_bundle):
+        manager = CsvManager(data_dir=temp_dir)
+        manager.append_bundle(make_bundle("CERT-1"))
+        before = [path.read_bytes() for path in manager._writer.file_order]
+
+        assert manager._writer.recover() == 0
+        assert CsvManager(data_dir=temp_dir)._writer.recover() == 0
+
+        assert [path.read_bytes() for path in manager._writer.file_order] == before
+
+    def test_mismatched_data_is_not_overwritten(self, temp_dir, make_bundle):
+        manager = CsvManager(data_dir=temp_dir)
+        manager.append_bundle(make_bundle("CERT-1"))
+        size = manager.metodos_path.stat().st_size
+        manager._writer.journal.append([[JournalWrite(manager.metodos_path.name, size - 5, b"outra coisa\r\n")]])
+        before = manager.metodos_path.read_bytes()
+
+        assert manager._writer.recover() == 0
+        assert manager.metodos_path.read_bytes() == before
+
+
+def test_torn_journal_tail_is_ignored(temp_dir):
+    journal = Journal(temp_dir / ".csv.journal")
+    journal.append([[JournalWrite("a.csv", 0, b"x,y\r\n")], [JournalWrite("a.csv", 5, b"z,w\r\n")]])
+    with journal.path.open("ab") as handle:
+        handle.write(b"\x40\x00\x00\x00\x01\x02")
+
+    assert [writes[0].data for writes in journal.read()] == [b"x,y\r\n", b"z,w\r\n"]
+
+
+def test_checkpoint_empties_the_journal(temp_dir, make_bundle):
+    manager = CsvManager(data_dir=temp_dir)
+    manager._writer.checkpoint_bytes = 1
+    manager.append_bundle(make_bundle("CERT-1"))
+
+    assert manager._writer.journal.size() == 0
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from pathlib import Path
 
 import pytest
@@ -135,3 +136,46 @@ class TestCsvManager:
         retrieved = manager.get_bundle_by_arquivo("nao-existe.xlsx")
         
         assert retrieved is None
+
+
+class TestCsvManagerGroupCommit:
+    def test_buffered_writes_are_flushed_on_exit(self, temp_dir, make_bundle):
+        manager = CsvManager(data_dir=temp_dir)
+
+        with manager.buffered(max_bundles=10):
+            manager.append_bundle(make_bundle("CERT-1"))
+            manager.append_bundle(make_bundle("CERT-2"))
+            assert manager.certificados_path.read_text().count("\n") == 1
+            assert manager.get_bundle_by_arquivo("CERT-2.xlsx") is not None
+
+        assert manager.certificados_path.read_text().count("\n") == 3
+        assert len(manager.get_bundle_by_numero("CERT-2").produtos) == 2
+
+    def test_group_flushes_by_count(self, temp_dir, make_bundle, monkeypatch):
+        import os
+
+        fsyncs = []
+        original_fsync = os.fsync
+        monkeypatch.setattr(os, "fsync", lambda fd: (fsyncs.append(fd), original_fsync(fd)))
+        manager = CsvManager(data_dir=temp_dir)
+
+        with manager.buffered(max_bundles=2, max_delay=None):
+            for numero in ("CERT-1", "CERT-2", "CERT-3"):
+                manager.append_bundle(make_bundle(numero))
+            deadline = time.monotonic() + 5
+            while manager.certificados_path.read_text().count("\n") < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert manager.certificados_path.read_text().count("\n") == 3
+
+        # One journal fsync per group; the CSVs wait for a checkpoint.
+        assert len(fsyncs) == 2
+        assert [c.numero_certificado for c in manager.list_certificados()] == ["CERT-1", "CERT-2", "CERT-3"]
+
+    def test_buffered_skip_if_exists_sees_pending_bundle(self, temp_dir, sample_bundle):
+        manager = CsvManager(data_dir=temp_dir)
+
+        with manager.buffered():
+            manager.append_bundle(sample_bundle)
+            manager.append_bundle(sample_bundle)
+
+        assert len(manager.list_certificados()) == 1
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from dataclasses import replace
+from datetime import date, datetime
+
 import pytest
+from openpyxl import load_workbook
 
-from engine_excel_to_pdf.extractor.excel_extractor import ExcelExtractor
+from engine_excel_to_pdf.extractor.excel_extractor import DEFAULT_CONFIG, ExcelExtractor
+from engine_excel_to_pdf.extractor.xlsx_reader import UnsupportedWorkbookError
 
 
 class TestExcelExtractor:
@@ -38,3 +43,56 @@ class TestExcelExtractor:
         
         assert bundle.metodos[1].metodo == "Gel"
         assert bundle.metodos[1].quantidade == "50g"
+
+    @pytest.mark.parametrize("engine", ["openpyxl", "xml"])
+    def test_extract_date_cells_without_string_parsing(self, sample_excel_file, engine, monkeypatch):
+        wb = load_workbook(sample_excel_file)
+        ws = wb.active
+        ws["E21"] = datetime(2024, 1, 5)
+        ws["B48"] = datetime(2024, 7, 5)
+        wb.save(sample_excel_file)
+
+        def fail_parse(value):
+            raise AssertionError("date cells should not be parsed as text")
+
+        monkeypatch.setattr("engine_excel_to_pdf.utils._parse_pt_br_date_text", fail_parse)
+        bundle = ExcelExtractor(replace(DEFAULT_CONFIG, engine=engine)).extract(sample_excel_file)
+
+        assert bundle.certificado.data_execucao == date(2024, 1, 5)
+        assert bundle.certificado.data_validade == date(2024, 7, 5)
+
+    def test_active_chartsheet_without_certificate_raises(self, tmp_path):
+        from openpyxl import Workbook
+        from openpyxl.chart import BarChart, Reference
+
+        wb = Workbook()
+        ws = wb.active
+        ws["A1"] = 1
+        chart = BarChart()
+        chart.add_data(Reference(ws, min_col=1, min_row=1, max_row=1))
+        wb.create_chartsheet("Grafico").add_chart(chart)
+        wb.active = 1
+        file_path = tmp_path / "grafico.xlsx"
+        wb.save(file_path)
+
+        with pytest.raises(UnsupportedWorkbookError, match="No worksheet found"):
+            ExcelExtractor().extract(file_path)
+
+    def test_streaming_reads_first_worksheet_when_chartsheet_is_active(self, sample_excel_file, tmp_path):
+        from openpyxl.chart import BarChart, Reference
+
+        wb = load_workbook(sample_excel_file)
+        ws = wb.active
+        ws[DEFAULT_CONFIG.certificado_map["numero_licenca"]] = None
+        chart = BarChart()
+        chart.add_data(Reference(ws, min_col=3, min_row=10, max_row=10))
+        wb.create_chartsheet("Grafico").add_chart(chart)
+        wb.active = len(wb.sheetnames) - 1
+        file_path = tmp_path / "grafico.xlsx"
+        wb.save(file_path)
+
+        bundle = ExcelExtractor(config=replace(DEFAULT_CONFIG, read_only=True)).extract(file_path)
+
+        assert bundle.certificado.numero_certificado == "CERT-2024-001"
+        assert bundle.certificado.data_execucao == date(2024, 1, 15)
+        assert len(bundle.produtos) == 2
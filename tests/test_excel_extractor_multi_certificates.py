@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+from engine_excel_to_pdf.extractor.excel_extractor import DEFAULT_CONFIG, ExcelExtractor
+from engine_excel_to_pdf.extractor.xlsx_reader import UnsupportedWorkbookError, XlsxReader
+
+BLOCK_CONFIG = replace(DEFAULT_CONFIG, block_row_stride=100)
+
+
+def fill_certificate(ws, numero: str, offset: int = 0) -> None:
+    ws[f"C{10 + offset}"] = numero
+    ws[f"I{10 + offset}"] = f"LIC-{numero}"
+    ws[f"C{15 + offset}"] = f"Empresa {numero}"
+    ws[f"E{20 + offset}"] = "11.222.333/0001-81"
+    ws[f"E{21 + offset}"] = "20 DE FEVEREIRO DE 2024"
+    ws[f"B{48 + offset}"] = "20 DE AGOSTO DE 2024"
+    ws.cell(row=29 + offset, column=4).value = f"Produto {numero}"
+    ws.cell(row=29 + offset, column=9).value = 1.0
+    ws.cell(row=34 + offset, column=4).value = f"Metodo {numero}"
+    ws.cell(row=34 + offset, column=8).value = "100ml"
+
+
+def create_workbook_per_sheet(tmpdir: Path) -> Path:
+    wb = Workbook()
+    wb.active.title = "Capa"
+    for numero in ("CERT-001", "CERT-002", "CERT-003"):
+        fill_certificate(wb.create_sheet(numero), numero)
+    file_path = tmpdir / "varios.xlsx"
+    wb.save(file_path)
+    return file_path
+
+
+def create_workbook_with_blocks(tmpdir: Path, blocks: int) -> Path:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Lote"
+    for index in range(blocks):
+        fill_certificate(ws, f"CERT-{index + 1:03d}", offset=index * 100)
+    file_path = tmpdir / "blocos.xlsx"
+    wb.save(file_path)
+    return file_path
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xml"])
+def test_iter_bundles_yields_one_bundle_per_sheet(temp_dir, engine):
+    extractor = ExcelExtractor(replace(DEFAULT_CONFIG, engine=engine))
+    bundles = list(extractor.iter_bundles(create_workbook_per_sheet(temp_dir)))
+
+    assert [b.certificado.numero_certificado for b in bundles] == ["CERT-001", "CERT-002", "CERT-003"]
+    assert [b.certificado.arquivo_origem for b in bundles] == [
+        "varios.xlsx#CERT-001",
+        "varios.xlsx#CERT-002",
+        "varios.xlsx#CERT-003",
+    ]
+    assert bundles[1].produtos[0].nome_produto == "Produto CERT-002"
+    assert bundles[1].metodos[0].metodo == "Metodo CERT-002"
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xml"])
+def test_iter_bundles_reads_repeated_blocks(temp_dir, engine):
+    extractor = ExcelExtractor(replace(BLOCK_CONFIG, engine=engine))
+    bundles = list(extractor.iter_bundles(create_workbook_with_blocks(temp_dir, blocks=4)))
+
+    assert [b.certificado.numero_certificado for b in bundles] == [
+        "CERT-001",
+        "CERT-002",
+        "CERT-003",
+        "CERT-004",
+    ]
+    assert bundles[-1].certificado.arquivo_origem == "blocos.xlsx#Lote:4"
+    assert [m.metodo for m in bundles[2].metodos] == ["Metodo CERT-003"]
+    assert len({b.certificado.id for b in bundles}) == 4
+
+
+def test_iter_bundles_is_lazy(temp_dir):
+    extractor = ExcelExtractor(BLOCK_CONFIG)
+    bundles = extractor.iter_bundles(create_workbook_with_blocks(temp_dir, blocks=3))
+
+    first = next(bundles)
+    assert first.certificado.numero_certificado == "CERT-001"
+    bundles.close()
+
+
+def test_block_stride_requires_bounded_template(temp_dir):
+    unbounded = ExcelExtractor(replace(BLOCK_CONFIG, metodo_end_row=None))
+    overlapping = ExcelExtractor(replace(DEFAULT_CONFIG, block_row_stride=20))
+    excel_path = create_workbook_with_blocks(temp_dir, blocks=1)
+
+    with pytest.raises(ValueError):
+        unbounded.iter_bundles(excel_path)
+    with pytest.raises(ValueError):
+        overlapping.iter_bundles(excel_path)
+
+
+def fail_xml_rows_at(monkeypatch, sheet_name: str, row_limit: int) -> None:
+    iter_rows = XlsxReader.iter_rows
+
+    def failing_rows(self, name, *args, **kwargs):
+        rows = iter_rows(self, name, *args, **kwargs)
+        if name != sheet_name:
+            return rows
+
+        def guarded():
+            for row, values in rows:
+                if row > row_limit:
+                    raise UnsupportedWorkbookError("feature not supported")
+                yield row, values
+
+        return guarded()
+
+    monkeypatch.setattr(XlsxReader, "iter_rows", failing_rows)
+
+
+def test_xml_failure_mid_workbook_resumes_with_openpyxl(temp_dir, monkeypatch):
+    fail_xml_rows_at(monkeypatch, "CERT-002", row_limit=0)
+    extractor = ExcelExtractor(replace(DEFAULT_CONFIG, engine="xml"))
+
+    bundles = list(extractor.iter_bundles(create_workbook_per_sheet(temp_dir)))
+
+    assert [b.certificado.numero_certificado for b in bundles] == ["CERT-001", "CERT-002", "CERT-003"]
+
+
+def test_xml_failure_mid_sheet_skips_blocks_already_yielded(temp_dir, monkeypatch):
+    fail_xml_rows_at(monkeypatch, "Lote", row_limit=250)
+    extractor = ExcelExtractor(replace(BLOCK_CONFIG, engine="xml"))
+
+    bundles = list(extractor.iter_bundles(create_workbook_with_blocks(temp_dir, blocks=4)))
+
+    assert [b.certificado.numero_certificado for b in bundles] == [
+        "CERT-001",
+        "CERT-002",
+        "CERT-003",
+        "CERT-004",
+    ]
+    assert bundles[2].certificado.arquivo_origem == "blocos.xlsx#Lote:3"
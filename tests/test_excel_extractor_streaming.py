@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from openpyxl import Workbook
+
+from engine_excel_to_pdf.extractor import excel_extractor
+from engine_excel_to_pdf.extractor.excel_extractor import DEFAULT_CONFIG, ExcelExtractor
+from tests.test_extractor_multi_sheets import create_multi_sheet_file
+
+
+STREAMING_CONFIG = replace(DEFAULT_CONFIG, read_only=True)
+
+
+def _comparable(bundle):
+    data = bundle.to_dict()
+    data["certificado"].pop("id")
+    data["certificado"].pop("data_cadastro")
+    return data
+
+
+class TestExcelExtractorStreaming:
+    def test_streaming_matches_full_mode(self, sample_excel_file):
+        full = ExcelExtractor().extract(sample_excel_file)
+        streamed = ExcelExtractor(STREAMING_CONFIG).extract(sample_excel_file)
+
+        assert _comparable(streamed) == _comparable(full)
+
+    def test_streaming_selects_valid_sheet(self, temp_dir):
+        excel_path = create_multi_sheet_file(temp_dir)
+
+        bundle = ExcelExtractor(STREAMING_CONFIG).extract(excel_path)
+
+        assert bundle.certificado.numero_certificado == "CERT-2024-002"
+        assert bundle.produtos[0].nome_produto == "Inseticida Multi"
+        assert bundle.metodos[0].quantidade == "300ml"
+
+    def test_streaming_ignores_rows_after_window(self, sample_excel_file, temp_dir, monkeypatch):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(sample_excel_file)
+        ws = wb.active
+        for row in range(81, 2000):
+            ws.cell(row=row, column=4).value = f"fora da janela {row}"
+        file_path = temp_dir / "linhas_extras.xlsx"
+        wb.save(file_path)
+
+        rows_read = []
+        openpyxl_rows = excel_extractor._openpyxl_rows
+
+        def counting_rows(worksheet, min_row, max_column):
+            for row, values in openpyxl_rows(worksheet, min_row, max_column):
+                rows_read.append(row)
+                yield row, values
+
+        monkeypatch.setattr(excel_extractor, "_openpyxl_rows", counting_rows)
+
+        bundle = ExcelExtractor(STREAMING_CONFIG).extract(file_path)
+
+        assert [m.metodo for m in bundle.metodos] == ["Pulverização", "Gel"]
+        # The stream stops at the first row past metodo_end_row.
+        assert max(rows_read) == DEFAULT_CONFIG.metodo_end_row + 1
+
+    def test_streaming_without_metodo_end_row(self, sample_excel_file):
+        config = replace(STREAMING_CONFIG, metodo_end_row=None)
+
+        bundle = ExcelExtractor(config).extract(sample_excel_file)
+
+        assert [m.metodo for m in bundle.metodos] == ["Pulverização", "Gel"]
+
+    def test_streaming_uses_fallback_cell(self, tmp_path):
+        wb = Workbook()
+        ws = wb.active
+        ws["C10"] = "CERT-2025-002"
+        ws["I10"] = "LIC-MA-67890"
+        ws["D17"] = "NOME FANTASIA EM D17"
+        ws["E21"] = "20 DE FEVEREIRO DE 2025"
+        ws["B48"] = "20 DE MAIO DE 2025"
+        file_path = tmp_path / "fallback.xlsx"
+        wb.save(file_path)
+
+        bundle = ExcelExtractor(STREAMING_CONFIG).extract(file_path)
+
+        assert bundle.certificado.nome_fantasia == "NOME FANTASIA EM D17"
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from openpyxl.utils.cell import coordinate_to_tuple
+
+xlwt = pytest.importorskip("xlwt")
+pytest.importorskip("xlrd")
+
+from engine_excel_to_pdf.batch_processor import BatchProcessor
+from engine_excel_to_pdf.extractor.excel_extractor import ExcelExtractor
+from engine_excel_to_pdf.extractor.xls_reader import XlsReader
+
+
+def create_xls_file(tmpdir: Path, name: str = "legado.xls") -> Path:
+    wb = xlwt.Workbook()
+    wb.add_sheet("Capa")
+    ws = wb.add_sheet("Dados")
+    date_style = xlwt.easyxf(num_format_str="DD/MM/YYYY")
+
+    def put(ref: str, value, style=None) -> None:
+        row, column = coordinate_to_tuple(ref)
+        if style is None:
+            ws.write(row - 1, column - 1, value)
+        else:
+            ws.write(row - 1, column - 1, value, style)
+
+    put("C10", "CERT-XLS-001")
+    put("I10", "LIC-XLS-001")
+    put("C15", "Empresa Legada LTDA")
+    put("C17", "Legada")
+    put("D19", "Rua Antiga, 10 - São Paulo/SP")
+    put("E20", "11.222.333/0001-81")
+    put("E21", datetime(2024, 1, 5), date_style)
+    put("F22", "Cupins")
+    put("B48", "5 DE JULHO DE 2024")
+    put("F25", "Piretroide")
+    put("D29", "Inseticida Velho")
+    put("I29", 2.5)
+    put("D34", "Pulverização")
+    put("H34", "250ml")
+
+    file_path = tmpdir / name
+    wb.save(str(file_path))
+    return file_path
+
+
+def test_xls_reader_reads_typed_cells(temp_dir):
+    with XlsReader(create_xls_file(temp_dir)) as reader:
+        assert reader.sheet_names == ["Capa", "Dados"]
+        rows = dict(reader.iter_rows("Dados", min_row=20, max_column=9))
+
+    assert rows[21][5] == datetime(2024, 1, 5)
+    assert rows[29] == {4: "Inseticida Velho", 9: 2.5}
+    assert 10 not in rows
+
+
+def test_extract_xls_file(temp_dir):
+    bundle = ExcelExtractor().extract(create_xls_file(temp_dir))
+
+    assert bundle.certificado.numero_certificado == "CERT-XLS-001"
+    assert bundle.certificado.data_execucao == date(2024, 1, 5)
+    assert bundle.certificado.data_validade == date(2024, 7, 5)
+    assert bundle.certificado.arquivo_origem == "legado.xls"
+    assert [(p.nome_produto, p.classe_quimica, p.concentracao) for p in bundle.produtos] == [
+        ("Inseticida Velho", "Piretroide", 2.5)
+    ]
+    assert bundle.metodos[0].quantidade == "250ml"
+
+
+def test_iter_bundles_reads_xls_sheets(temp_dir):
+    bundles = list(ExcelExtractor().iter_bundles(create_xls_file(temp_dir)))
+
+    assert [b.certificado.arquivo_origem for b in bundles] == ["legado.xls#Dados"]
+
+
+def test_batch_skips_xls_without_xlrd(temp_dir, monkeypatch):
+    create_xls_file(temp_dir)
+    monkeypatch.setattr("engine_excel_to_pdf.batch_processor.xls_support_available", lambda: False)
+    processor = BatchProcessor(motor=object())
+
+    assert processor._listar_arquivos(temp_dir, recursivo=False) == []
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from engine_excel_to_pdf.constants import ExtractionEngine
+from engine_excel_to_pdf.extractor.excel_extractor import DEFAULT_CONFIG, ExcelExtractor
+from engine_excel_to_pdf.extractor.xlsx_reader import UnsupportedWorkbookError, XlsxReader
+from tests.test_extractor_multi_sheets import create_multi_sheet_file
+
+
+XML_CONFIG = replace(DEFAULT_CONFIG, engine=ExtractionEngine.XML.value)
+
+
+def _comparable(bundle):
+    data = bundle.to_dict()
+    data["certificado"].pop("id")
+    data["certificado"].pop("data_cadastro")
+    return data
+
+
+class TestXlsxReader:
+    def test_reads_typed_values(self, tmp_path):
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Dados"
+        ws["A1"] = "texto"
+        ws["B1"] = 42
+        ws["C1"] = 2.5
+        ws["D1"] = datetime(2024, 1, 15)
+        ws["E1"] = True
+        ws["A3"] = "=1+1"
+        file_path = tmp_path / "tipos.xlsx"
+        wb.save(file_path)
+
+        with XlsxReader(file_path) as reader:
+            rows = list(reader.iter_rows("Dados"))
+
+        assert reader.sheet_names == ["Dados"]
+        assert rows[0] == (1, {1: "texto", 2: 42, 3: 2.5, 4: datetime(2024, 1, 15), 5: True})
+        # Formulas without a cached result read as empty, as in openpyxl's data_only mode
+        assert len(rows) == 1
+
+    def test_rows_are_parsed_lazily(self, tmp_path):
+        wb = Workbook()
+        ws = wb.active
+        for row in range(1, 500):
+            ws.cell(row=row, column=1).value = f"linha {row}"
+        file_path = tmp_path / "linhas.xlsx"
+        wb.save(file_path)
+
+        with XlsxReader(file_path) as reader:
+            rows = reader.iter_rows(ws.title, min_row=10, max_column=1)
+            first = next(rows)
+
+        assert first == (10, {1: "linha 10"})
+
+    def test_rejects_non_zip_file(self, tmp_path):
+        file_path = tmp_path / "falso.xlsx"
+        file_path.write_text("not a workbook")
+
+        with pytest.raises(UnsupportedWorkbookError):
+            XlsxReader(file_path)
+
+
+class TestExcelExtractorXmlEngine:
+    def test_xml_engine_matches_openpyxl(self, sample_excel_file):
+        expected = ExcelExtractor().extract(sample_excel_file)
+        bundle = ExcelExtractor(XML_CONFIG).extract(sample_excel_file)
+
+        assert _comparable(bundle) == _comparable(expected)
+
+    def test_xml_engine_selects_valid_sheet(self, temp_dir):
+        excel_path = create_multi_sheet_file(temp_dir)
+
+        bundle = ExcelExtractor(XML_CONFIG).extract(excel_path)
+
+        assert bundle.certificado.numero_certificado == "CERT-2024-002"
+        assert bundle.produtos[0].classe_quimica == "Piretroide"
+
+    def test_xml_engine_falls_back_to_openpyxl(self, sample_excel_file, monkeypatch):
+        def unsupported(self, file_path):
+            raise UnsupportedWorkbookError("feature not supported")
+
+        monkeypatch.setattr(ExcelExtractor, "_extract_xml", unsupported)
+
+        bundle = ExcelExtractor(XML_CONFIG).extract(sample_excel_file)
+
+        assert bundle.certificado.numero_certificado == "CERT-2024-001"
+        assert len(bundle.produtos) == 2
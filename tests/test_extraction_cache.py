@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+import shutil
+from dataclasses import replace
+
+import pytest
+
+from engine_excel_to_pdf.extractor.cache import ExtractionCache, config_fingerprint
+from engine_excel_to_pdf.extractor.excel_extractor import DEFAULT_CONFIG, ExcelExtractor
+from engine_excel_to_pdf.utils import file_sha256
+
+
+@pytest.fixture
+def cache(temp_dir):
+    return ExtractionCache(temp_dir / "cache")
+
+
+def test_cache_hit_skips_workbook_loading(sample_excel_file, cache, monkeypatch):
+    import openpyxl
+
+    extractor = ExcelExtractor(cache=cache)
+    first = extractor.extract(sample_excel_file)
+
+    def fail_load_workbook(*args, **kwargs):
+        raise AssertionError("openpyxl should not be used on a cache hit")
+
+    monkeypatch.setattr(openpyxl, "load_workbook", fail_load_workbook)
+    second = extractor.extract(sample_excel_file)
+
+    assert second.to_dict()["produtos"] == first.to_dict()["produtos"]
+    assert second.certificado.numero_certificado == first.certificado.numero_certificado
+    assert second.certificado.data_execucao == first.certificado.data_execucao
+    assert second.certificado.arquivo_origem == sample_excel_file.name
+
+
+def test_cache_hit_uses_new_file_name(sample_excel_file, cache, temp_dir):
+    extractor = ExcelExtractor(cache=cache)
+    extractor.extract(sample_excel_file)
+    copy = temp_dir / "reenvio.xlsx"
+    shutil.copy(sample_excel_file, copy)
+
+    bundle = extractor.extract(copy)
+
+    assert bundle.certificado.arquivo_origem == "reenvio.xlsx"
+    assert len(list(cache.cache_dir.glob("*.json"))) == 1
+
+
+def test_cache_key_depends_on_config(sample_excel_file, cache):
+    other = replace(DEFAULT_CONFIG, metodo_end_row=40)
+
+    assert cache.key_for(sample_excel_file, config_fingerprint(DEFAULT_CONFIG)) != cache.key_for(
+        sample_excel_file, config_fingerprint(other)
+    )
+
+
+def test_cache_key_ignores_reader_options(sample_excel_file, cache):
+    streaming = replace(DEFAULT_CONFIG, read_only=True, engine="xml")
+
+    assert config_fingerprint(streaming) == config_fingerprint(DEFAULT_CONFIG)
+
+
+def test_cache_key_reuses_known_file_hash(sample_excel_file, cache, temp_dir):
+    fingerprint = config_fingerprint(DEFAULT_CONFIG)
+
+    key = cache.key_for(temp_dir / "nao_existe.xlsx", fingerprint, file_hash=file_sha256(sample_excel_file))
+
+    assert key == cache.key_for(sample_excel_file, fingerprint)
+
+
+def test_cache_evicts_least_recently_used(sample_bundle, cache):
+    cache.put("a", sample_bundle)
+    cache.put("b", sample_bundle)
+    os.utime(cache.cache_dir / "a.json", (100, 100))
+    os.utime(cache.cache_dir / "b.json", (200, 200))
+    assert cache.get("a", arquivo_origem="x.xlsx") is not None
+
+    cache.max_bytes = 2 * (cache.cache_dir / "a.json").stat().st_size
+    cache.put("c", sample_bundle)
+
+    assert sorted(p.stem for p in cache.cache_dir.glob("*.json")) == ["a", "c"]
+
+
+def test_corrupt_entry_is_a_miss(cache, sample_bundle):
+    cache.put("chave", sample_bundle)
+    (cache.cache_dir / "chave.json").write_text("{", encoding="utf-8")
+
+    assert cache.get("chave", arquivo_origem="x.xlsx") is None
+    assert not (cache.cache_dir / "chave.json").exists()
+
+
+def test_put_does_not_list_the_directory_again(sample_bundle, cache, monkeypatch):
+    cache.put("a", sample_bundle)
+
+    def fail_glob(self, pattern):
+        raise AssertionError("the cache directory should only be listed once")
+
+    monkeypatch.setattr(type(cache.cache_dir), "glob", fail_glob)
+    cache.put("b", sample_bundle)
+    cache.put("a", sample_bundle)
+
+    assert cache.get("b", arquivo_origem="x.xlsx") is not None
+
+
+def test_stale_temporary_files_are_removed(sample_bundle, temp_dir):
+    cache_dir = temp_dir / "cache"
+    cache_dir.mkdir()
+    orphan = cache_dir / "interrompido.tmp"
+    orphan.write_text("{", encoding="utf-8")
+    os.utime(orphan, (100, 100))
+    recent = cache_dir / "em_andamento.tmp"
+    recent.write_text("{", encoding="utf-8")
+
+    ExtractionCache(cache_dir).put("a", sample_bundle)
+
+    assert not orphan.exists()
+    assert recent.exists()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from engine_excel_to_pdf.extractor.excel_extractor import DEFAULT_CONFIG
+from engine_excel_to_pdf.extractor.extraction_plan import ExtractionPlan
+
+
+def _rows(cells: dict[tuple[int, int], object]):
+    rows: dict[int, dict[int, object]] = {}
+    for (row, column), value in cells.items():
+        rows.setdefault(row, {})[column] = value
+    return sorted(rows.items())
+
+
+class TestExtractionPlan:
+    def test_compile_resolves_cell_references(self):
+        plan = ExtractionPlan.compile(DEFAULT_CONFIG)
+
+        fields = dict(plan.fields)
+        assert fields["numero_certificado"] == ((10, 3),)
+        assert fields["nome_fantasia"] == ((17, 3), (17, 4))
+        assert plan.min_row == 10
+        assert plan.last_cell_row == 48
+        assert plan.max_column == 9
+
+    def test_execute_uses_fallback_chain(self):
+        plan = ExtractionPlan.compile(DEFAULT_CONFIG)
+
+        extracted = plan.execute(_rows({(17, 3): "  ", (17, 4): "Fantasia D17"}))
+
+        assert extracted.certificado["nome_fantasia"] == "Fantasia D17"
+        assert extracted.certificado["razao_social"] == ""
+
+    def test_execute_collects_ranges(self):
+        plan = ExtractionPlan.compile(DEFAULT_CONFIG)
+
+        extracted = plan.execute(
+            _rows(
+                {
+                    (25, 6): "Piretroide",
+                    (26, 6): "Anticoagulante",
+                    (29, 4): "Produto A",
+                    (29, 9): 2.5,
+                    (31, 4): "Depois da lacuna",
+                    (34, 4): "Gel",
+                    (34, 8): "50g",
+                    (36, 4): "Isca",
+                    (81, 4): "Fora do intervalo",
+                }
+            )
+        )
+
+        assert extracted.classes == ["Piretroide", "Anticoagulante"]
+        assert extracted.produtos == [("Produto A", 2.5)]
+        assert extracted.metodos == [("Gel", "50g"), ("Isca", None)]
+
+    def test_execute_stops_after_last_needed_row(self):
+        plan = ExtractionPlan.compile(DEFAULT_CONFIG)
+        consumed: list[int] = []
+
+        def rows():
+            for row in range(1, 500):
+                consumed.append(row)
+                yield row, {}
+
+        plan.execute(rows())
+
+        assert consumed[-1] == 81
+
+    def test_execute_reads_to_sheet_end_without_metodo_end_row(self):
+        plan = ExtractionPlan.compile(replace(DEFAULT_CONFIG, metodo_end_row=None))
+
+        extracted = plan.execute(_rows({(34, 4): "Gel", (300, 4): "Isca"}))
+
+        assert [descricao for descricao, _ in extracted.metodos] == ["Gel", "Isca"]
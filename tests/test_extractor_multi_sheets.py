@@ -44,4 +44,43 @@ def test_extractor_selects_valid_sheet(engine_config, assets_dir, temp_dir):
     certificado = resultado["certificado"]
     assert certificado.numero_certificado == "CERT-2024-002"
     assert resultado["planilha"].exists()
-    assert resultado["pdf"].exists()
\ No newline at end of file
+    assert resultado["pdf"].exists()
+
+def test_extractor_loads_only_winning_sheet(temp_dir, monkeypatch):
+    import openpyxl
+
+    from engine_excel_to_pdf.extractor.excel_extractor import ExcelExtractor
+
+    excel_path = create_multi_sheet_file(temp_dir)
+    load_calls = []
+    original_load_workbook = openpyxl.load_workbook
+
+    def tracking_load_workbook(*args, **kwargs):
+        load_calls.append(kwargs.get("read_only", False))
+        return original_load_workbook(*args, **kwargs)
+
+    monkeypatch.setattr(openpyxl, "load_workbook", tracking_load_workbook)
+
+    bundle = ExcelExtractor().extract(excel_path)
+
+    assert bundle.certificado.numero_certificado == "CERT-2024-002"
+    assert bundle.produtos[0].nome_produto == "Inseticida Multi"
+    assert load_calls == [True]
+
+
+def test_extractor_falls_back_to_active_sheet(temp_dir):
+    from engine_excel_to_pdf.extractor.excel_extractor import ExcelExtractor
+
+    wb = Workbook()
+    wb.active.title = "Primeira"
+    ws = wb.create_sheet("Ativa")
+    ws["C10"] = "CERT-SEM-LICENCA"
+    ws["E21"] = "01/02/2024"
+    ws["B48"] = "01/08/2024"
+    wb.active = 1
+    file_path = temp_dir / "sem_licenca.xlsx"
+    wb.save(file_path)
+
+    bundle = ExcelExtractor().extract(file_path)
+
+    assert bundle.certificado.numero_certificado == "CERT-SEM-LICENCA"
@@ -75,3 +75,167 @@ class TestPDFGenerator:
         output_path = generator.generate(sample_bundle)
         
         assert output_path.stat().st_size > 100
+
+
+class TestConsolidatedJournal:
+    def test_deferred_writes_workbook_once(self, temp_dir, make_bundle, monkeypatch):
+        from openpyxl import load_workbook
+
+        generator = SpreadsheetGenerator(output_dir=temp_dir)
+        saves = []
+        original = SpreadsheetGenerator._write_workbook
+        monkeypatch.setattr(
+            SpreadsheetGenerator, "_write_workbook", lambda self, *args: saves.append(1) or original(self, *args)
+        )
+
+        with generator.deferred():
+            for numero in ("CERT-1", "CERT-2", "CERT-3"):
+                generator.generate(make_bundle(numero))
+            assert not generator.consolidated_path.exists()
+
+        assert saves == [1]
+        wb = load_workbook(generator.consolidated_path)
+        assert [row[1] for row in wb["certificado"].iter_rows(min_row=2, values_only=True)] == [
+            "CERT-1", "CERT-2", "CERT-3"
+        ]
+        assert wb["produtos"].max_row == 7
+        assert wb["metodos"].freeze_panes == "A2"
+        assert wb["produtos"].column_dimensions["D"].width == 30
+
+    def test_materialize_skips_workbooks_without_new_rows(self, temp_dir, make_bundle, monkeypatch):
+        from openpyxl import load_workbook
+
+        generator = SpreadsheetGenerator(output_dir=temp_dir)
+        saves = []
+        original = SpreadsheetGenerator._write_workbook
+        monkeypatch.setattr(
+            SpreadsheetGenerator, "_write_workbook", lambda self, *args: saves.append(1) or original(self, *args)
+        )
+
+        with generator.deferred():
+            for numero in ("CERT-1", "CERT-2"):
+                generator.generate(make_bundle(numero))
+
+        generator.materialize()
+        SpreadsheetGenerator(output_dir=temp_dir).materialize()
+
+        assert saves == [1]
+        wb = load_workbook(generator.consolidated_path)
+        assert [row[1] for row in wb["certificado"].iter_rows(min_row=2, values_only=True)] == ["CERT-1", "CERT-2"]
+
+        with SpreadsheetGenerator(output_dir=temp_dir).deferred() as other:
+            other.generate(make_bundle("CERT-3"))
+            generator.materialize()
+
+        assert saves == [1, 1]
+        assert load_workbook(generator.consolidated_path)["certificado"].max_row == 4
+
+    def test_existing_workbook_is_imported(self, temp_dir, make_bundle):
+        from openpyxl import load_workbook
+
+        SpreadsheetGenerator(output_dir=temp_dir).generate(make_bundle("CERT-1"))
+        generator = SpreadsheetGenerator(output_dir=temp_dir)
+        generator.journal_path.unlink()
+
+        generator.generate(make_bundle("CERT-2"))
+
+        wb = load_workbook(generator.consolidated_path)
+        assert [row[1] for row in wb["certificado"].iter_rows(min_row=2, values_only=True)] == ["CERT-1", "CERT-2"]
+        assert wb["metodos"].max_row == 5
+
+    def test_torn_journal_line_is_skipped(self, temp_dir, make_bundle):
+        from openpyxl import load_workbook
+
+        generator = SpreadsheetGenerator(output_dir=temp_dir)
+        generator.generate(make_bundle("CERT-1"))
+        with generator.journal_path.open("a", encoding="utf-8") as handle:
+            handle.write('["certificado", ["cortad')
+
+        generator.generate(make_bundle("CERT-2"))
+
+        wb = load_workbook(generator.consolidated_path)
+        assert wb["certificado"].max_row == 3
+
+
+class TestShardedSpreadsheet:
+    @staticmethod
+    def _numeros(path):
+        from openpyxl import load_workbook
+
+        return [row[1] for row in load_workbook(path)["certificado"].iter_rows(min_row=2, values_only=True)]
+
+    def test_month_shards_only_touch_active_shard(self, temp_dir, make_bundle):
+        from datetime import date
+
+        generator = SpreadsheetGenerator(output_dir=temp_dir, shard_by="month")
+        janeiro = generator.generate(make_bundle("CERT-1", data_execucao=date(2025, 1, 10)))
+        mtime = janeiro.stat().st_mtime_ns
+
+        fevereiro = generator.generate(make_bundle("CERT-2", data_execucao=date(2025, 2, 3)))
+
+        assert janeiro.name == "certificados_consolidados-2025-01.xlsx"
+        assert fevereiro.name == "certificados_consolidados-2025-02.xlsx"
+        assert janeiro.stat().st_mtime_ns == mtime
+        assert self._numeros(fevereiro) == ["CERT-2"]
+        assert not generator.consolidated_path.exists()
+        assert generator.shard_paths() == [janeiro, fevereiro]
+
+    def test_merge_combines_shards(self, temp_dir, make_bundle):
+        from datetime import date
+
+        generator = SpreadsheetGenerator(output_dir=temp_dir, shard_by="cnpj")
+        with generator.deferred():
+            generator.generate(make_bundle("CERT-1", data_execucao=date(2025, 1, 10), cnpj="45.997.418/0001-53"))
+            generator.generate(make_bundle("CERT-2", data_execucao=date(2025, 1, 11)))
+            generator.generate(make_bundle("CERT-3", data_execucao=date(2025, 1, 12), cnpj="45.997.418/0002-34"))
+
+        assert [path.name for path in generator.shard_paths()] == [
+            "certificados_consolidados-11222333.xlsx",
+            "certificados_consolidados-45997418.xlsx",
+        ]
+        assert self._numeros(generator.merge()) == ["CERT-2", "CERT-1", "CERT-3"]
+
+
+class TestRebuildConsolidated:
+    @pytest.mark.parametrize("backend", ["csv", "sqlite"])
+    def test_rebuild_from_storage_matches_generated(self, temp_dir, make_bundle, backend):
+        from openpyxl import load_workbook
+
+        from engine_excel_to_pdf.storage.csv_manager import CsvManager
+        from engine_excel_to_pdf.storage.sqlite_manager import SqliteManager
+
+        storage = (CsvManager if backend == "csv" else SqliteManager)(data_dir=temp_dir / "dados")
+        generator = SpreadsheetGenerator(output_dir=temp_dir)
+        for numero in ("CERT-1", "CERT-2", "CERT-3"):
+            bundle = make_bundle(numero)
+            storage.append_bundle(bundle)
+            generator.generate(bundle)
+        sheets = lambda path: {
+            ws.title: list(ws.iter_rows(values_only=True)) for ws in load_workbook(path).worksheets
+        }
+        expected = sheets(generator.consolidated_path)
+        generator.consolidated_path.write_bytes(b"corrompido")
+        generator.journal_path.write_text('["certificado", ["lixo"]]\n', encoding="utf-8")
+
+        path = generator.rebuild_consolidated(storage.iter_bundles())
+
+        assert sheets(path) == expected
+        wb = load_workbook(path)
+        assert wb["certificado"].freeze_panes == "A2"
+        assert wb["certificado"].column_dimensions["O"].width == 25
+        assert wb["metodos"].column_dimensions["C"].width == 30
+
+    def test_rebuild_sharded_replaces_every_shard(self, temp_dir, make_bundle):
+        from datetime import date
+
+        from openpyxl import load_workbook
+
+        generator = SpreadsheetGenerator(output_dir=temp_dir, shard_by="year")
+        generator.generate(make_bundle(data_execucao=date(2023, 5, 1)))
+        novo = make_bundle(data_execucao=date(2025, 5, 1))
+
+        path = generator.rebuild_consolidated([novo])
+
+        assert [p.name for p in generator.shard_paths()] == ["certificados_consolidados-2025.xlsx"]
+        assert not (temp_dir / "certificados_consolidados-2023.xlsx").exists()
+        assert load_workbook(path)["certificado"].max_row == 2
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+
+from engine_excel_to_pdf.storage.csv_manager import CsvManager
+from engine_excel_to_pdf.storage.identity import IdentityIndex
+from engine_excel_to_pdf.storage.sqlite_manager import SqliteManager
+from engine_excel_to_pdf.utils import file_sha256
+
+
+def reissue(make_bundle, **fields):
+    """The same certificate extracted again: new timestamp, hence a new id."""
+    return make_bundle(data_cadastro=datetime(2024, 2, 1, 8, 0), arquivo_origem="outra-planilha.xlsx", **fields)
+
+
+@pytest.fixture(params=[CsvManager, SqliteManager], ids=["csv", "sqlite"])
+def backend(request):
+    return request.param
+
+
+class TestFindDuplicate:
+    def test_same_identity_and_content_is_a_duplicate(self, backend, temp_dir, sample_bundle, make_bundle):
+        manager = backend(data_dir=temp_dir)
+        stored = manager.append_bundle(sample_bundle)
+
+        duplicate = manager.find_duplicate(reissue(make_bundle, cnpj="11222333000181"))
+
+        assert duplicate.certificado.id == stored.id
+        assert duplicate.produtos == sample_bundle.produtos
+
+    def test_append_skips_duplicates(self, backend, temp_dir, sample_bundle, make_bundle):
+        manager = backend(data_dir=temp_dir)
+        manager.append_bundle(sample_bundle)
+
+        returned = manager.append_bundle(reissue(make_bundle))
+
+        assert returned.id == sample_bundle.certificado.id
+        assert len(manager.list_certificados()) == 1
+
+    def test_changed_content_is_not_a_duplicate(self, backend, temp_dir, sample_bundle, make_bundle):
+        manager = backend(data_dir=temp_dir)
+        manager.append_bundle(sample_bundle)
+
+        assert manager.find_duplicate(reissue(make_bundle, nome_fantasia="Outra Loja")) is None
+        assert manager.find_duplicate(reissue(make_bundle, data_execucao=date(2024, 1, 16))) is None
+
+    def test_index_survives_restart(self, backend, temp_dir, sample_bundle, make_bundle):
+        backend(data_dir=temp_dir).append_bundle(sample_bundle)
+
+        manager = backend(data_dir=temp_dir)
+
+        assert manager.find_duplicate(reissue(make_bundle)).certificado.id == sample_bundle.certificado.id
+
+
+def test_file_hash_maps_to_stored_bundles(backend, temp_dir, sample_bundle):
+    planilha = temp_dir / "planilha.xlsx"
+    planilha.write_bytes(b"conteudo da planilha")
+    manager = backend(data_dir=temp_dir)
+    stored = manager.append_bundle(sample_bundle)
+
+    file_hash = file_sha256(planilha)
+    assert manager.get_bundles_by_file_hash(file_hash) == []
+    manager.record_file_hash(file_hash, [stored.id])
+
+    bundles = backend(data_dir=temp_dir).get_bundles_by_file_hash(file_hash)
+    assert [bundle.certificado.id for bundle in bundles] == [stored.id]
+
+
+def test_index_is_built_from_existing_data(temp_dir, sample_bundle, make_bundle):
+    manager = CsvManager(data_dir=temp_dir)
+    manager.append_bundle(sample_bundle)
+    manager.identities.path.unlink()
+
+    manager = CsvManager(data_dir=temp_dir)
+
+    assert manager.find_duplicate(reissue(make_bundle)) is not None
+
+
+def test_lookups_do_not_read_the_data(temp_dir, sample_bundle, make_bundle):
+    calls = []
+    index = IdentityIndex(temp_dir / "identidades.idx", source=lambda: calls.append(1) or [])
+    index.add(sample_bundle)
+
+    for _ in range(3):
+        assert index.find(reissue(make_bundle)) == sample_bundle.certificado.id
+
+    assert calls == [1]
@@ -93,3 +93,31 @@ class TestMotorCertificados:
         
         assert len(certificados) == 1
         assert certificados[0].numero_certificado == "CERT-2024-001"
+
+    def test_processar_upload_repetido_nao_extrai_de_novo(self, engine_config, sample_excel_file, assets_dir, monkeypatch):
+        engine_config.assets_dir = assets_dir
+        motor = MotorCertificados(config=engine_config)
+        primeiro = motor.processar_upload(sample_excel_file)
+        monkeypatch.setattr(motor.extractor, "extract", lambda *_: pytest.fail("extraído de novo"))
+
+        segundo = motor.processar_upload(sample_excel_file)
+
+        assert segundo["certificado"].id == primeiro["certificado"].id
+        assert len(motor.listar_certificados()) == 1
+
+
+def test_injected_extractor_keeps_plain_signature(engine_config, sample_excel_file):
+    class LegacyExtractor:
+        def __init__(self):
+            self.calls = []
+
+        def extract(self, file_path):
+            self.calls.append(file_path)
+            raise ValidationError(["planilha recusada"])
+
+    extractor = LegacyExtractor()
+    motor = MotorCertificados(config=engine_config, extractor=extractor)
+
+    with pytest.raises(ValidationError):
+        motor.processar_upload(sample_excel_file)
+    assert extractor.calls == [sample_excel_file]
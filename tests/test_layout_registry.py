@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from engine_excel_to_pdf.extractor.excel_extractor import DEFAULT_CONFIG
+from engine_excel_to_pdf.extractor.layouts import DEFAULT_LAYOUT, LayoutRegistry, TemplateLayout
+
+COMPACT_CONFIG = replace(
+    DEFAULT_CONFIG,
+    certificado_map={
+        **DEFAULT_CONFIG.certificado_map,
+        "numero_certificado": "B3",
+        "numero_licenca": "B4",
+    },
+)
+COMPACT_LAYOUT = TemplateLayout(
+    name="compacto",
+    config=COMPACT_CONFIG,
+    anchors={"A1": "Certificado de Execução", "B3": None},
+)
+
+
+def create_compact_file(tmpdir: Path, name: str = "compacto.xlsx", numero: str = "CMP-001") -> Path:
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = "CERTIFICADO   DE EXECUÇÃO"
+    ws["B3"] = numero
+    ws["B4"] = "LIC-CMP"
+    ws["E20"] = "11.222.333/0001-81"
+    ws["E21"] = "20 DE FEVEREIRO DE 2024"
+    ws["B48"] = "20 DE AGOSTO DE 2024"
+    file_path = tmpdir / name
+    wb.save(file_path)
+    return file_path
+
+
+def test_detects_registered_layout(temp_dir):
+    registry = LayoutRegistry([COMPACT_LAYOUT])
+
+    bundle = registry.extract(create_compact_file(temp_dir))
+
+    assert registry.detect(create_compact_file(temp_dir)) is COMPACT_LAYOUT
+    assert bundle.certificado.numero_certificado == "CMP-001"
+    assert bundle.certificado.numero_licenca == "LIC-CMP"
+
+
+def test_unmatched_workbook_uses_default_layout(temp_dir, sample_excel_file):
+    registry = LayoutRegistry([COMPACT_LAYOUT])
+
+    assert registry.detect(sample_excel_file) is DEFAULT_LAYOUT
+    assert registry.extract(sample_excel_file).certificado.numero_certificado == "CERT-2024-001"
+
+
+def test_every_workbook_is_probed(temp_dir, sample_excel_file):
+    registry = LayoutRegistry([COMPACT_LAYOUT])
+    compact = create_compact_file(temp_dir)
+    # Same sheet names and dimensions as the compact file, another label in A1.
+    other = create_compact_file(temp_dir, "outro.xlsx")
+    wb = load_workbook(other)
+    wb.active["A1"] = "Relatório de visita"
+    wb.save(other)
+
+    assert registry.detect(compact) is COMPACT_LAYOUT
+    assert registry.detect(other) is DEFAULT_LAYOUT
+    assert registry.detect(compact) is COMPACT_LAYOUT
+
+
+def test_register_rejects_duplicates_and_empty_anchors():
+    registry = LayoutRegistry([COMPACT_LAYOUT])
+
+    with pytest.raises(ValueError):
+        registry.register(COMPACT_LAYOUT)
+    with pytest.raises(ValueError):
+        registry.register(TemplateLayout(name="sem_ancoras", config=DEFAULT_CONFIG))
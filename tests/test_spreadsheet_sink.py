@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from openpyxl import load_workbook
+
+from engine_excel_to_pdf.generators.spreadsheet_generator import SpreadsheetGenerator
+from engine_excel_to_pdf.generators.spreadsheet_sink import SpreadsheetSink
+
+
+def numeros(path):
+    return [row[1] for row in load_workbook(path)["certificado"].iter_rows(min_row=2, values_only=True)]
+
+
+def test_futures_resolve_to_the_written_workbook(temp_dir, make_bundle):
+    generator = SpreadsheetGenerator(output_dir=temp_dir)
+    sink = SpreadsheetSink(generator)
+
+    futures = [sink.submit(make_bundle(f"CERT-{i}")) for i in range(5)]
+    sink.close()
+
+    assert {future.result(timeout=5) for future in futures} == {generator.consolidated_path}
+    assert numeros(generator.consolidated_path) == [f"CERT-{i}" for i in range(5)]
+
+
+def test_queued_bundles_are_written_together(temp_dir, make_bundle, monkeypatch):
+    generator = SpreadsheetGenerator(output_dir=temp_dir)
+    release = threading.Event()
+    writes = []
+    original = SpreadsheetGenerator._write_workbook
+
+    def slow_write(self, *args):
+        writes.append(1)
+        release.wait(5)
+        return original(self, *args)
+
+    monkeypatch.setattr(SpreadsheetGenerator, "_write_workbook", slow_write)
+    sink = SpreadsheetSink(generator)
+    first = sink.submit(make_bundle("CERT-0"))
+    while not writes:
+        time.sleep(0.001)
+    rest = [sink.submit(make_bundle(f"CERT-{i}")) for i in range(1, 6)]
+    release.set()
+    sink.drain()
+
+    assert first.done() and all(future.done() for future in rest)
+    assert len(writes) == 2
+    assert numeros(generator.consolidated_path) == [f"CERT-{i}" for i in range(6)]
+
+
+def test_write_errors_reach_the_future(temp_dir, sample_bundle, monkeypatch):
+    generator = SpreadsheetGenerator(output_dir=temp_dir)
+    monkeypatch.setattr(generator, "generate", lambda bundle: (_ for _ in ()).throw(OSError("disco cheio")))
+    sink = SpreadsheetSink(generator)
+
+    future = sink.submit(sample_bundle)
+    with pytest.raises(OSError, match="disco cheio"):
+        sink.drain()
+
+    with pytest.raises(OSError, match="disco cheio"):
+        future.result(timeout=5)
+    sink.drain()
+
+
+def test_close_reports_failed_batches(temp_dir, sample_bundle, monkeypatch):
+    generator = SpreadsheetGenerator(output_dir=temp_dir)
+    monkeypatch.setattr(generator, "generate", lambda bundle: (_ for _ in ()).throw(OSError("disco cheio")))
+    sink = SpreadsheetSink(generator)
+
+    sink.submit(sample_bundle)
+
+    with pytest.raises(OSError, match="disco cheio"):
+        sink.close()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from engine_excel_to_pdf.config import EngineConfig
+from engine_excel_to_pdf.interface import MotorCertificados
+from engine_excel_to_pdf.storage.csv_manager import CsvManager
+from engine_excel_to_pdf.storage.sqlite_manager import SqliteManager
+
+
+class TestSqliteManager:
+    def test_uses_wal_mode(self, temp_dir):
+        manager = SqliteManager(data_dir=temp_dir)
+
+        mode = manager._connection().execute("PRAGMA journal_mode").fetchone()[0]
+
+        assert mode == "wal"
+        assert manager.database_path.exists()
+
+    def test_append_and_get_bundle(self, temp_dir, sample_bundle):
+        manager = SqliteManager(data_dir=temp_dir)
+        certificado = manager.append_bundle(sample_bundle)
+
+        by_numero = manager.get_bundle_by_numero("CERT-2024-001")
+        by_arquivo = manager.get_bundle_by_arquivo("upload-excel")
+
+        assert by_numero.certificado.id == certificado.id
+        assert by_arquivo.certificado.id == certificado.id
+        assert [p.concentracao for p in by_numero.produtos] == [2.5, 0.005]
+        assert [m.metodo for m in by_numero.metodos] == ["Pulverização", "Gel"]
+        assert by_numero.certificado.data_cadastro == sample_bundle.certificado.data_cadastro
+
+    def test_skip_duplicate_by_arquivo_origem(self, temp_dir, sample_bundle):
+        manager = SqliteManager(data_dir=temp_dir)
+
+        manager.append_bundle(sample_bundle)
+        manager.append_bundle(sample_bundle)
+
+        assert len(manager.list_certificados()) == 1
+
+    def test_get_bundle_not_found(self, temp_dir):
+        manager = SqliteManager(data_dir=temp_dir)
+
+        assert manager.get_bundle_by_numero("INEXISTENTE") is None
+        assert manager.get_bundle_by_arquivo("nao-existe.xlsx") is None
+
+    def test_import_from_csv(self, temp_dir, make_bundle):
+        csv_manager = CsvManager(data_dir=temp_dir)
+        csv_manager.append_bundle(make_bundle("CERT-A", arquivo_origem="a.xlsx"))
+        csv_manager.append_bundle(make_bundle("CERT-B", arquivo_origem="b.xlsx"))
+        manager = SqliteManager(data_dir=temp_dir)
+
+        assert manager.import_from_csv() == 2
+        assert manager.import_from_csv() == 0
+
+        imported = manager.get_bundle_by_numero("CERT-B")
+        assert imported.certificado.arquivo_origem == "b.xlsx"
+        assert imported.certificado.valor is None
+        assert len(imported.produtos) == 2
+        assert [c.numero_certificado for c in manager.list_certificados()] == ["CERT-A", "CERT-B"]
+
+    def test_engine_config_selects_backend(self, temp_dir):
+        config = EngineConfig(output_dir=temp_dir, storage_backend="sqlite")
+
+        motor = MotorCertificados(config=config)
+
+        assert isinstance(motor.csv_manager, SqliteManager)
+        assert motor.csv_manager.database_path.parent == config.dados_dir
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime
 
 import pytest
 
@@ -83,6 +83,22 @@ class TestParsePtBrDate:
         result = parse_pt_br_date("  10   DE   MARÇO   DE   2024  ")
         assert result == date(2024, 3, 10)
 
+    def test_parse_numeric_date(self):
+        assert parse_pt_br_date("05/01/2024") == date(2024, 1, 5)
+
+    def test_parse_iso_datetime_string(self):
+        assert parse_pt_br_date("2024-01-05 00:00:00") == date(2024, 1, 5)
+
+    def test_parse_date_cells(self):
+        assert parse_pt_br_date(datetime(2024, 1, 5, 8, 30)) == date(2024, 1, 5)
+        assert parse_pt_br_date(date(2024, 1, 5)) == date(2024, 1, 5)
+
+    def test_parse_falls_back_to_dateutil(self):
+        assert parse_pt_br_date("5 January 2024") == date(2024, 1, 5)
+
+    def test_invalid_fast_path_date_falls_back_to_dateutil(self):
+        assert parse_pt_br_date("01/13/2024") == date(2024, 1, 13)
+
 
 class TestSanitizeCertificateFilename:
     def test_sanitize_with_slashes(self):